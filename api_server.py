@@ -0,0 +1,211 @@
+"""خدمة HTTP لقراءة MRZ بجانب واجهة Streamlit
+
+    python api_server.py --port 8000 --workers 4 --queue-size 16 --timeout 30
+    python api_server.py --index mrz_index.sqlite3     # إرجاع الإرسالات المكررة بدون OCR
+
+    curl -F file=@passport.jpg http://localhost:8000/mrz
+    curl --data-binary @passport.jpg -H "Content-Type: image/jpeg" http://localhost:8000/mrz
+"""
+import argparse
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+from PIL import Image, UnidentifiedImageError
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from ingest import decode_image
+from mrz_index import open_index, stored_fields_from_env
+from mrz_metrics import METRICS, stage
+from mrz_pipeline import PIPELINE_PARAMS, run_pipeline, warm_up
+from ocr_backends import OCR_BACKENDS, set_ocr_backend
+
+
+logger = logging.getLogger(__name__)
+
+# أخطاء فك ترميز الصورة المرسلة (خطأ العميل، وليس عطلاً في الخدمة)
+DECODE_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError)
+
+
+class InvalidImageError(Exception):
+    """الصورة المرسلة لا يمكن فك ترميزها (HTTP 422)"""
+
+
+def extract_from_bytes(data, index_path=None, params=None):
+    """تشغيل خط المعالجة على بايتات صورة وإرجاع (قاموس تحميل JSON، أزمنة المراحل)
+
+    الأزمنة تُعاد إلى العملية الرئيسية لأن سجل المقاييس في عمليات المعالجة منفصل.
+    index_path: ملف فهرس SQLite اختياري يُفتح مرة واحدة في كل عملية معالجة.
+    InvalidImageError للصورة غير الصالحة فقط؛ أي خطأ آخر عطل في الخدمة.
+    """
+    timings = {}
+    try:
+        with stage('decode', timings, size=len(data)):
+            image = decode_image(data)
+    except DECODE_ERRORS as e:
+        raise InvalidImageError(f"cannot decode image: {e}") from None
+    try:
+        index = open_index(index_path, stored_fields=stored_fields_from_env()) if index_path else None
+        _, _, mrz_data = run_pipeline(image, params, timings=timings, index=index)
+    except Exception as e:
+        # بعض استثناءات pytesseract لا يمكن إعادة بنائها عبر pickle في العملية الرئيسية؛
+        # السبب الأصلي يبقى في التتبع المرسل من عملية المعالجة
+        raise RuntimeError(f"{type(e).__name__}: {e}") from e
+    return mrz_data, timings
+
+
+def init_worker(ocr_backend, warm=True):
+    """تهيئة عملية المعالجة: واجهة OCR ثم تسخين خط المعالجة قبل أول طلب"""
+    set_ocr_backend(ocr_backend, 1)
+    if warm:
+        warm_up()
+
+
+class BoundedExecutor:
+    """مجموعة عمليات بعدد محدود من الطلبات المنتظرة والجارية"""
+
+    def __init__(self, workers, queue_size, ocr_backend='spawn', warm=True):
+        self.capacity = workers + queue_size
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(ocr_backend, warm)
+        )
+        if warm:
+            # أول إرسال ينشئ عمليات المعالجة فيبدأ تسخينها قبل وصول أول طلب
+            self._executor.submit(os.getpid)
+
+    def try_submit(self, func, *args):
+        """إرجاع Future أو None إذا كانت الطابور ممتلئاً"""
+        with self._lock:
+            if self.pending >= self.capacity:
+                return None
+            self.pending += 1
+        future = self._executor.submit(func, *args)
+        # العمل الذي تجاوز المهلة يبقى محسوباً حتى ينتهي فعلاً في العملية
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future):
+        with self._lock:
+            self.pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _read_image_bytes(request):
+    """قبول multipart (الحقل file) أو بايتات خام في جسم الطلب"""
+    content_type = request.headers.get('content-type', '')
+    if content_type.startswith('multipart/form-data'):
+        form = await request.form()
+        upload = form.get('file')
+        if upload is None or isinstance(upload, str):
+            return None
+        return await upload.read()
+    return await request.body()
+
+
+async def extract_mrz(request):
+    data = await _read_image_bytes(request)
+    if not data:
+        return JSONResponse({'error': 'no image provided'}, status_code=400)
+
+    executor = request.app.state.executor
+    future = executor.try_submit(extract_from_bytes, data, request.app.state.index_path, request.app.state.params)
+    if future is None:
+        return JSONResponse({'error': 'server busy'}, status_code=429, headers={'Retry-After': '1'})
+
+    try:
+        mrz_data, timings = await asyncio.wait_for(asyncio.wrap_future(future), timeout=request.app.state.timeout)
+    except asyncio.TimeoutError:
+        METRICS.record_result(error=True)
+        return JSONResponse({'error': 'processing timed out'}, status_code=504)
+    except InvalidImageError as e:
+        METRICS.record_result(error=True)
+        return JSONResponse({'error': str(e)}, status_code=422)
+    except Exception:
+        # Tesseract مفقود أو عملية معالجة انهارت أو خطأ برمجي: عطل في الخدمة وليس في الصورة
+        logger.exception("MRZ extraction failed")
+        METRICS.record_result(error=True)
+        return JSONResponse({'error': 'internal error'}, status_code=500)
+
+    for stage_name, ms in timings.items():
+        METRICS.observe(stage_name, ms / 1000)
+    METRICS.record_result(mrz_data)
+
+    if mrz_data is None:
+        return JSONResponse({'error': 'MRZ not found'}, status_code=422)
+    return JSONResponse(mrz_data)
+
+
+async def health(request):
+    executor = request.app.state.executor
+    return JSONResponse({'status': 'ok', 'pending': executor.pending, 'capacity': executor.capacity})
+
+
+async def metrics(request):
+    return PlainTextResponse(METRICS.render_prometheus(), media_type='text/plain; version=0.0.4')
+
+
+def create_app(workers=None, queue_size=16, timeout=30.0, ocr_backend='spawn', index_path=None, params=None,
+               warm=True):
+    workers = workers or os.cpu_count() or 1
+
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.executor = BoundedExecutor(workers, queue_size, ocr_backend, warm)
+        app.state.timeout = timeout
+        app.state.index_path = index_path
+        app.state.params = params
+        METRICS.set_startup_gauge('mrz_app_ready_seconds')
+        try:
+            yield
+        finally:
+            app.state.executor.shutdown()
+
+    return Starlette(
+        routes=[
+            Route('/mrz', extract_mrz, methods=['POST']),
+            Route('/health', health, methods=['GET']),
+            Route('/metrics', metrics, methods=['GET']),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="خدمة HTTP لقراءة MRZ")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="عدد عمليات المعالجة")
+    parser.add_argument('--queue-size', type=int, default=16, help="عدد الطلبات المنتظرة قبل الرد بـ 429")
+    parser.add_argument('--timeout', type=float, default=30.0, help="المهلة القصوى لكل طلب بالثواني")
+    parser.add_argument('--ocr-backend', choices=OCR_BACKENDS, default='spawn')
+    parser.add_argument('--index', default=None,
+                        help="ملف فهرس SQLite لإرجاع نتائج الجوازات المقروءة سابقاً بدون OCR")
+    parser.add_argument('--enhance-tiles', type=int, default=PIPELINE_PARAMS['enhance_tiles'],
+                        help="عدد الشرائح المتوازية لتقليل الضوضاء في كل طلب (مفيد مع عمال قليلين)")
+    parser.add_argument('--no-warm-up', action='store_true',
+                        help="عدم تسخين عمليات المعالجة عند البدء (passporteye يُستورد عند أول طلب)")
+    args = parser.parse_args(argv)
+
+    app = create_app(
+        args.workers, args.queue_size, args.timeout, args.ocr_backend, args.index,
+        params={'enhance_tiles': args.enhance_tiles},
+        warm=not args.no_warm_up
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,30 @@
+import io
+import os
+import tempfile
+import threading
 import streamlit as st
-from passporteye import read_mrz
 from PIL import Image, ImageDraw, ImageFont
 import json
-import io
 from datetime import datetime
 import numpy as np
-import cv2
+from mrz_cache import PipelineCache
+from mrz_export import export_records
+from mrz_index import MRZIndex, stored_fields_from_env
+from mrz_jobs import PRIORITY_BULK, PRIORITY_INTERACTIVE, JobQueue
+from mrz_pipeline import (
+    PIPELINE_PARAMS,
+    crop_mrz_region,
+    deskew_mrz,
+    enhance_mrz_image,
+    format_fields,
+    normalize_resolution,
+    warm_up,
+)
+from ingest import decode_image, is_document, read_pages
+from ocr_backends import set_ocr_backend
+from previews import make_preview
+from video_stream import read_stream
+from mrz_metrics import METRICS, stage, start_metrics_server
 
 # إعدادات الصفحة
 st.set_page_config(
@@ -14,75 +33,174 @@ st.set_page_config(
     layout="wide"
 )
 
+# الحد الأقصى لحجم الذاكرة المؤقتة للنتائج (بالبايت)
+CACHE_MAX_BYTES = 256 * 1024 * 1024
 
 
-# دالة لقص منطقة MRZ من الصورة
-def crop_mrz_region(image):
-    """قص منطقة MRZ من الصورة"""
-    img_array = np.array(image)
-    height, width = img_array.shape[:2]
-    
-    # تحديد منطقة MRZ (الربع السفلي من الصورة تقريباً)
-    mrz_height = int(height * 0.35)
-    y_start = height - mrz_height
-    
-    # قص المنطقة
-    cropped = img_array[y_start:height, :]
-    
-    return Image.fromarray(cropped)
+# ذاكرة مؤقتة مشتركة بين إعادات التشغيل والجلسات
+@st.cache_resource
+def get_pipeline_cache():
+    return PipelineCache(max_bytes=CACHE_MAX_BYTES)
 
-# دالة لتحسين جودة صورة MRZ
-def enhance_mrz_image(image):
-    """تحسين جودة صورة MRZ للقراءة الأفضل"""
-    img_array = np.array(image)
-    
-    # تحويل لرمادي
-    if len(img_array.shape) == 3:
-        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-    else:
-        gray = img_array
-    
-    # تطبيق فلتر لتقليل الضوضاء
-    denoised = cv2.fastNlMeansDenoising(gray)
-    
-    # تحسين التباين
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-    enhanced = clahe.apply(denoised)
-    
-    # تطبيق threshold لتحسين الوضوح
-    _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    
-    return Image.fromarray(binary)
-
-# دالة لتنسيق التاريخ
-def format_date(date_str):
-    """تحويل التاريخ من YYMMDD إلى DD/MM/YYYY"""
-    if not date_str or len(date_str) != 6:
-        return date_str
-    try:
-        yy = int(date_str[0:2])
-        mm = date_str[2:4]
-        dd = date_str[4:6]
-        current_year = datetime.now().year % 100
-        if yy > current_year + 10:
-            yyyy = 1900 + yy
-        else:
-            yyyy = 2000 + yy
-        return f"{dd}/{mm}/{yyyy}"
-    except:
-        return date_str
 
-# دالة لتنسيق الاسم
-def format_name(names, surname):
-    """تنسيق الاسم الكامل"""
-    if not names and not surname:
-        return "غير متوفر"
-    
-    names_clean = names.replace('<', ' ').strip() if names else ""
-    surname_clean = surname.replace('<', ' ').strip() if surname else ""
-    full_name = f"{names_clean} {surname_clean}".strip()
-    
-    return full_name if full_name else "غير متوفر"
+# واجهة OCR: 'spawn' (عملية tesseract لكل استدعاء) أو 'pool' (محركات جاهزة)
+@st.cache_resource
+def configure_ocr_backend():
+    backend = os.environ.get('MRZ_OCR_BACKEND', 'spawn')
+    pool_size = int(os.environ.get('MRZ_OCR_POOL_SIZE', '0')) or None
+    set_ocr_backend(backend, pool_size=pool_size)
+    return backend
+
+
+configure_ocr_backend()
+
+
+# بدء التشغيل: 'warm' يسخن passporteye و Tesseract و OpenCV في الخلفية أثناء عرض الصفحة،
+# و 'lazy' يؤجل استيراد passporteye حتى أول صورة
+@st.cache_resource
+def start_warm_up():
+    if os.environ.get('MRZ_STARTUP', 'warm') != 'warm':
+        return None
+    thread = threading.Thread(target=warm_up, name='mrz-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+start_warm_up()
+
+
+# فهرس دائم للجوازات المقروءة سابقاً عند ضبط MRZ_INDEX_PATH (حقول الهوية تُخزن فقط إذا أُدرجت في MRZ_INDEX_FIELDS)
+@st.cache_resource
+def get_mrz_index():
+    path = os.environ.get('MRZ_INDEX_PATH')
+    if not path:
+        return None
+    return MRZIndex(
+        path,
+        stored_fields=stored_fields_from_env(),
+        retention_days=float(os.environ.get('MRZ_INDEX_RETENTION_DAYS', '30')),
+        max_entries=int(os.environ.get('MRZ_INDEX_MAX_ENTRIES', '10000'))
+    )
+
+
+# خادم /metrics بصيغة Prometheus عند ضبط MRZ_METRICS_PORT
+@st.cache_resource
+def configure_metrics_server():
+    port = os.environ.get('MRZ_METRICS_PORT')
+    return start_metrics_server(int(port)) if port else None
+
+
+configure_metrics_server()
+
+
+# طابور مهام الدفعات: عمال في الخلفية بدلاً من تعطيل الجلسة حتى انتهاء القراءة
+# (الافتراضي في مجلد خاص بالمستخدم لأن الطابور يحتوي على صور الجوازات حتى معالجتها)
+@st.cache_resource
+def get_job_queue():
+    path = os.environ.get('MRZ_JOBS_PATH')
+    if not path:
+        directory = os.path.join(os.path.expanduser('~'), '.cache', 'mrz_reader')
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        path = os.path.join(directory, 'jobs.sqlite3')
+    return JobQueue(
+        path,
+        workers=int(os.environ.get('MRZ_JOB_WORKERS', '2')),
+        index=get_mrz_index()
+    )
+
+
+def job_pending(job):
+    return job is not None and (job['queued'] > 0 or job['running'] > 0)
+
+
+# متابعة مهام الجلسة وتحديث النتائج الجزئية كل ثانيتين دون إعادة تشغيل الصفحة كاملة،
+# والتحديث الدوري يتوقف عندما لا يبقى في مهام الجلسة ملف منتظر أو قيد المعالجة
+def show_jobs(job_ids):
+    job_queue = get_job_queue()
+    polling = any(job_pending(job_queue.status(job_id)) for job_id in job_ids)
+    st.fragment(job_list, run_every=2 if polling else None)(job_ids, polling)
+
+
+def job_list(job_ids, polling):
+    job_queue = get_job_queue()
+    pending = False
+    for job_id in reversed(job_ids):
+        job = job_queue.status(job_id)
+        if job is None:
+            continue
+        pending = pending or job_pending(job)
+        items, _ = job_queue.results(job_id)
+        done = job['status'] in ('done', 'cancelled') and job['running'] == 0
+        progress = (job['finished'] + job['cancelled']) / job['total'] if job['total'] else 1.0
+        
+        label = {'queued': '⏳ في الانتظار', 'running': '🔄 جاري المعالجة', 'done': '✅ اكتملت', 'cancelled': '🚫 ملغاة'}
+        st.markdown(f"**📦 مهمة {job_id[:8]}** • {label[job['status']]}" + (" • ⚡" if job['priority'] > PRIORITY_BULK else ""))
+        st.progress(progress, text=f"{job['finished']} / {job['total']} ملف • {job['elapsed_s']:.0f}s")
+        if not done and st.button("🚫 إلغاء", key=f"cancel_{job_id}"):
+            job_queue.cancel(job_id)
+        
+        rows = []
+        for item in sorted(items, key=lambda item: item['position']):
+            if item['error']:
+                rows.append({'الملف': item['name'], 'الصفحة': '', 'الدقة': '', 'الاسم': f"❌ {item['error']}", 'رقم الجواز': ''})
+            for record in item['records']:
+                mrz_data = record['mrz_data']
+                fields = format_fields(mrz_data) if mrz_data else {}
+                rows.append({
+                    'الملف': item['name'],
+                    'الصفحة': record['page'] + 1,
+                    'الدقة': f"{mrz_data.get('valid_score', 0)}%" if mrz_data else '❌',
+                    'الاسم': fields.get('full_name', ''),
+                    'رقم الجواز': fields.get('passport_number', ''),
+                })
+        if rows:
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+        if done and items:
+            col_json, col_csv = st.columns(2)
+            with col_json:
+                st.download_button(
+                    "⬇️ تحميل JSON",
+                    json.dumps(items, ensure_ascii=False, indent=2),
+                    file_name=f"mrz_job_{job_id[:8]}.json",
+                    mime="application/json",
+                    key=f"download_{job_id}"
+                )
+            with col_csv:
+                csv_output = io.StringIO()
+                export_records(
+                    (
+                        {'path': item['name'], 'page': record['page'], 'found': record['mrz_data'] is not None,
+                         'mrz_data': record['mrz_data'], 'error': item['error']}
+                        for item in items for record in (item['records'] or [{'page': None, 'mrz_data': None}])
+                    ),
+                    csv_output,
+                    fmt='csv'
+                )
+                st.download_button(
+                    "⬇️ تحميل CSV",
+                    csv_output.getvalue(),
+                    file_name=f"mrz_job_{job_id[:8]}.csv",
+                    mime="text/csv",
+                    key=f"download_csv_{job_id}"
+                )
+    
+    # انتهت كل المهام: إعادة تشغيل الصفحة لتسجيل الجزء بدون تحديث دوري
+    if polling and not pending:
+        st.rerun()
+
+
+# متابعة القراءة التفاعلية (في ذاكرة الطابور)؛ عند انتهائها تُحفظ النتيجة ويُعاد تشغيل الصفحة لعرضها
+def poll_read_job(read_id, cache_key):
+    job_queue = get_job_queue()
+    status = job_queue.read_status(read_id)
+    if status in ('queued', 'running'):
+        st.info("⏳ جاري قراءة البيانات من MRZ..." if status == 'running' else "⏳ في انتظار دور القراءة...")
+        return
+    result = job_queue.read_result(read_id) or {'error': 'انتهت القراءة بدون نتيجة'}
+    st.session_state['read_result'] = {'cache_key': cache_key, **result}
+    del st.session_state['read_job']
+    st.rerun()
+
 
 # CSS مخصص لتحسين المظهر
 st.markdown("""
@@ -203,6 +321,18 @@ with st.sidebar:
     """)
     
     st.markdown("---")
+    cache_stats = get_pipeline_cache().stats()
+    st.caption(
+        f"🗄️ الذاكرة المؤقتة: {cache_stats['hits']} إصابة / {cache_stats['misses']} إخفاق"
+        f" • {cache_stats['entries']} عنصر • {cache_stats['bytes'] / (1024 * 1024):.1f} MB"
+    )
+    mrz_index = get_mrz_index()
+    if mrz_index is not None:
+        index_stats = mrz_index.stats()
+        st.caption(
+            f"♻️ فهرس الجوازات: {index_stats['hits']} إصابة / {index_stats['misses']} إخفاق"
+            f" • {index_stats['documents']} وثيقة"
+        )
     st.caption("💻 PassportEye + OpenCV")
 
 # طريقة إدخال الصورة
@@ -211,7 +341,7 @@ st.subheader("📸 طريقة إدخال الصورة")
 
 input_method = st.radio(
     "اختر المصدر:",
-    ["📁 رفع من المعرض", "📷 التقاط من الكاميرا"],
+    ["📁 رفع من المعرض", "📷 التقاط من الكاميرا", "🎥 فيديو", "📦 دفعة صور"],
     horizontal=True
 )
 
@@ -220,13 +350,77 @@ uploaded_file = None
 if input_method == "📁 رفع من المعرض":
     uploaded_file = st.file_uploader(
         "اختر صورة جواز السفر",
-        type=['jpg', 'jpeg', 'png', 'bmp'],
-        help="الصيغ المدعومة: JPG, PNG, BMP"
+        type=['jpg', 'jpeg', 'png', 'bmp', 'pdf', 'tif', 'tiff'],
+        help="الصيغ المدعومة: JPG, PNG, BMP, PDF, TIFF (متعدد الصفحات)"
     )
     
     if uploaded_file:
         st.success("✅ تم رفع الصورة بنجاح!")
 
+elif input_method == "🎥 فيديو":
+    # فيديو مسجل: فرز الإطارات ثم التصويت بين قراءات الإطارات الجيدة
+    video_file = st.file_uploader(
+        "اختر فيديو لجواز السفر",
+        type=['mp4', 'avi', 'mov', 'mkv', 'webm'],
+        help="حرّك الجواز ببطء أمام الكاميرا مع ظهور منطقة MRZ كاملة"
+    )
+    
+    if video_file and st.button("🔍 قراءة الفيديو", type="primary", use_container_width=True):
+        suffix = os.path.splitext(video_file.name)[1]
+        with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+            tmp.write(video_file.getvalue())
+            tmp.flush()
+            stream_stats = {}
+            with st.spinner("⏳ جاري فرز الإطارات وقراءة MRZ..."):
+                try:
+                    video_data = read_stream(tmp.name, PIPELINE_PARAMS, step=2, stats=stream_stats)
+                except Exception as e:
+                    video_data = None
+                    METRICS.record_result(error=True)
+                    st.error(f"❌ حدث خطأ: {str(e)}")
+                else:
+                    METRICS.record_result(video_data)
+        
+        if stream_stats:
+            st.caption(
+                f"🎞️ {stream_stats['frames']} إطار • {stream_stats['dropped_no_mrz']} بلا MRZ"
+                f" • {stream_stats['dropped_blurry']} ضبابي • {stream_stats['readings']} قراءة"
+                f" • {stream_stats['elapsed_ms']:.0f}ms"
+            )
+        if video_data is None:
+            st.error("❌ لم يتم العثور على MRZ واضحة في الفيديو!")
+        else:
+            st.metric("دقة الاستخراج", f"{video_data.get('valid_score', 0)}%")
+            st.table(format_fields(video_data))
+            st.download_button(
+                "⬇️ تحميل JSON",
+                json.dumps(video_data, ensure_ascii=False, indent=2),
+                file_name="mrz_video.json",
+                mime="application/json"
+            )
+
+elif input_method == "📦 دفعة صور":
+    # الدفعات تُضاف إلى طابور المهام وتظهر نتائجها تدريجياً
+    batch_files = st.file_uploader(
+        "اختر صور أو مستندات جوازات السفر",
+        type=['jpg', 'jpeg', 'png', 'bmp', 'pdf', 'tif', 'tiff'],
+        accept_multiple_files=True
+    )
+    urgent = st.checkbox("⚡ أولوية عالية", value=len(batch_files or []) == 1,
+                         help="المهام العاجلة تُعالج قبل الدفعات الكبيرة المنتظرة")
+    
+    if batch_files and st.button("📥 إضافة إلى طابور المعالجة", type="primary", use_container_width=True):
+        job_id = get_job_queue().submit(
+            [(file.name, file.getvalue()) for file in batch_files],
+            priority=PRIORITY_INTERACTIVE if urgent else PRIORITY_BULK,
+            params=PIPELINE_PARAMS
+        )
+        st.session_state.setdefault('job_ids', []).append(job_id)
+        st.success(f"✅ تمت إضافة {len(batch_files)} ملف إلى الطابور")
+    
+    if st.session_state.get('job_ids'):
+        show_jobs(st.session_state['job_ids'])
+
 else:
     # عرض إرشادات التصوير
     st.markdown("""
@@ -247,101 +441,237 @@ else:
         uploaded_file = camera_image
         st.success("✅ تم التقاط الصورة!")
 
+# ملفات PDF و TIFF متعددة الصفحات: النتائج تظهر صفحة بصفحة فور انتهائها
+if uploaded_file is not None and is_document(uploaded_file.name):
+    document_file, uploaded_file = uploaded_file, None
+    
+    st.markdown("---")
+    st.subheader("📄 معالجة المستند صفحة بصفحة")
+    
+    if st.button("🔍 استخراج البيانات من كل الصفحات", type="primary", use_container_width=True):
+        document_results = []
+        progress = st.empty()
+        try:
+            for page in read_pages(document_file, PIPELINE_PARAMS, index=get_mrz_index()):
+                progress.caption(f"⏳ تمت معالجة الصفحة {page['page'] + 1}")
+                if page['mrz_data'] is None:
+                    continue
+                page_data = page['mrz_data']
+                document_results.append({'page': page['page'] + 1, **page_data})
+                with st.expander(
+                    f"📄 الصفحة {page['page'] + 1} • دقة {page_data.get('valid_score', 0)}%",
+                    expanded=True
+                ):
+                    st.image(page['cropped'], use_container_width=True)
+                    st.table(format_fields(page_data))
+        except Exception as e:
+            st.error(f"❌ حدث خطأ: {str(e)}")
+        
+        progress.caption(f"✅ {len(document_results)} صفحة تحتوي على MRZ")
+        if document_results:
+            st.download_button(
+                "⬇️ تحميل JSON",
+                json.dumps(document_results, ensure_ascii=False, indent=2),
+                file_name="mrz_pages.json",
+                mime="application/json"
+            )
+
 # معالجة الصورة
 if uploaded_file is not None:
     
     st.markdown("---")
     st.subheader("🔄 معالجة الصورة")
     
-    # قراءة الصورة
-    image = Image.open(uploaded_file)
+    # البحث عن نتائج سابقة لنفس الصورة والإعدادات
+    pipeline_cache = get_pipeline_cache()
+    cache_key = PipelineCache.make_key(uploaded_file.getvalue(), PIPELINE_PARAMS)
+    cached_entry = pipeline_cache.get(cache_key) or {}
+    stage_timings = dict(cached_entry.get('timings', {}))
+    
+    previews = dict(cached_entry.get('previews', {}))
+    
+    # الصور المصغرة تُرسل افتراضياً، والدقة الكاملة عند الطلب فقط
+    show_full_resolution = st.toggle("🔎 عرض الصور بالدقة الكاملة", value=False)
+    
+    # فك ترميز الصورة فقط عند الحاجة (القص والصور المصغرة محفوظة في الذاكرة المؤقتة)
+    image = None
+    if 'cropped' not in cached_entry or 'original' not in previews or show_full_resolution:
+        with stage('decode', stage_timings, size=uploaded_file.size):
+            image = decode_image(uploaded_file)
+    
+    # قص منطقة MRZ
+    if 'cropped' in cached_entry:
+        mrz_cropped = Image.fromarray(cached_entry['cropped'])
+    else:
+        with st.spinner("✂️ جاري قص منطقة MRZ..."), stage('crop', stage_timings):
+            mrz_cropped = crop_mrz_region(
+                image,
+                crop_ratio=PIPELINE_PARAMS['crop_ratio'],
+                detect_mrz=PIPELINE_PARAMS['detect_mrz']
+            )
     
-    # عرض الصورة الأصلية
+    # تحسين الصورة
+    if 'enhanced' in cached_entry and 'normalized' in cached_entry:
+        mrz_normalized = Image.fromarray(cached_entry['normalized'])
+        mrz_enhanced = Image.fromarray(cached_entry['enhanced'])
+    else:
+        with st.spinner("✨ جاري تحسين جودة الصورة..."):
+            with stage('normalize', stage_timings):
+                mrz_normalized = normalize_resolution(
+                    mrz_cropped,
+                    target_char_height=PIPELINE_PARAMS['target_char_height']
+                )
+            # تصحيح ميل الأسطر بتحويل واحد قبل التحسين
+            if PIPELINE_PARAMS['deskew']:
+                with stage('deskew', stage_timings):
+                    mrz_normalized, _ = deskew_mrz(mrz_normalized)
+            mrz_enhanced = enhance_mrz_image(
+                mrz_normalized,
+                clahe_clip_limit=PIPELINE_PARAMS['clahe_clip_limit'],
+                clahe_tile_grid=PIPELINE_PARAMS['clahe_tile_grid'],
+                denoiser=PIPELINE_PARAMS['denoiser'],
+                timings=stage_timings,
+                tiles=PIPELINE_PARAMS['enhance_tiles']
+            )
+        pipeline_cache.put(
+            cache_key,
+            cropped=np.array(mrz_cropped),
+            normalized=np.array(mrz_normalized),
+            enhanced=np.array(mrz_enhanced),
+            timings=stage_timings
+        )
+    
+    # الصور المصغرة تُنشأ مرة واحدة لكل صورة مرفوعة
+    if 'original' not in previews:
+        previews = {
+            'original': make_preview(image),
+            'cropped': make_preview(mrz_cropped),
+            'enhanced': make_preview(mrz_enhanced),
+        }
+        pipeline_cache.put(cache_key, previews=previews)
+    
+    # عرض الصور
     col1, col2, col3 = st.columns([1, 1, 1])
     
     with col1:
         st.markdown("**📷 الصورة الأصلية**")
-        st.image(image, use_container_width=True)
-    
-    # قص منطقة MRZ
-    with st.spinner("✂️ جاري قص منطقة MRZ..."):
-        mrz_cropped = crop_mrz_region(image)
+        st.image(image if show_full_resolution else previews['original'], use_container_width=True)
     
     with col2:
         st.markdown("**✂️ منطقة MRZ المقصوصة**")
-        st.image(mrz_cropped, use_container_width=True)
-    
-    # تحسين الصورة
-    with st.spinner("✨ جاري تحسين جودة الصورة..."):
-        mrz_enhanced = enhance_mrz_image(mrz_cropped)
+        st.image(mrz_cropped if show_full_resolution else previews['cropped'], use_container_width=True)
     
     with col3:
         st.markdown("**✨ بعد التحسين**")
-        st.image(mrz_enhanced, use_container_width=True)
+        st.image(mrz_enhanced if show_full_resolution else previews['enhanced'], use_container_width=True)
     
     st.markdown("---")
     
-    # زر المعالجة
+    # زر المعالجة: القراءة تُضاف إلى طابور المهام بأولوية عالية بدلاً من تعطيل الجلسة
     process_button = st.button("🔍 استخراج البيانات الآن", type="primary", use_container_width=True)
     
+    read_result = None
     if process_button:
-        with st.spinner("⏳ جاري قراءة البيانات من MRZ..."):
-            try:
-                # حفظ الصورة المحسنة في buffer
-                img_buffer = io.BytesIO()
-                mrz_enhanced.save(img_buffer, format='PNG')
-                img_buffer.seek(0)
-                
-                # قراءة MRZ
-                mrz = read_mrz(img_buffer)
-                
-                if mrz is None:
-                    st.error("❌ لم يتم العثور على منطقة MRZ في الصورة!")
-                    st.warning("""
-                    **يرجى المحاولة مرة أخرى مع:**
-                    - تصوير أوضح لمنطقة MRZ
-                    - إضاءة أفضل
-                    - تجنب الظلال
-                    - التأكد من استقرار الكاميرا
-                    """)
-                else:
-                    mrz_data = mrz.to_dict()
-                    
-                    # عرض درجة الدقة
-                    valid_score = mrz_data.get('valid_score', 0)
-                    
-                    if valid_score >= 80:
-                        emoji = "🎉"
-                        status = "ممتازة"
-                    elif valid_score >= 50:
-                        emoji = "👍"
-                        status = "جيدة"
-                    else:
-                        emoji = "⚠️"
-                        status = "ضعيفة"
-                    
-                    st.markdown(f"""
-                    <div class="big-metric">
-                        <p>{emoji} دقة الاستخراج</p>
-                        <h1>{valid_score}%</h1>
-                        <p>الحالة: {status}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # حفظ البيانات في session state
-                    st.session_state['mrz_data'] = mrz_data
-                    st.session_state['processed'] = True
-                    st.session_state['mrz_image'] = mrz_enhanced
-                    
-            except Exception as e:
-                st.error(f"❌ حدث خطأ: {str(e)}")
-                st.info("""
-                💡 **اقتراحات:**
-                - جرب وضع التصوير الآخر
-                - تأكد من وضوح السطرين السفليين
-                - استخدم إضاءة أفضل
-                - تجنب الانعكاسات على الجواز
-                """)
+        if 'mrz_data' in cached_entry:
+            # نتيجة محفوظة مسبقاً لنفس الصورة
+            read_result = {
+                'mrz_data': cached_entry['mrz_data'],
+                'read_metrics': cached_entry['read_metrics'],
+                'read_image': Image.fromarray(cached_entry['read_image']),
+            }
+        else:
+            # المنطقة المقصوصة والموحدة الدقة المحسوبة أعلاه، فالطابور يبدأ من القراءة مباشرة
+            st.session_state['read_job'] = {
+                'id': get_job_queue().submit_read(mrz_cropped, mrz_normalized, params=PIPELINE_PARAMS),
+                'cache_key': cache_key,
+            }
+    
+    read_job = st.session_state.get('read_job')
+    if read_job is not None and read_job['cache_key'] == cache_key:
+        st.fragment(poll_read_job, run_every=1)(read_job['id'], cache_key)
+    
+    # نتيجة القراءة بعد انتهائها تُحفظ في الذاكرة المؤقتة مع الصورة المقروءة فعلاً وزمن المراحل
+    finished_read = st.session_state.pop('read_result', None)
+    if finished_read is not None and finished_read['cache_key'] == cache_key:
+        read_result = finished_read
+        if 'error' not in finished_read:
+            # نتيجة الفهرس بدون OCR: لا توجد صورة مقروءة، فتُعرض المحسنة
+            if read_result['read_image'] is None:
+                read_result['read_image'] = mrz_enhanced
+            stage_timings.update(read_result['timings'])
+            pipeline_cache.put(
+                cache_key,
+                mrz_data=read_result['mrz_data'],
+                read_metrics=read_result['read_metrics'],
+                read_image=np.array(read_result['read_image']),
+                timings=stage_timings
+            )
+    
+    if read_result is not None:
+        mrz_data = read_result.get('mrz_data')
+        read_metrics = read_result.get('read_metrics')
+        
+        if 'error' in read_result:
+            st.error(f"❌ حدث خطأ: {read_result['error']}")
+            st.info("""
+            💡 **اقتراحات:**
+            - جرب وضع التصوير الآخر
+            - تأكد من وضوح السطرين السفليين
+            - استخدم إضاءة أفضل
+            - تجنب الانعكاسات على الجواز
+            """)
+        elif mrz_data is None:
+            st.error("❌ لم يتم العثور على منطقة MRZ في الصورة!")
+            st.warning("""
+            **يرجى المحاولة مرة أخرى مع:**
+            - تصوير أوضح لمنطقة MRZ
+            - إضاءة أفضل
+            - تجنب الظلال
+            - التأكد من استقرار الكاميرا
+            """)
+        else:
+            # عرض درجة الدقة
+            valid_score = mrz_data.get('valid_score', 0)
+            
+            if valid_score >= 80:
+                emoji = "🎉"
+                status = "ممتازة"
+            elif valid_score >= 50:
+                emoji = "👍"
+                status = "جيدة"
+            else:
+                emoji = "⚠️"
+                status = "ضعيفة"
+            
+            st.markdown(f"""
+            <div class="big-metric">
+                <p>{emoji} دقة الاستخراج</p>
+                <h1>{valid_score}%</h1>
+                <p>الحالة: {status}</p>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # عدد مراحل القراءة وزمن كل مرحلة
+            if mrz_data.get('method') == 'dedup':
+                st.caption("♻️ نتيجة محفوظة لجواز مقروء سابقاً (بدون OCR)")
+            elif read_metrics:
+                st.caption(
+                    f"🔁 مراحل القراءة: {read_metrics['passes']} • {read_metrics['total_ms']:.0f}ms — "
+                    + " ← ".join(f"{item['pass']} ({item['ms']:.0f}ms)" for item in read_metrics['pass_details'])
+                )
+            
+            # حفظ البيانات في session state
+            st.session_state['mrz_data'] = mrz_data
+            st.session_state['processed'] = True
+            # صورة مصغرة مضغوطة بدلاً من صورة PIL كاملة في session state
+            st.session_state['mrz_image'] = make_preview(read_result['read_image'])
+    
+    # تفاصيل زمن كل مرحلة
+    with st.expander("⏱️ زمن مراحل المعالجة"):
+        st.table({
+            "المرحلة": list(stage_timings.keys()),
+            "الزمن (ms)": [f"{ms:.1f}" for ms in stage_timings.values()],
+        })
     
     # عرض البيانات المستخرجة
     if st.session_state.get('processed', False):
@@ -351,10 +681,11 @@ if uploaded_file is not None:
         st.header("📋 البيانات المستخرجة")
         
         # تنسيق البيانات
-        full_name = format_name(mrz_data.get('names'), mrz_data.get('surname'))
-        birth_date = format_date(mrz_data.get('date_of_birth'))
-        expiry_date = format_date(mrz_data.get('expiration_date'))
-        passport_number = mrz_data.get('number', '').replace('<', '').strip()
+        formatted = format_fields(mrz_data)
+        full_name = formatted['full_name']
+        birth_date = formatted['birth_date']
+        expiry_date = formatted['expiry_date']
+        passport_number = formatted['passport_number']
         
         # البيانات الرئيسية
         main_col1, main_col2 = st.columns(2)
@@ -486,6 +817,7 @@ if uploaded_file is not None:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 نوع MRZ: {mrz_data.get('mrz_type', 'N/A')}
 طريقة المعالجة: {mrz_data.get('method', 'N/A')}
+أدنى ثقة OCR لحرف: {mrz_data.get('min_confidence', 'N/A')}
 وقت المعالجة: {mrz_data.get('walltime', 0):.2f} ثانية
 
 ═══════════════════════════════════════
@@ -583,7 +915,11 @@ st.markdown("""
 <div style='text-align: center; color: #7f8c8d; padding: 20px;'>
     <p>💻 تم التطوير باستخدام Streamlit + PassportEye + OpenCV</p>
     <p>✂️ مع قص تلقائي لمنطقة MRZ وتحسين ذكي للصور</p>
-    <p>🔒 جميع البيانات تتم معالجتها محلياً - لا يتم حفظ أي معلومات</p>
+    <p>🔒 جميع البيانات تتم معالجتها محلياً - الصورة الفردية تبقى في الذاكرة فقط</p>
+    <p style='font-size: 12px;'>📦 ملفات الدفعات تُحفظ مؤقتاً في طابور خاص بالمستخدم حتى معالجتها، ونتائجها لمدة 24 ساعة</p>
     <p style='font-size: 12px; margin-top: 10px;'>© 2024 MRZ Reader - All Rights Reserved</p>
 </div>
 """, unsafe_allow_html=True)
+
+# الزمن من بدء العملية حتى اكتمال أول عرض للصفحة (يُسجل مرة واحدة)
+METRICS.set_startup_gauge('mrz_app_ready_seconds')
@@ -0,0 +1,237 @@
+"""معالجة دفعات من صور جوازات السفر من سطر الأوامر
+
+مثال:
+    python batch_cli.py scans/ -o results.jsonl --workers 8
+    python batch_cli.py "scans/**/*.jpg" -o results.jsonl
+    python batch_cli.py scans/ -o results.csv          # أعمدة مسطحة (أو .parquet أو --format jsonl)
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from ingest import DOCUMENT_EXTENSIONS, decode_image, is_document, read_pages
+from mrz_export import EXPORT_FORMATS, ResultExporter, infer_format
+from mrz_index import open_index, stored_fields_from_env
+from mrz_metrics import stage
+from mrz_pipeline import DENOISERS, PIPELINE_PARAMS, format_fields, run_pipeline
+from ocr_backends import OCR_BACKENDS, set_ocr_backend
+
+
+# امتدادات الصور المدعومة (PDF و TIFF تُقرأ صفحة بصفحة)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp') + DOCUMENT_EXTENSIONS
+
+# عدد الصور المرسلة لكل عملية في وقت واحد (الذاكرة ثابتة مهما كان عدد الصور)
+IN_FLIGHT_PER_WORKER = 2
+
+
+def collect_paths(inputs, recursive=False):
+    """جمع مسارات الصور من مجلدات أو أنماط glob أو ملفات مفردة"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*') if recursive else os.path.join(item, '*')
+            candidates = glob.glob(pattern, recursive=recursive)
+        elif glob.has_magic(item):
+            candidates = glob.glob(item, recursive=True)
+        else:
+            candidates = [item]
+        paths.extend(
+            path for path in candidates
+            if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    return sorted(set(paths))
+
+
+def process_path(path, params=None, index_path=None):
+    """تشغيل خط المعالجة على صورة واحدة وإرجاع قائمة سجلات JSON (سجل لكل صفحة)
+
+    index_path: ملف فهرس SQLite اختياري يُفتح مرة واحدة في كل عملية.
+    """
+    index = open_index(index_path, stored_fields=stored_fields_from_env()) if index_path else None
+    if is_document(path):
+        return process_document(path, params, index=index)
+    return [process_image(path, params, index=index)]
+
+
+def process_image(path, params=None, index=None):
+    """تشغيل خط المعالجة على صورة واحدة وإرجاع سجل JSON"""
+    started = time.perf_counter()
+    record = {'path': path}
+    timings = {}
+    metrics = {}
+    try:
+        with stage('decode', timings, size=os.path.getsize(path)):
+            image = decode_image(path)
+        _, _, mrz_data = run_pipeline(image, params, timings=timings, metrics=metrics, index=index)
+        record['found'] = mrz_data is not None
+        record['mrz_data'] = mrz_data
+        if mrz_data is not None:
+            record.update(format_fields(mrz_data))
+    except Exception as e:
+        record['found'] = False
+        record['error'] = str(e)
+    record['timings_ms'] = timings
+    if metrics:
+        record['passes'] = metrics['passes']
+        record['pass_details'] = metrics['pass_details']
+    record['latency_ms'] = (time.perf_counter() - started) * 1000
+    return record
+
+
+def process_document(path, params=None, index=None):
+    """سجل لكل صفحة في ملف PDF أو TIFF (found=False للصفحات بلا MRZ)"""
+    records = []
+    started = time.perf_counter()
+    try:
+        for page in read_pages(path, params, index=index):
+            mrz_data = page['mrz_data']
+            record = {'path': path, 'page': page['page'], 'found': mrz_data is not None, 'mrz_data': mrz_data}
+            if mrz_data is not None:
+                record.update(format_fields(mrz_data))
+            record['timings_ms'] = page['timings']
+            if page['metrics']:
+                record['passes'] = page['metrics']['passes']
+                record['pass_details'] = page['metrics']['pass_details']
+            record['latency_ms'] = (time.perf_counter() - started) * 1000
+            records.append(record)
+            started = time.perf_counter()
+    except Exception as e:
+        records.append({'path': path, 'found': False, 'error': str(e),
+                        'latency_ms': (time.perf_counter() - started) * 1000})
+    if not records:
+        records.append({'path': path, 'found': False, 'mrz_data': None,
+                        'latency_ms': (time.perf_counter() - started) * 1000})
+    return records
+
+
+def summarize(latencies, elapsed):
+    """الإنتاجية وزمن الاستجابة p50/p95"""
+    if not latencies:
+        return {'images': 0, 'elapsed_s': elapsed, 'images_per_s': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0}
+    values = np.asarray(latencies)
+    return {
+        'images': len(latencies),
+        'elapsed_s': elapsed,
+        'images_per_s': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+    }
+
+
+def run_batch(paths, output, workers=None, params=None, ocr_backend='spawn', ocr_pool_size=1, index_path=None):
+    """توزيع الصور على مجموعة عمليات وكتابة سجل لكل صورة
+
+    output ملف نصي (سجل JSON كامل في كل سطر) أو ResultExporter (أعمدة مسطحة).
+    لا يُرسل أكثر من IN_FLIGHT_PER_WORKER صورة لكل عملية في وقت واحد.
+    """
+    latencies = []
+    found = 0
+    started = time.perf_counter()
+    window = IN_FLIGHT_PER_WORKER * (workers or os.cpu_count() or 1)
+    pending_paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers, initializer=set_ocr_backend,
+                             initargs=(ocr_backend, ocr_pool_size)) as executor:
+        in_flight = set()
+        while True:
+            # ملء النافذة ثم انتظار أول صورة تنتهي
+            for path in pending_paths:
+                in_flight.add(executor.submit(process_path, path, params, index_path))
+                if len(in_flight) >= window:
+                    break
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                for record in future.result():
+                    latencies.append(record['latency_ms'])
+                    found += record['found']
+                    if isinstance(output, ResultExporter):
+                        output.write(record)
+                    else:
+                        output.write(json.dumps(record, ensure_ascii=False) + '\n')
+    stats = summarize(latencies, time.perf_counter() - started)
+    stats['found'] = found
+    return stats
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="قراءة MRZ لدفعة من صور جوازات السفر")
+    parser.add_argument('inputs', nargs='+', help="مجلدات أو أنماط glob أو ملفات صور أو PDF/TIFF")
+    parser.add_argument('-o', '--output', default='-', help="ملف النتائج (الافتراضي: stdout)")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default=None,
+                        help="تصدير أعمدة مسطحة؛ الافتراضي من امتداد .csv أو .parquet، وإلا سجلات JSONL كاملة")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help="عدد العمليات المتوازية")
+    parser.add_argument('-r', '--recursive', action='store_true', help="البحث داخل المجلدات الفرعية")
+    parser.add_argument('--crop-ratio', type=float, default=PIPELINE_PARAMS['crop_ratio'],
+                        help="نسبة ارتفاع منطقة القص من أسفل الصورة")
+    parser.add_argument('--no-detect', action='store_true',
+                        help="تعطيل الكشف عن MRZ والاكتفاء بالقص الثابت")
+    parser.add_argument('--target-char-height', type=int, default=PIPELINE_PARAMS['target_char_height'],
+                        help="ارتفاع الحرف المستهدف بالبكسل قبل التحسين (0 للتعطيل)")
+    parser.add_argument('--ocr-backend', choices=OCR_BACKENDS, default='spawn',
+                        help="spawn: عملية tesseract لكل استدعاء، pool: محركات tesserocr جاهزة")
+    parser.add_argument('--ocr-pool-size', type=int, default=1,
+                        help="عدد محركات Tesseract في كل عملية عند استخدام pool")
+    parser.add_argument('--single-pass', action='store_true',
+                        help="قراءة واحدة بعد التحسين الكامل بدلاً من القراءة متعددة المراحل")
+    parser.add_argument('--denoiser', choices=sorted(DENOISERS), default=PIPELINE_PARAMS['denoiser'],
+                        help="استراتيجية تقليل الضوضاء")
+    parser.add_argument('--enhance-tiles', type=int, default=PIPELINE_PARAMS['enhance_tiles'],
+                        help="عدد الشرائح المتوازية لتقليل الضوضاء في كل صورة (مفيد مع عمال قليلين)")
+    parser.add_argument('--index', default=None,
+                        help="ملف فهرس SQLite لإرجاع نتائج الجوازات المقروءة سابقاً بدون OCR")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    paths = collect_paths(args.inputs, recursive=args.recursive)
+    if not paths:
+        print("❌ لم يتم العثور على صور", file=sys.stderr)
+        return 1
+
+    params = {
+        'crop_ratio': args.crop_ratio,
+        'detect_mrz': not args.no_detect,
+        'target_char_height': args.target_char_height or None,
+        'denoiser': args.denoiser,
+        'enhance_tiles': args.enhance_tiles,
+        'adaptive': not args.single_pass,
+    }
+    options = {
+        'workers': args.workers,
+        'params': params,
+        'ocr_backend': args.ocr_backend,
+        'ocr_pool_size': args.ocr_pool_size,
+        'index_path': args.index,
+    }
+    export_format = args.format or {'csv': 'csv', 'parquet': 'parquet'}.get(infer_format(args.output))
+    if export_format:
+        output = args.output
+        if output == '-':
+            output = sys.stdout.buffer if export_format == 'parquet' else sys.stdout
+        with ResultExporter(output, export_format) as exporter:
+            stats = run_batch(paths, exporter, **options)
+    elif args.output == '-':
+        stats = run_batch(paths, sys.stdout, **options)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            stats = run_batch(paths, output, **options)
+
+    print(
+        f"✅ {stats['images']} صورة ({stats['found']} MRZ) في {stats['elapsed_s']:.2f}s"
+        f" • {stats['images_per_s']:.2f} صورة/ث"
+        f" • p50 {stats['p50_ms']:.0f}ms • p95 {stats['p95_ms']:.0f}ms",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""أقصى ذاكرة لكل طلب عند فك الترميز: Image.open الكامل مقابل decode_image
+
+    python -m benchmarks.bench_decode --megapixels 12 24 48
+
+كل حالة تعمل في عملية مستقلة وتُقاس الزيادة في أقصى RSS من فك الترميز حتى
+التحسين (بدون OCR)، لأن ذاكرة Pillow الداخلية لا تظهر في tracemalloc.
+"""
+import argparse
+import io
+import multiprocessing
+import time
+
+import cv2
+from PIL import Image
+
+from ingest import decode_image
+from mrz_pipeline import crop_mrz_region, deskew_mrz, enhance_mrz_image, normalize_resolution
+
+from .common import reset_peak_rss, rss_kb
+from .synthetic import generate_sample
+
+
+def _pillow_decode(data):
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+FRONT_ENDS = {
+    'pillow': _pillow_decode,
+    'decode_image': decode_image,
+}
+
+
+def _run_case(front_end, data):
+    """يعمل داخل العملية الفرعية: (زيادة أقصى RSS بالميجابايت، الزمن بالمللي ثانية)"""
+    # تصفير أقصى RSS (لينكس) حتى لا تُخفي ذروة الاستيراد ذروة المعالجة
+    baseline = reset_peak_rss()
+    started = time.perf_counter()
+    image = FRONT_ENDS[front_end](data)
+    cropped = crop_mrz_region(image)
+    del image
+    normalized, _ = deskew_mrz(normalize_resolution(cropped))
+    enhance_mrz_image(normalized)
+    elapsed = (time.perf_counter() - started) * 1000
+    return (rss_kb('VmHWM') - baseline) / 1024.0, elapsed
+
+
+def make_jpeg(megapixels, seed=0, quality=90):
+    """صورة JPEG اصطناعية بعدد الميجابكسل المطلوب"""
+    image, _ = generate_sample('TD3', 1600, seed=seed)
+    height, width = image.shape[:2]
+    scale = (megapixels * 1e6 / float(width * height)) ** 0.5
+    image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[2, 12, 24, 48])
+    args = parser.parse_args(argv)
+
+    # spawn: عملية جديدة لكل حالة حتى لا يرث أقصى RSS من العملية الأم
+    context = multiprocessing.get_context('spawn')
+    print(f"{'MP':>6} {'front end':<14} {'peak MB':>9} {'ms':>8}")
+    for megapixels in args.megapixels:
+        data = make_jpeg(megapixels)
+        for front_end in FRONT_ENDS:
+            with context.Pool(1) as pool:
+                peak_mb, ms = pool.apply(_run_case, (front_end, data))
+            print(f"{megapixels:>6.1f} {front_end:<14} {peak_mb:>9.1f} {ms:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""تصحيح الميل على عينات اصطناعية مدورة: دقة تقدير الزاوية وزمنها ونجاح المحاولة الأولى
+
+    python -m benchmarks.bench_deskew --angles 0 2 4 8 12 --samples 5
+    python -m benchmarks.bench_deskew --no-ocr      # الزاوية والزمن فقط (بدون Tesseract)
+
+المحاولة الأولى = قراءة واحدة بدون المراحل التكيفية، مع وبدون تصحيح الميل.
+"""
+import argparse
+import statistics
+
+import numpy as np
+
+from mrz_pipeline import (
+    MIN_DESKEW_ANGLE,
+    PIPELINE_PARAMS,
+    crop_mrz_region,
+    deskew_mrz,
+    is_mrz_valid,
+    normalize_resolution,
+    run_pipeline,
+)
+
+from .common import time_call
+from .synthetic import DOCUMENT_FORMATS, generate_sample
+
+
+def first_attempt_valid(image, deskew):
+    """هل تنجح أرقام التحقق من قراءة واحدة"""
+    _, _, mrz_data = run_pipeline(image, {'adaptive': False, 'deskew': deskew})
+    return is_mrz_valid(mrz_data, PIPELINE_PARAMS['min_valid_score'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--angles', type=float, nargs='+', default=[0, 1, 2, 4, 6, 8, 10, 12, 15])
+    parser.add_argument('--types', nargs='+', choices=sorted(DOCUMENT_FORMATS), default=sorted(DOCUMENT_FORMATS))
+    parser.add_argument('--width', type=int, default=1600, help="عرض الوثيقة بالبكسل")
+    parser.add_argument('--samples', type=int, default=3)
+    parser.add_argument('--no-ocr', action='store_true', help="تخطي قياس نجاح القراءة")
+    args = parser.parse_args(argv)
+
+    header = f"{'angle':>6} {'estimated':>10} {'err°':>6} {'deskew ms':>10}"
+    if not args.no_ocr:
+        header += f" {'valid off':>10} {'valid on':>9}"
+    print(header)
+
+    for angle in args.angles:
+        errors, durations = [], []
+        found = valid_off = valid_on = total = 0
+        for doc_type in args.types:
+            for seed in range(args.samples):
+                # الإشارة تتبدل بين العينات لتغطية الاتجاهين
+                skew = angle if seed % 2 == 0 else -angle
+                image, _ = generate_sample(doc_type, args.width, seed=seed, skew=skew)
+                total += 1
+
+                normalized = normalize_resolution(crop_mrz_region(image))
+                (_, applied), ms = time_call(deskew_mrz, normalized, repeat=3)
+                durations.append(ms)
+                if applied or abs(skew) < MIN_DESKEW_ANGLE:
+                    found += 1
+                    # الزاوية المطبقة يجب أن تلغي الدوران المستخدم في التوليد
+                    errors.append(abs(applied + skew))
+
+                if not args.no_ocr:
+                    valid_off += first_attempt_valid(image, deskew=False)
+                    valid_on += first_attempt_valid(image, deskew=True)
+
+        error = f"{statistics.mean(errors):>6.2f}" if errors else f"{'-':>6}"
+        line = f"{angle:>6.1f} {found / total * 100:>9.0f}% {error} {float(np.median(durations)):>10.2f}"
+        if not args.no_ocr:
+            line += f" {valid_off / total * 100:>9.0f}% {valid_on / total * 100:>8.0f}%"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
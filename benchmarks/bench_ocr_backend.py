@@ -0,0 +1,52 @@
+"""مقارنة عدد الطلبات في الثانية بين tesseract لكل استدعاء ومجموعة المحركات الجاهزة
+
+    python -m benchmarks.bench_ocr_backend path/to/images --concurrency 1 4 8 --requests 64
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mrz_pipeline import crop_mrz_region, enhance_mrz_image, normalize_resolution, read_mrz_image
+from ocr_backends import OCR_BACKENDS, set_ocr_backend
+
+from .common import load_images
+
+
+def measure(enhanced_images, concurrency, requests):
+    """تشغيل requests قراءة موزعة على concurrency خيط وإرجاع الطلبات/ثانية"""
+    work = [enhanced_images[i % len(enhanced_images)] for i in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(read_mrz_image, work))
+    return requests / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('folder', help="مجلد صور جوازات السفر")
+    parser.add_argument('--backends', nargs='+', choices=OCR_BACKENDS, default=list(OCR_BACKENDS))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--requests', type=int, default=32)
+    parser.add_argument('--limit', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    enhanced_images = [
+        enhance_mrz_image(normalize_resolution(crop_mrz_region(image)))
+        for _, image in load_images(args.folder, args.limit)
+    ]
+    if not enhanced_images:
+        parser.error("لا توجد صور في المجلد")
+
+    print(f"{'backend':<8} {'threads':>8} {'req/s':>8}")
+    for backend in args.backends:
+        for concurrency in args.concurrency:
+            set_ocr_backend(backend, pool_size=concurrency)
+            # استدعاء تمهيدي حتى لا تدخل تهيئة المحركات في القياس
+            read_mrz_image(enhanced_images[0])
+            rate = measure(enhanced_images, concurrency, args.requests)
+            print(f"{backend:<8} {concurrency:>8} {rate:>8.2f}")
+    set_ocr_backend('spawn')
+
+
+if __name__ == '__main__':
+    main()
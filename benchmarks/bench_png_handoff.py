@@ -0,0 +1,50 @@
+"""مقارنة قراءة MRZ عبر ترميز PNG مقابل تمرير المصفوفة مباشرة
+
+    python -m benchmarks.bench_png_handoff path/to/images --repeat 5
+
+المسار المباشر بدون إصلاح أرقام التحقق، وحقول الثقة لكل حرف لا تدخل في المقارنة
+(المسار القديم لا يضيفها)، لذلك same تعني نفس نتيجة passporteye.
+"""
+import argparse
+
+from mrz_confidence import CONFIDENCE_FIELDS
+from mrz_pipeline import crop_mrz_region, enhance_mrz_image, read_mrz_image, read_mrz_png
+
+from .common import load_images, peak_memory, time_call
+
+
+def _without_confidences(mrz_data):
+    if mrz_data is None:
+        return None
+    return {key: value for key, value in mrz_data.items() if key not in CONFIDENCE_FIELDS}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('folder', help="مجلد صور جوازات السفر")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print(f"{'image':<30} {'png ms':>10} {'array ms':>10} {'png MB':>9} {'array MB':>9} {'same':>5}")
+    totals = [0.0, 0.0]
+    images = load_images(args.folder, args.limit)
+    for name, image in images:
+        enhanced = enhance_mrz_image(crop_mrz_region(image))
+
+        png_result, png_ms = time_call(read_mrz_png, enhanced, repeat=args.repeat)
+        array_result, array_ms = time_call(read_mrz_image, enhanced, repair=False, repeat=args.repeat)
+        png_mb = peak_memory(read_mrz_png, enhanced)
+        array_mb = peak_memory(read_mrz_image, enhanced, repair=False)
+
+        totals[0] += png_ms
+        totals[1] += array_ms
+        same = png_result == _without_confidences(array_result)
+        print(f"{name[:30]:<30} {png_ms:>10.1f} {array_ms:>10.1f} {png_mb:>9.1f} {array_mb:>9.1f} {str(same):>5}")
+
+    if images:
+        print(f"{'total':<30} {totals[0]:>10.1f} {totals[1]:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
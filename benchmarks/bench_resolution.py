@@ -0,0 +1,50 @@
+"""زمن القص والتحسين مقابل دقة الصورة المدخلة، مع وبدون توحيد الدقة
+
+    python -m benchmarks.bench_resolution path/to/images --megapixels 1 4 12 24 48
+"""
+import argparse
+
+from PIL import Image
+
+from mrz_pipeline import PIPELINE_PARAMS, crop_mrz_region, enhance_mrz_image, normalize_resolution
+
+from .common import load_images, peak_memory, time_call
+
+
+def crop_and_enhance(image, target_char_height):
+    cropped = crop_mrz_region(image)
+    return enhance_mrz_image(normalize_resolution(cropped, target_char_height=target_char_height))
+
+
+def resize_to_megapixels(image, megapixels):
+    """تغيير حجم الصورة إلى عدد ميجابكسل محدد مع الحفاظ على النسبة"""
+    width, height = image.size
+    scale = (megapixels * 1e6 / float(width * height)) ** 0.5
+    return image.resize((int(width * scale), int(height * scale)), Image.BICUBIC)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('folder', help="مجلد صور جوازات السفر")
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[1, 2, 4, 8, 12, 24, 48])
+    parser.add_argument('--target-char-height', type=int, default=PIPELINE_PARAMS['target_char_height'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--limit', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    images = load_images(args.folder, args.limit)
+    print(f"{'MP':>6} {'before ms':>10} {'after ms':>10} {'before MB':>10} {'after MB':>10}")
+    for megapixels in args.megapixels:
+        before_ms = after_ms = before_mb = after_mb = 0.0
+        for _, image in images:
+            scaled = resize_to_megapixels(image, megapixels)
+            before_ms += time_call(crop_and_enhance, scaled, None, repeat=args.repeat)[1]
+            after_ms += time_call(crop_and_enhance, scaled, args.target_char_height, repeat=args.repeat)[1]
+            before_mb = max(before_mb, peak_memory(crop_and_enhance, scaled, None))
+            after_mb = max(after_mb, peak_memory(crop_and_enhance, scaled, args.target_char_height))
+        count = max(1, len(images))
+        print(f"{megapixels:>6.1f} {before_ms / count:>10.1f} {after_ms / count:>10.1f} {before_mb:>10.1f} {after_mb:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""تقليل الضوضاء على شرائح متوازية: الزمن لكل عدد شرائح ومطابقة النتيجة لخيط واحد
+
+    python -m benchmarks.bench_tiling --widths 1400 2800 --tiles 1 2 4 8
+    python -m benchmarks.bench_tiling --denoisers nlmeans bilateral
+
+العرض = عرض منطقة MRZ بعد القص (بدون توحيد الدقة، كما في target_char_height=None).
+"""
+import argparse
+import os
+
+import numpy as np
+
+from mrz_pipeline import DENOISERS, crop_mrz_region, enhance_mrz_image, normalize_resolution
+
+from .common import time_call
+from .synthetic import generate_sample
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--widths', type=int, nargs='+', default=[1400, 2800, 5600], help="عرض الوثيقة بالبكسل")
+    parser.add_argument('--tiles', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--denoisers', nargs='+', choices=sorted(DENOISERS), default=['nlmeans', 'bilateral'])
+    parser.add_argument('--noise', type=float, default=12.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"cpus: {os.cpu_count()}")
+    print(f"{'denoiser':<10} {'crop':>11} {'tiles':>6} {'ms':>9} {'speedup':>8} {'identical':>10}")
+    for denoiser in args.denoisers:
+        for width in args.widths:
+            image, _ = generate_sample('TD3', width, seed=0, noise=args.noise)
+            cropped = normalize_resolution(crop_mrz_region(image), target_char_height=None)
+            reference, reference_ms = None, None
+            for tiles in args.tiles:
+                result, ms = time_call(enhance_mrz_image, cropped, denoiser=denoiser, tiles=tiles, repeat=args.repeat)
+                result = np.asarray(result)
+                if reference is None:
+                    reference, reference_ms = result, ms
+                size = f"{result.shape[1]}x{result.shape[0]}"
+                print(
+                    f"{denoiser:<10} {size:>11} {tiles:>6} {ms:>9.1f} {reference_ms / ms:>7.2f}x"
+                    f" {str(np.array_equal(result, reference)):>10}"
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""أدوات مشتركة لسكربتات القياس"""
+import glob
+import json
+import os
+import resource
+import statistics
+import time
+import tracemalloc
+
+from PIL import Image
+
+
+# امتدادات الصور المدعومة في القياسات
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def list_images(folder, limit=None):
+    """مسارات الصور في المجلد مرتبة"""
+    paths = sorted(
+        path for path in glob.glob(os.path.join(folder, '*'))
+        if path.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return paths[:limit] if limit else paths
+
+
+def load_images(folder, limit=None):
+    """تحميل صور المجلد كـ (الاسم، صورة PIL بصيغة RGB)"""
+    paths = list_images(folder, limit)
+    images = []
+    for path in paths:
+        with Image.open(path) as image:
+            images.append((os.path.basename(path), image.convert('RGB')))
+    return images
+
+
+def time_call(func, *args, repeat=5, **kwargs):
+    """تشغيل الدالة عدة مرات وإرجاع (آخر نتيجة، وسيط الزمن بالمللي ثانية)"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        durations.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(durations)
+
+
+def peak_memory(func, *args, **kwargs):
+    """أقصى ذاكرة مخصصة في Python/NumPy أثناء استدعاء واحد (بالميجابايت)"""
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def rss_kb(field):
+    """قيمة من /proc/self/status بالكيلوبايت (VmRSS أو VmHWM)، أو ru_maxrss خارج لينكس"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def reset_peak_rss():
+    """تصفير أقصى RSS للعملية (لينكس) وإرجاع RSS الحالي بالكيلوبايت، أو None إذا تعذر
+
+    بعدها VmHWM - القيمة المرجعة = أقصى زيادة في الذاكرة الفعلية بما فيها مخازن
+    OpenCV و Pillow التي لا تظهر في tracemalloc.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return None
+    return rss_kb('VmRSS')
+
+
+# الحقول المقارنة مع القيم المرجعية
+LABEL_FIELDS = ('type', 'country', 'number', 'date_of_birth', 'expiration_date',
+                'nationality', 'sex', 'surname', 'names')
+
+
+def load_labels(image_path):
+    """قراءة القيم المرجعية من ملف JSON بجانب الصورة (scan01.jpg -> scan01.json)"""
+    label_path = os.path.splitext(image_path)[0] + '.json'
+    if not os.path.exists(label_path):
+        return None
+    with open(label_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def normalize_field(value):
+    return str(value or '').replace('<', ' ').strip().upper()
+
+
+def field_accuracy(mrz_data, expected):
+    """نسبة الحقول المطابقة للقيم المرجعية (0 إلى 1) أو None بدون مرجع"""
+    if not expected:
+        return None
+    fields = [name for name in LABEL_FIELDS if name in expected]
+    if not fields:
+        return None
+    if not mrz_data:
+        return 0.0
+    matches = sum(normalize_field(mrz_data.get(name)) == normalize_field(expected[name]) for name in fields)
+    return matches / len(fields)
@@ -0,0 +1,73 @@
+"""مقارنة استراتيجيات تقليل الضوضاء من حيث السرعة والدقة
+
+كل صورة في المجلد يمكن أن يرافقها ملف JSON بالقيم المرجعية بنفس الاسم
+(number, date_of_birth, expiration_date, country, nationality, sex, surname, names).
+
+    python -m benchmarks.eval_denoisers path/to/labelled --json results.json
+"""
+import argparse
+import json
+import statistics
+from collections import defaultdict
+
+from PIL import Image
+
+from mrz_pipeline import DENOISERS, run_pipeline
+
+from .common import field_accuracy, list_images, load_labels
+
+
+def evaluate(paths, denoiser):
+    """تشغيل خط المعالجة بإستراتيجية واحدة وتجميع الأزمنة والدقة"""
+    stage_times = defaultdict(list)
+    scores = []
+    accuracies = []
+    found = 0
+    for path in paths:
+        timings = {}
+        with Image.open(path) as image:
+            # قراءة واحدة بعد التحسين الكامل: القراءة المتدرجة تتوقف غالباً قبل مرحلة تقليل الضوضاء
+            _, _, mrz_data = run_pipeline(image.convert('RGB'), {'denoiser': denoiser, 'adaptive': False}, timings=timings)
+        for stage, ms in timings.items():
+            stage_times[stage].append(ms)
+        found += mrz_data is not None
+        scores.append(mrz_data.get('valid_score', 0) if mrz_data else 0)
+        accuracy = field_accuracy(mrz_data, load_labels(path))
+        if accuracy is not None:
+            accuracies.append(accuracy)
+    return {
+        'denoiser': denoiser,
+        'images': len(paths),
+        'found': found,
+        'stage_ms': {stage: statistics.mean(values) for stage, values in stage_times.items()},
+        'total_ms': sum(statistics.mean(values) for values in stage_times.values()),
+        'valid_score': statistics.mean(scores) if scores else 0.0,
+        'field_accuracy': statistics.mean(accuracies) if accuracies else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('folder', help="مجلد الصور مع ملفات القيم المرجعية")
+    parser.add_argument('--denoisers', nargs='+', choices=sorted(DENOISERS), default=list(DENOISERS))
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--json', help="حفظ النتائج في ملف JSON")
+    args = parser.parse_args(argv)
+
+    paths = list_images(args.folder, args.limit)
+    results = [evaluate(paths, denoiser) for denoiser in args.denoisers]
+
+    print(f"{'denoiser':<10} {'denoise ms':>11} {'total ms':>9} {'score':>6} {'fields':>7} {'found':>6}")
+    for result in results:
+        accuracy = result['field_accuracy']
+        accuracy_text = f"{accuracy * 100:.1f}%" if accuracy is not None else '-'
+        print(f"{result['denoiser']:<10} {result['stage_ms'].get('denoise', 0):>11.1f} {result['total_ms']:>9.1f}"
+              f" {result['valid_score']:>6.1f} {accuracy_text:>7} {result['found']:>3}/{result['images']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
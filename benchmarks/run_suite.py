@@ -0,0 +1,178 @@
+"""مجموعة قياس قابلة للتكرار على صور MRZ اصطناعية
+
+تقيس زمن كل مرحلة وأقصى ذاكرة ودقة الحقول مقابل القيم المرجعية، وتحفظ النتائج
+بصيغة JSON للمقارنة بين التشغيلات.
+
+كل حالة تُشغل مرتين: مرة للزمن وأقصى RSS (يُصفر قبل كل حالة، ويشمل مخازن
+OpenCV و Pillow) بدون tracemalloc، ومرة بـ tracemalloc لذاكرة Python/NumPy فقط.
+
+    python -m benchmarks.run_suite --output results/run.json
+    python -m benchmarks.run_suite --output results/new.json --compare results/run.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+
+from mrz_pipeline import DENOISERS, PIPELINE_PARAMS, run_pipeline, warm_up
+
+from .common import LABEL_FIELDS, normalize_field, reset_peak_rss, rss_kb
+from .synthetic import DOCUMENT_FORMATS, generate_sample
+
+
+# إعدادات التشويه المجربة لكل نوع ودقة
+DEGRADATION_PRESETS = {
+    'clean': {},
+    'blur': {'blur': 1.5},
+    'noise': {'noise': 12.0},
+    'skew': {'skew': 4.0},
+    'perspective': {'perspective': 0.04},
+    'lighting': {'lighting': 0.5},
+}
+
+
+def run_case(doc_type, width_px, preset, seed, params):
+    """تشغيل حالة واحدة وإرجاع الأزمنة والذاكرة ومطابقة الحقول"""
+    image, truth = generate_sample(doc_type, width_px, seed=seed, **DEGRADATION_PRESETS[preset])
+    timings = {}
+    metrics = {}
+    error = None
+
+    # الزمن وأقصى RSS لهذه الحالة فقط، بدون تتبع tracemalloc لكل تخصيص
+    rss_baseline = reset_peak_rss()
+    started = time.perf_counter()
+    try:
+        _, _, mrz_data = run_pipeline(image, params, timings=timings, metrics=metrics)
+    except Exception as e:
+        mrz_data, error = None, str(e)
+    total_ms = (time.perf_counter() - started) * 1000
+    peak_rss = (rss_kb('VmHWM') - rss_baseline) / 1024.0 if rss_baseline is not None else None
+
+    # تشغيل ثانٍ منفصل لأقصى ذاكرة Python/NumPy
+    tracemalloc.start()
+    try:
+        run_pipeline(image, params)
+    except Exception:
+        pass
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    fields = {
+        name: bool(mrz_data) and normalize_field(mrz_data.get(name)) == normalize_field(truth[name])
+        for name in LABEL_FIELDS
+    }
+    return {
+        'doc_type': doc_type,
+        'width_px': width_px,
+        'megapixels': image.shape[0] * image.shape[1] / 1e6,
+        'preset': preset,
+        'seed': seed,
+        'found': mrz_data is not None,
+        'valid_score': mrz_data.get('valid_score', 0) if mrz_data else 0,
+        'fields': fields,
+        'field_accuracy': sum(fields.values()) / len(fields),
+        'stage_ms': timings,
+        'total_ms': total_ms,
+        'passes': metrics.get('passes'),
+        'peak_alloc_mb': peak_alloc / (1024 * 1024),
+        'peak_rss_mb': peak_rss,
+        'error': error,
+    }
+
+
+def summarize(cases):
+    """متوسطات حسب نوع التشويه وعلى مستوى كامل التشغيل"""
+    groups = defaultdict(list)
+    for case in cases:
+        groups[case['preset']].append(case)
+        groups['all'].append(case)
+
+    summary = {}
+    for name, items in groups.items():
+        stages = defaultdict(list)
+        for case in items:
+            for stage, ms in case['stage_ms'].items():
+                stages[stage].append(ms)
+        summary[name] = {
+            'cases': len(items),
+            'found_rate': sum(case['found'] for case in items) / len(items),
+            'field_accuracy': statistics.mean(case['field_accuracy'] for case in items),
+            'valid_score': statistics.mean(case['valid_score'] for case in items),
+            'median_total_ms': statistics.median(case['total_ms'] for case in items),
+            'median_stage_ms': {stage: statistics.median(values) for stage, values in stages.items()},
+            'max_peak_alloc_mb': max(case['peak_alloc_mb'] for case in items),
+            'max_peak_rss_mb': max((case['peak_rss_mb'] for case in items if case['peak_rss_mb'] is not None),
+                                   default=None),
+        }
+    return summary
+
+
+def print_summary(summary, baseline=None):
+    print(f"{'preset':<12} {'cases':>5} {'found':>6} {'fields':>7} {'score':>6} {'p50 ms':>9} {'alloc MB':>9}"
+          f" {'RSS MB':>8}")
+    for name, row in summary.items():
+        rss = row.get('max_peak_rss_mb')
+        line = (f"{name:<12} {row['cases']:>5} {row['found_rate'] * 100:>5.0f}% {row['field_accuracy'] * 100:>6.1f}%"
+                f" {row['valid_score']:>6.1f} {row['median_total_ms']:>9.1f} {row['max_peak_alloc_mb']:>9.1f}"
+                f" {rss if rss is not None else float('nan'):>8.1f}")
+        if baseline and name in baseline:
+            old = baseline[name]
+            line += (f"   Δ ms {row['median_total_ms'] - old['median_total_ms']:+.1f}"
+                     f"  Δ fields {(row['field_accuracy'] - old['field_accuracy']) * 100:+.1f}%")
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--types', nargs='+', choices=sorted(DOCUMENT_FORMATS), default=sorted(DOCUMENT_FORMATS))
+    parser.add_argument('--widths', type=int, nargs='+', default=[800, 1600, 3200], help="عرض الوثيقة بالبكسل")
+    parser.add_argument('--presets', nargs='+', choices=sorted(DEGRADATION_PRESETS), default=list(DEGRADATION_PRESETS))
+    parser.add_argument('--samples', type=int, default=2, help="عدد العينات لكل حالة")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--denoiser', choices=sorted(DENOISERS), default=None,
+                        help="قياس إستراتيجية تقليل ضوضاء (يفرض --single-pass: القراءة المتدرجة تتوقف غالباً قبل مرحلة التقليل)")
+    parser.add_argument('--single-pass', action='store_true')
+    parser.add_argument('--output', help="ملف JSON للنتائج")
+    parser.add_argument('--compare', help="ملف JSON لتشغيل سابق للمقارنة")
+    args = parser.parse_args(argv)
+
+    params = {'adaptive': not (args.single_pass or args.denoiser)}
+    if args.denoiser:
+        params['denoiser'] = args.denoiser
+    # الاستيراد المؤجل لـ passporteye وتهيئة OpenCV لا تُحسب على أول حالة
+    warm_up()
+    cases = []
+    for doc_type in args.types:
+        for width_px in args.widths:
+            for preset in args.presets:
+                for sample in range(args.samples):
+                    cases.append(run_case(doc_type, width_px, preset, args.seed + sample, params))
+
+    summary = summarize(cases)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['summary']
+    print_summary(summary, baseline)
+
+    if args.output:
+        result = {
+            'meta': {
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'params': {**PIPELINE_PARAMS, **params},
+                'args': vars(args),
+            },
+            'summary': summary,
+            'cases': cases,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
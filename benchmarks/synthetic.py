@@ -0,0 +1,222 @@
+"""توليد صور جوازات/بطاقات اصطناعية بمنطقة MRZ صحيحة (TD1 / TD2 / TD3)
+
+    python -m benchmarks.synthetic out/ --count 50 --types TD3 TD1 --blur 1.0 --noise 8
+
+كل صورة تُحفظ بجانب ملف JSON بالقيم المرجعية بنفس الاسم (متوافق مع eval_denoisers).
+"""
+import argparse
+import json
+import os
+import random
+from datetime import date, timedelta
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from mrz_parser import check_digit
+
+
+# أبعاد الوثائق بالمليمتر وعدد الأسطر والحروف في كل سطر (ICAO 9303)
+DOCUMENT_FORMATS = {
+    'TD1': {'size_mm': (85.6, 53.98), 'lines': 3, 'chars': 30},
+    'TD2': {'size_mm': (105.0, 74.0), 'lines': 2, 'chars': 36},
+    'TD3': {'size_mm': (125.0, 88.0), 'lines': 2, 'chars': 44},
+}
+
+# خطوة الحرف وارتفاع السطر وارتفاع الحرف في MRZ بالمليمتر
+CHAR_PITCH_MM = 2.54
+LINE_PITCH_MM = 4.23
+CAP_HEIGHT_MM = 2.4
+
+# خطوط قريبة من OCR-B بالترتيب (يمكن تمرير ملف OCR-B حقيقي عبر --font)
+FONT_CANDIDATES = (
+    'OCRB.ttf',
+    '/usr/share/fonts/truetype/ocr-b/OCRB.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf',
+    '/usr/share/fonts/TTF/DejaVuSansMono.ttf',
+    'DejaVuSansMono.ttf',
+)
+
+SURNAMES = ('ERIKSSON', 'MOHAMED', 'ALHASSAN', 'SMITH', 'GARCIA', 'NGUYEN', 'MUELLER', 'OKAFOR')
+GIVEN_NAMES = ('ANNA', 'MARIA', 'AHMED', 'OMAR', 'JOHN', 'LINA', 'KARIM', 'SOFIA', 'YUSUF')
+COUNTRIES = ('UTO', 'EGY', 'SAU', 'GBR', 'FRA', 'D<<', 'JOR', 'ARE')
+ALNUM = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+
+def _pad(value, length):
+    return (value + '<' * length)[:length]
+
+
+def _yymmdd(day):
+    return day.strftime('%y%m%d')
+
+
+def random_identity(rng):
+    """بيانات شخصية عشوائية بصيغة MRZ"""
+    birth = date(1950, 1, 1) + timedelta(days=rng.randrange(0, 365 * 55))
+    expiry = date.today() + timedelta(days=rng.randrange(30, 365 * 10))
+    return {
+        'country': rng.choice(COUNTRIES),
+        'nationality': rng.choice(COUNTRIES),
+        'surname': rng.choice(SURNAMES),
+        'names': ' '.join(rng.sample(GIVEN_NAMES, rng.choice((1, 2)))),
+        'number': ''.join(rng.choice(ALNUM) for _ in range(rng.choice((8, 9)))),
+        'date_of_birth': _yymmdd(birth),
+        'expiration_date': _yymmdd(expiry),
+        'sex': rng.choice('MF'),
+    }
+
+
+def mrz_lines(doc_type, identity):
+    """بناء أسطر MRZ بأرقام تحقق صحيحة، وإرجاع (الأسطر، القيم المرجعية)"""
+    name_field = identity['surname'] + '<<' + identity['names'].replace(' ', '<')
+    number = _pad(identity['number'], 9)
+    dob = identity['date_of_birth']
+    expiry = identity['expiration_date']
+    sex = identity['sex']
+    country = identity['country']
+    nationality = identity['nationality']
+
+    if doc_type == 'TD3':
+        doc_code = 'P<'
+        personal = _pad('', 14)
+        line1 = _pad(doc_code + country + name_field, 44)
+        body = (number + check_digit(number) + nationality + dob + check_digit(dob) + sex
+                + expiry + check_digit(expiry) + personal + check_digit(personal))
+        composite = check_digit(body[0:10] + body[13:20] + body[21:43])
+        lines = [line1, body + composite]
+    elif doc_type == 'TD2':
+        doc_code = 'I<'
+        optional = _pad('', 7)
+        line1 = _pad(doc_code + country + name_field, 36)
+        body = (number + check_digit(number) + nationality + dob + check_digit(dob) + sex
+                + expiry + check_digit(expiry) + optional)
+        composite = check_digit(body[0:10] + body[13:20] + body[21:35])
+        lines = [line1, body + composite]
+    elif doc_type == 'TD1':
+        doc_code = 'I<'
+        line1 = _pad(doc_code + country + number + check_digit(number), 30)
+        line2 = (dob + check_digit(dob) + sex + expiry + check_digit(expiry) + nationality
+                 + _pad('', 11))
+        composite = check_digit(line1[5:30] + line2[0:7] + line2[8:15] + line2[18:29])
+        lines = [line1, line2 + composite, _pad(name_field, 30)]
+    else:
+        raise ValueError(f"Unknown document type: {doc_type!r}")
+
+    truth = dict(identity, type=doc_code, mrz_type=doc_type, number=number)
+    return lines, truth
+
+
+def load_font(size_px, font_path=None):
+    for candidate in ((font_path,) if font_path else ()) + FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, size_px)
+        except OSError:
+            continue
+    return ImageFont.load_default(size_px)
+
+
+def render_document(lines, doc_type, width_px, font_path=None):
+    """رسم الوثيقة بالأبعاد الحقيقية مع MRZ بخطوة حرف ثابتة"""
+    spec = DOCUMENT_FORMATS[doc_type]
+    px_per_mm = width_px / spec['size_mm'][0]
+    height_px = int(round(spec['size_mm'][1] * px_per_mm))
+
+    document = Image.new('L', (width_px, height_px), 235)
+    draw = ImageDraw.Draw(document)
+
+    # منطقة الصورة الشخصية ونصوص المنطقة المرئية (تشويش واقعي خارج MRZ)
+    draw.rectangle((int(0.05 * width_px), int(0.12 * height_px), int(0.3 * width_px), int(0.6 * height_px)), fill=170)
+    label_font = load_font(max(8, int(2.0 * px_per_mm)), font_path)
+    for i, text in enumerate(('PASSPORT', 'SURNAME', 'GIVEN NAMES', 'DATE OF BIRTH')):
+        draw.text((int(0.36 * width_px), int((0.12 + 0.1 * i) * height_px)), text, font=label_font, fill=90)
+
+    # أسطر MRZ: كل حرف في خانته حتى لو لم يكن الخط أحادي العرض
+    font = load_font(max(6, int(round(CAP_HEIGHT_MM / 0.73 * px_per_mm))), font_path)
+    pitch = CHAR_PITCH_MM * px_per_mm
+    line_pitch = LINE_PITCH_MM * px_per_mm
+    x0 = (width_px - pitch * spec['chars']) / 2.0
+    y0 = height_px - line_pitch * (spec['lines'] + 0.6)
+    for row, line in enumerate(lines):
+        for col, char in enumerate(line):
+            draw.text((x0 + col * pitch, y0 + row * line_pitch), char, font=font, fill=15)
+
+    return np.array(document)
+
+
+def degrade(document, rng, blur=0.0, noise=0.0, skew=0.0, perspective=0.0, lighting=0.0, margin=0.15):
+    """وضع الوثيقة على خلفية ثم تطبيق منظور ودوران وتدرج إضاءة وضبابية وضوضاء"""
+    doc_h, doc_w = document.shape
+    pad_x, pad_y = int(doc_w * margin), int(doc_h * margin)
+    canvas = np.full((doc_h + 2 * pad_y, doc_w + 2 * pad_x), rng.randrange(60, 140), np.uint8)
+    canvas[pad_y:pad_y + doc_h, pad_x:pad_x + doc_w] = document
+    height, width = canvas.shape
+
+    if perspective:
+        src = np.float32([[pad_x, pad_y], [pad_x + doc_w, pad_y],
+                          [pad_x + doc_w, pad_y + doc_h], [pad_x, pad_y + doc_h]])
+        jitter = np.float32([[rng.uniform(-1, 1), rng.uniform(-1, 1)] for _ in range(4)])
+        dst = src + jitter * perspective * np.float32([doc_w, doc_h])
+        matrix = cv2.getPerspectiveTransform(src, dst)
+        canvas = cv2.warpPerspective(canvas, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE)
+
+    if skew:
+        matrix = cv2.getRotationMatrix2D((width / 2.0, height / 2.0), skew, 1.0)
+        canvas = cv2.warpAffine(canvas, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE)
+
+    image = canvas.astype(np.float32)
+    if lighting:
+        gradient = np.linspace(1.0 - lighting, 1.0, width, dtype=np.float32)
+        image *= gradient[np.newaxis, :]
+    if blur:
+        image = cv2.GaussianBlur(image, (0, 0), blur)
+    if noise:
+        image += np.random.default_rng(rng.randrange(2 ** 32)).normal(0, noise, image.shape).astype(np.float32)
+
+    gray = np.clip(image, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+
+
+def generate_sample(doc_type='TD3', width_px=1600, seed=0, font_path=None, **degradations):
+    """صورة RGB اصطناعية والقيم المرجعية لها"""
+    rng = random.Random(seed)
+    lines, truth = mrz_lines(doc_type, random_identity(rng))
+    document = render_document(lines, doc_type, width_px, font_path)
+    truth['lines'] = lines
+    return degrade(document, rng, **degradations), truth
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('output', help="مجلد الإخراج")
+    parser.add_argument('--count', type=int, default=20)
+    parser.add_argument('--types', nargs='+', choices=sorted(DOCUMENT_FORMATS), default=['TD3'])
+    parser.add_argument('--width', type=int, nargs='+', default=[1600], help="عرض الوثيقة بالبكسل")
+    parser.add_argument('--blur', type=float, default=0.0)
+    parser.add_argument('--noise', type=float, default=0.0)
+    parser.add_argument('--skew', type=float, default=0.0, help="أقصى زاوية دوران بالدرجات (عشوائية ±)")
+    parser.add_argument('--perspective', type=float, default=0.0)
+    parser.add_argument('--lighting', type=float, default=0.0)
+    parser.add_argument('--font', help="مسار خط OCR-B")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    rng = random.Random(args.seed)
+    for i in range(args.count):
+        doc_type = args.types[i % len(args.types)]
+        width_px = args.width[i % len(args.width)]
+        image, truth = generate_sample(
+            doc_type, width_px, seed=args.seed * 100003 + i, font_path=args.font,
+            blur=args.blur, noise=args.noise, skew=rng.uniform(-args.skew, args.skew),
+            perspective=args.perspective, lighting=args.lighting
+        )
+        stem = os.path.join(args.output, f'{doc_type.lower()}_{i:04d}')
+        Image.fromarray(image).save(stem + '.png')
+        with open(stem + '.json', 'w', encoding='utf-8') as f:
+            json.dump(truth, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
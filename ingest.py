@@ -0,0 +1,162 @@
+"""فك ترميز الصور والملفات متعددة الصفحات (PDF و TIFF) بأقل ذاكرة ممكنة
+
+الصور تُفك مباشرة إلى مصفوفة NumPy واحدة تمر على كل المراحل. الصفحات تُفك
+واحدة تلو الأخرى وتمر على خط المعالجة ثم تُترك، لذلك تبقى الذاكرة ثابتة مهما
+كان عدد الصفحات. PDF يحتاج pypdfium2 (اختياري).
+"""
+import io
+import os
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from mrz_metrics import METRICS, stage
+from mrz_pipeline import (
+    CHAR_HEIGHT_TO_PITCH,
+    MRZ_LINE_CHARS,
+    PIPELINE_PARAMS,
+    _nbytes,
+    crop_mrz_region,
+    detect_mrz_region,
+    read_cropped_mrz,
+)
+
+
+# امتدادات الملفات التي قد تحتوي على أكثر من صفحة
+DOCUMENT_EXTENSIONS = ('.pdf', '.tif', '.tiff')
+
+# دقة تحويل صفحات PDF إلى صور (كافية لارتفاع حرف MRZ ≈ 20 بكسل)
+PDF_DPI = 200
+
+
+# أقل نسبة متوقعة لعرض أسطر MRZ من عرض الصورة (لاختيار مقياس draft بأمان)
+MIN_MRZ_WIDTH_RATIO = 0.6
+
+# وسم اتجاه EXIF، والاتجاهات التي تبدل العرض والارتفاع
+EXIF_ORIENTATION = 0x0112
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def decode_image(source, target_char_height=PIPELINE_PARAMS['target_char_height']):
+    """فك ترميز صورة واحدة إلى مصفوفة RGB (أو رمادية) للقراءة فقط
+
+    JPEG يُفك بمقياس مصغر (draft: 1/2 أو 1/4 أو 1/8) ما دام ارتفاع حرف MRZ
+    المتوقع لا يقل عن target_char_height، ثم يُطبق اتجاه EXIF في مكانه.
+    """
+    with Image.open(_as_file(source)) as image:
+        if target_char_height and image.format == 'JPEG':
+            orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+            width = image.height if orientation in TRANSPOSED_ORIENTATIONS else image.width
+            min_width = MRZ_LINE_CHARS * target_char_height / CHAR_HEIGHT_TO_PITCH / MIN_MRZ_WIDTH_RATIO
+            scale = min_width / float(width)
+            if scale < 1.0:
+                image.draft('RGB', (int(image.width * scale) + 1, int(image.height * scale) + 1))
+        image.load()
+        ImageOps.exif_transpose(image, in_place=True)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        # نسخة واحدة من ذاكرة Pillow إلى NumPy، ثم تُحرر صورة Pillow
+        return np.asarray(image)
+
+
+def is_document(name):
+    """هل الملف PDF أو TIFF (حسب الامتداد)"""
+    return os.path.splitext(name)[1].lower() in DOCUMENT_EXTENSIONS
+
+
+def _as_file(source):
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def _is_pdf(source):
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source[:5]) == b'%PDF-'
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read(5) == b'%PDF-'
+    position = source.tell()
+    header = source.read(5)
+    source.seek(position)
+    return header == b'%PDF-'
+
+
+def _iter_image_frames(source):
+    with Image.open(_as_file(source)) as image:
+        for index in range(getattr(image, 'n_frames', 1)):
+            # seek يفك إطاراً واحداً فقط من TIFF
+            image.seek(index)
+            frame = image if image.mode in ('RGB', 'L') else image.convert('RGB')
+            yield index, np.asarray(frame)
+
+
+def _iter_pdf_pages(source, dpi):
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        raise RuntimeError("PDF support requires pypdfium2 (pip install pypdfium2)") from None
+
+    document = pdfium.PdfDocument(source)
+    try:
+        for index in range(len(document)):
+            page = document[index]
+            try:
+                bitmap = page.render(scale=dpi / 72.0, rev_byteorder=True)
+                # to_numpy يشير إلى ذاكرة pdfium، لذلك نسخة واحدة قبل إغلاقها
+                image = np.array(bitmap.to_numpy()[..., :3])
+                bitmap.close()
+            finally:
+                page.close()
+            yield index, image
+    finally:
+        document.close()
+
+
+def iter_pages(source, dpi=PDF_DPI):
+    """صفحات الملف بالترتيب: (رقم الصفحة من 0، مصفوفة RGB أو رمادية)
+
+    source مسار أو bytes أو كائن ملف (مثل ملفات Streamlit المرفوعة).
+    """
+    if _is_pdf(source):
+        yield from _iter_pdf_pages(source, dpi)
+    else:
+        yield from _iter_image_frames(source)
+
+
+def read_pages(source, params=None, dpi=PDF_DPI, skip_without_mrz=False, index=None):
+    """تشغيل القص والتحسين والقراءة على كل صفحة وإرجاع سجل لكل صفحة فور انتهائها
+
+    الصفحة التي لا يجد الكاشف فيها MRZ تُقص من أسفلها (crop_ratio) كما في الصورة
+    الواحدة. skip_without_mrz: تخطي هذه الصفحات بدون OCR بدلاً من ذلك (سجلها
+    skipped=True، ويبقى في النتائج حتى لا تختفي الصفحة بصمت).
+    index: فهرس MRZIndex اختياري لتجنب إعادة OCR للصفحات المقروءة سابقاً.
+    """
+    params = {**PIPELINE_PARAMS, **(params or {})}
+    for page_number, page in iter_pages(source, dpi):
+        timings = {}
+        metrics = {}
+        record = {'page': page_number, 'skipped': False, 'mrz_data': None, 'timings': timings}
+
+        try:
+            with stage('crop', timings, size=_nbytes(page)):
+                box = detect_mrz_region(page) if params['detect_mrz'] else None
+                cropped = None
+                if box is not None:
+                    x, y, w, h = box
+                    cropped = Image.fromarray(page[y:y + h, x:x + w])
+                elif not (skip_without_mrz and params['detect_mrz']):
+                    cropped = crop_mrz_region(page, crop_ratio=params['crop_ratio'], detect_mrz=False)
+            # الصفحة الكاملة لا تبقى في الذاكرة أثناء فك الصفحة التالية
+            del page
+            if cropped is None:
+                record['skipped'] = True
+                yield record
+                continue
+
+            enhanced, mrz_data = read_cropped_mrz(cropped, params, timings=timings, metrics=metrics, index=index)
+        except Exception:
+            METRICS.record_result(error=True)
+            raise
+
+        METRICS.record_result(mrz_data)
+        record.update(mrz_data=mrz_data, cropped=cropped, enhanced=enhanced, metrics=metrics)
+        yield record
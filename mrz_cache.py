@@ -0,0 +1,111 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# الحد الافتراضي لحجم الذاكرة المؤقتة (بالبايت)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def image_digest(image_bytes):
+    """بصمة SHA-256 لمحتوى الصورة"""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def params_digest(params):
+    """بصمة SHA-256 لإعدادات خط المعالجة"""
+    encoded = json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _value_size(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict) and any(isinstance(item, (bytes, bytearray)) for item in value.values()):
+        return sum(len(key) + _value_size(item) for key, item in value.items())
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+
+
+def _entry_size(entry):
+    """تقدير حجم المدخل بالبايت"""
+    return sum(_value_size(value) for value in entry.values())
+
+
+class PipelineCache:
+    """ذاكرة مؤقتة LRU لنتائج القص والتحسين وقراءة MRZ
+
+    المفتاح = بصمة الصورة + بصمة الإعدادات، والحجم الكلي محدود بعدد البايتات.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(image_bytes, params):
+        """بناء مفتاح المدخل من بايتات الصورة والإعدادات"""
+        return f"{image_digest(image_bytes)}:{params_digest(params)}"
+
+    def get(self, key):
+        """إرجاع نسخة من المدخل أو None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry)
+
+    def put(self, key, **fields):
+        """إضافة حقول إلى المدخل (cropped / enhanced / previews / mrz_data) مع إخلاء الأقدم"""
+        with self._lock:
+            entry = dict(self._entries.get(key, {}))
+            entry.update(fields)
+            size = _entry_size(entry)
+
+            if key in self._entries:
+                self._total_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+
+            # مدخل أكبر من الحد بالكامل لا يُخزن
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = entry
+            self._sizes[key] = size
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """عدادات الإصابة والإخفاق والحجم الحالي"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
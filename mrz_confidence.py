@@ -0,0 +1,194 @@
+"""ثقة OCR لكل حرف في أسطر MRZ وإعادة قراءة الحروف الضعيفة فقط
+
+    with capture_symbols() as readings:
+        mrz = mrz_array_pipeline(array).result
+    reading = find_reading(readings, mrz_data['raw_text'])
+    mrz_data.update(confidence_fields(mrz_data['raw_text'], reading))
+    reread_low_confidence(mrz_data, reading)   # عند فشل رقم تحقق
+
+عند فشل رقم تحقق تُقص صناديق الحروف منخفضة الثقة في الحقل الفاشل فقط من نفس
+منطقة OCR، وتُعالج بتكبير وتحويل ثنائي، وتُقرأ كلها في استدعاء OCR واحد بدلاً
+من إعادة قراءة MRZ كاملة بمعالجة أخرى.
+"""
+from itertools import combinations
+
+import cv2
+import numpy as np
+
+from mrz_parser import CHECKS, COMPOSITE, FIELDS, parse_mrz, split_lines
+from ocr_backends import _to_uint8, ocr_line_symbols
+
+
+# الحقول التي تضيفها confidence_fields إلى قاموس MRZ
+CONFIDENCE_FIELDS = ('char_confidences', 'min_confidence')
+
+# ثقة Tesseract (0-100) التي تُعاد تحتها قراءة الحرف في الحقول الفاشلة
+LOW_CONFIDENCE = 80
+
+# أقصى عدد حروف يُعاد قراءتها لكل صورة (الأضعف ثقة أولاً)
+MAX_REREAD_CHARS = 12
+
+# معالجة صناديق الحروف قبل إعادة القراءة: ارتفاع موحد وهامش وفراغ بين الحروف
+REREAD_CHAR_HEIGHT = 48
+REREAD_MARGIN = 2
+REREAD_GAP = 24
+
+
+def find_reading(readings, raw_text):
+    """القراءة الملتقطة التي أنتجت raw_text (آخر مطابقة)، أو None"""
+    if not raw_text:
+        return None
+    for reading in reversed(readings):
+        if reading['text'] == raw_text:
+            return reading
+    return None
+
+
+def align_symbols(raw_text, lines):
+    """(النوع، أسطر MRZ، حروف كل سطر) إذا طابقت حروف OCR أسطر split_lines، أو None"""
+    mrz_type, mrz_lines = split_lines(raw_text)
+    if mrz_type is None:
+        return None
+    # نفس تصفية split_lines: بدون مسافات، والأسطر القصيرة تُهمل
+    symbol_lines = [[symbol for symbol in line if symbol[0].strip()] for line in lines]
+    symbol_lines = [line for line in symbol_lines if len(line) >= 20][-len(mrz_lines):]
+    if len(symbol_lines) != len(mrz_lines):
+        return None
+    for symbols, text in zip(symbol_lines, mrz_lines):
+        if ''.join(symbol[0] for symbol in symbols).upper() != text:
+            return None
+    return mrz_type, mrz_lines, symbol_lines
+
+
+def confidence_fields(raw_text, reading):
+    """char_confidences (ثقة كل حرف في كل سطر MRZ) و min_confidence، أو {}"""
+    aligned = align_symbols(raw_text, reading['lines']) if reading else None
+    if aligned is None:
+        return {}
+    confidences = [[round(symbol[1]) for symbol in line] for line in aligned[2]]
+    return {
+        'char_confidences': confidences,
+        'min_confidence': min(min(line) for line in confidences),
+    }
+
+
+def _failing_spans(mrz_type, parsed):
+    """(مفتاح الصلاحية، مقاطع (السطر، البداية، النهاية)) لكل رقم تحقق فاشل"""
+    spans = {name: (row, start, end) for name, row, start, end, _ in FIELDS[mrz_type]}
+    failing = [
+        (key, (spans[field], spans[check_field]))
+        for key, field, check_field in CHECKS[mrz_type] if not parsed[key]
+    ]
+    if not parsed['valid_composite']:
+        failing.append(('valid_composite', COMPOSITE[mrz_type][0] + (spans['check_composite'],)))
+    return failing
+
+
+def _char_strip(image, boxes):
+    """صناديق الحروف بعد التكبير والتحويل الثنائي متجاورة في صورة سطر واحد"""
+    gray = _to_uint8(np.asarray(image))
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+    height, width = gray.shape
+    pieces = []
+    for x0, y0, x1, y1 in boxes:
+        crop = gray[max(y0 - REREAD_MARGIN, 0):min(y1 + REREAD_MARGIN, height),
+                    max(x0 - REREAD_MARGIN, 0):min(x1 + REREAD_MARGIN, width)]
+        if crop.size == 0:
+            return None
+        scale = REREAD_CHAR_HEIGHT / crop.shape[0]
+        crop = cv2.resize(crop, (max(round(crop.shape[1] * scale), 1), REREAD_CHAR_HEIGHT),
+                          interpolation=cv2.INTER_CUBIC)
+        _, crop = cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        pieces.append(crop)
+        pieces.append(np.full((REREAD_CHAR_HEIGHT, REREAD_GAP), 255, np.uint8))
+    strip = np.hstack(pieces[:-1])
+    return cv2.copyMakeBorder(strip, REREAD_GAP, REREAD_GAP, REREAD_GAP, REREAD_GAP,
+                              cv2.BORDER_CONSTANT, value=255)
+
+
+def _substitute(lines, changes):
+    lines = [list(line) for line in lines]
+    for (row, col), char in changes.items():
+        lines[row][col] = char
+    return [''.join(line) for line in lines]
+
+
+def _search_rereads(lines, alternatives, accept):
+    """أقل مجموعة من الحروف المعاد قراءتها تحقق accept، أو None إذا لم توجد أو تعددت"""
+    positions = list(alternatives)
+    for count in range(1, len(positions) + 1):
+        found = None
+        for combo in combinations(positions, count):
+            candidate = _substitute(lines, {position: alternatives[position] for position in combo})
+            if accept(candidate):
+                if found is not None:
+                    return None
+                found = candidate
+        if found is not None:
+            return found
+    return None
+
+
+def reread_low_confidence(mrz_data, reading, threshold=LOW_CONFIDENCE, max_chars=MAX_REREAD_CHARS):
+    """إعادة OCR لصناديق الحروف منخفضة الثقة في الحقول الفاشلة فقط
+
+    تُرجع قاموس parse_mrz أعلى درجة من mrz_data مع char_rereads، أو None.
+    """
+    raw_text = mrz_data.get('raw_text') if mrz_data else None
+    aligned = align_symbols(raw_text, reading['lines']) if raw_text and reading else None
+    if aligned is None:
+        return None
+    mrz_type, lines, symbols = aligned
+    parsed = parse_mrz(raw_text)
+    failing = _failing_spans(mrz_type, parsed)
+    if not failing:
+        return None
+
+    # الحروف الضعيفة داخل مقاطع الحقول الفاشلة، الأضعف أولاً
+    weak = {
+        (row, col)
+        for _, segments in failing
+        for row, start, end in segments
+        for col in range(start, min(end, len(symbols[row])))
+        if symbols[row][col][1] < threshold
+    }
+    weak = sorted(weak, key=lambda position: symbols[position[0]][position[1]][1])[:max_chars]
+    if not weak:
+        return None
+
+    strip = _char_strip(reading['image'], [symbols[row][col][2] for row, col in weak])
+    if strip is None:
+        return None
+    text, _ = ocr_line_symbols(strip)
+    text = ''.join(text.split()).upper()
+    # عدد حروف مختلف يعني أن الحروف لا يمكن مطابقتها بمواضعها
+    if len(text) != len(weak):
+        return None
+    alternatives = {position: char for position, char in zip(weak, text) if char != lines[position[0]][position[1]]}
+
+    current = lines
+    for key, segments in failing:
+        candidates = {
+            (row, col): char for (row, col), char in alternatives.items()
+            if any(r == row and start <= col < end for r, start, end in segments)
+        }
+        if not candidates:
+            continue
+        fixed = _search_rereads(
+            current, candidates, lambda candidate, key=key: parse_mrz('\n'.join(candidate))[key]
+        )
+        if fixed is not None:
+            current = fixed
+
+    if current is lines:
+        return None
+    repaired = parse_mrz('\n'.join(current))
+    if repaired['valid_score'] <= mrz_data.get('valid_score', 0):
+        return None
+    repaired['char_rereads'] = [
+        {'line': row, 'index': col, 'from': lines[row][col], 'to': current[row][col],
+         'confidence': round(symbols[row][col][1])}
+        for row, col in weak if current[row][col] != lines[row][col]
+    ]
+    return repaired
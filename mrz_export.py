@@ -0,0 +1,246 @@
+"""تصدير نتائج الدفعات إلى CSV أو JSONL أو Parquet على دفعات بذاكرة محدودة
+
+    with ResultExporter('results.csv') as exporter:
+        for record in records:             # سجلات batch_cli (path, page, mrz_data, timings_ms, ...)
+            exporter.write(record)
+
+السجلات تُجمع في مخزن عمودي، وكل chunk_size سجل يُنسق الاسم والتواريخ لكل
+عمود دفعة واحدة ثم يُكتب ويُفرغ المخزن. Parquet يحتاج pyarrow (اختياري).
+"""
+import csv
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from mrz_pipeline import format_date
+
+
+# عدد السجلات في كل دفعة كتابة (الذاكرة ثابتة مهما كان عدد السجلات)
+DEFAULT_CHUNK_SIZE = 10000
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+
+# حقول MRZ المصدرة كما هي (min_confidence: أدنى ثقة OCR لحرف في أسطر MRZ)
+MRZ_COLUMNS = (
+    'mrz_type', 'valid_score', 'type', 'country', 'nationality', 'number', 'surname', 'names',
+    'sex', 'date_of_birth', 'expiration_date', 'method', 'min_confidence',
+)
+VALIDITY_COLUMNS = (
+    'valid_number', 'valid_date_of_birth', 'valid_expiration_date', 'valid_personal_number', 'valid_composite',
+)
+# مراحل خط المعالجة (timings_ms) المصدرة كأعمدة stage_ms_<name>
+TIMING_STAGES = (
+    'decode', 'crop', 'dedup', 'normalize', 'deskew', 'grayscale', 'denoise', 'clahe', 'threshold',
+    'read_mrz', 'dedup_store',
+)
+# نفس حقول format_fields
+FORMATTED_COLUMNS = ('full_name', 'birth_date', 'expiry_date', 'passport_number')
+
+RECORD_COLUMNS = ('path', 'page', 'found', 'passes', 'latency_ms', 'error')
+COLUMNS = (
+    ('path', 'page', 'found') + MRZ_COLUMNS + FORMATTED_COLUMNS + VALIDITY_COLUMNS
+    + ('passes', 'latency_ms') + tuple(f'stage_ms_{name}' for name in TIMING_STAGES) + ('error',)
+)
+
+# قيمة الاسم الفارغ كما في format_name
+EMPTY_NAME = "غير متوفر"
+
+_ZERO, _NINE, _SLASH = ord('0'), ord('9'), ord('/')
+
+
+def _strings(values):
+    return np.array(['' if value is None else value for value in values], dtype=str)
+
+
+def format_dates(dates):
+    """format_date لعمود كامل بنفس نتيجتها لكل قيمة: YYMMDD إلى DD/MM/YYYY، وغير ذلك كما هو"""
+    dates = list(dates)
+    values = _strings(dates)
+    if not len(values):
+        return []
+    # كل تاريخ كستة أرقام Unicode (الأقصر يُكمل بأصفار) لحساب كل الأعمدة مرة واحدة
+    codes = values.astype('<U6').view(np.uint32).reshape(-1, 6)
+    yy_codes = codes[:, :2]
+    valid = (np.char.str_len(values) == 6) & ((yy_codes >= _ZERO) & (yy_codes <= _NINE)).all(axis=1)
+
+    yy = (yy_codes[:, 0].astype(np.int64) - _ZERO) * 10 + (yy_codes[:, 1].astype(np.int64) - _ZERO)
+    yyyy = np.where(yy > datetime.now().year % 100 + 10, 1900, 2000) + yy
+
+    out = np.empty((len(values), 10), dtype=np.uint32)
+    out[:, 0:2] = codes[:, 4:6]
+    out[:, 2] = _SLASH
+    out[:, 3:5] = codes[:, 2:4]
+    out[:, 5] = _SLASH
+    for position, power in enumerate((1000, 100, 10, 1)):
+        out[:, 6 + position] = (yyyy // power) % 10 + _ZERO
+    formatted = out.view('<U10').ravel().tolist()
+    # باقي القيم (فارغة، أو سنة بمسافة أو إشارة أو أرقام غير ASCII يقبلها int) عبر format_date نفسها
+    for row in np.flatnonzero(~valid):
+        formatted[row] = format_date(dates[row])
+    return formatted
+
+
+def format_names(names, surnames):
+    """format_name لعمودين كاملين"""
+    clean_names = np.char.strip(np.char.replace(_strings(names), '<', ' '))
+    clean_surnames = np.char.strip(np.char.replace(_strings(surnames), '<', ' '))
+    full = np.char.strip(np.char.add(np.char.add(clean_names, ' '), clean_surnames))
+    if not len(full):
+        return []
+    return np.where(np.char.str_len(full) > 0, full, EMPTY_NAME).tolist()
+
+
+def format_numbers(numbers):
+    """رقم الجواز بدون حشو '<' كما في format_fields"""
+    return np.char.strip(np.char.replace(_strings(numbers), '<', '')).tolist()
+
+
+class ResultBuffer:
+    """مخزن عمودي للسجلات: قائمة لكل عمود بدلاً من قاموس لكل سجل"""
+
+    def __init__(self):
+        self.columns = {name: [] for name in RECORD_COLUMNS + MRZ_COLUMNS + VALIDITY_COLUMNS}
+        self.columns.update({f'stage_ms_{name}': [] for name in TIMING_STAGES})
+        self.rows = 0
+
+    def append(self, record):
+        mrz_data = record.get('mrz_data') or {}
+        timings = record.get('timings_ms') or {}
+        for name in RECORD_COLUMNS:
+            self.columns[name].append(record.get(name))
+        for name in MRZ_COLUMNS + VALIDITY_COLUMNS:
+            self.columns[name].append(mrz_data.get(name))
+        for name in TIMING_STAGES:
+            self.columns[f'stage_ms_{name}'].append(timings.get(name))
+        self.rows += 1
+
+    def drain(self):
+        """الأعمدة المنسقة بترتيب COLUMNS، ثم تفريغ المخزن"""
+        columns = self.columns
+        found = [bool(value) for value in columns['found']]
+        # الحقول المنسقة فارغة للسجلات بدون MRZ (مثل سجلات batch_cli)
+        formatted = {
+            'full_name': format_names(columns['names'], columns['surname']),
+            'birth_date': format_dates(columns['date_of_birth']),
+            'expiry_date': format_dates(columns['expiration_date']),
+            'passport_number': format_numbers(columns['number']),
+        }
+        for name, values in formatted.items():
+            columns[name] = [value if ok else None for value, ok in zip(values, found)]
+        columns['found'] = found
+
+        ordered = {name: columns[name] for name in COLUMNS}
+        self.__init__()
+        return ordered
+
+
+def _csv_value(value):
+    return '' if value is None else value
+
+
+class _CSVWriter:
+    def __init__(self, output):
+        self.writer = csv.writer(output)
+        self.writer.writerow(COLUMNS)
+
+    def write(self, columns):
+        self.writer.writerows(zip(*(map(_csv_value, values) for values in columns.values())))
+
+
+class _JSONLWriter:
+    def __init__(self, output):
+        self.output = output
+
+    def write(self, columns):
+        names = list(columns)
+        for row in zip(*columns.values()):
+            self.output.write(json.dumps(dict(zip(names, row)), ensure_ascii=False) + '\n')
+
+
+class _ParquetWriter:
+    def __init__(self, output):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from None
+        self.pa = pa
+        self.schema = pa.schema(
+            [('path', pa.string()), ('page', pa.int64()), ('found', pa.bool_())]
+            + [(name, pa.int64() if name in ('valid_score', 'min_confidence') else pa.string()) for name in MRZ_COLUMNS]
+            + [(name, pa.string()) for name in FORMATTED_COLUMNS]
+            + [(name, pa.bool_()) for name in VALIDITY_COLUMNS]
+            + [('passes', pa.int64()), ('latency_ms', pa.float64())]
+            + [(f'stage_ms_{name}', pa.float64()) for name in TIMING_STAGES]
+            + [('error', pa.string())]
+        )
+        self.writer = pq.ParquetWriter(output, self.schema)
+
+    def write(self, columns):
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+_WRITERS = {'csv': _CSVWriter, 'jsonl': _JSONLWriter, 'parquet': _ParquetWriter}
+_EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet', '.pq': 'parquet'}
+
+
+def infer_format(path, default='jsonl'):
+    """الصيغة من امتداد الملف (.csv / .jsonl / .parquet)"""
+    return _EXTENSIONS.get(os.path.splitext(str(path))[1].lower(), default)
+
+
+class ResultExporter:
+    """كتابة السجلات كأعمدة مسطحة إلى ملف أو كائن ملف، chunk_size سجل في كل مرة
+
+    output مسار أو كائن ملف (نصي لـ CSV و JSONL، ثنائي لـ Parquet).
+    """
+
+    def __init__(self, output, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        fmt = fmt or infer_format(output if isinstance(output, (str, os.PathLike)) else '')
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt!r}")
+        self.format = fmt
+        self.chunk_size = chunk_size
+        self.count = 0
+        self._buffer = ResultBuffer()
+
+        self._owned = None
+        if isinstance(output, (str, os.PathLike)) and fmt != 'parquet':
+            output = self._owned = open(output, 'w', encoding='utf-8', newline='')
+        self._writer = _WRITERS[fmt](output)
+
+    def write(self, record):
+        self._buffer.append(record)
+        self.count += 1
+        if self._buffer.rows >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer.rows:
+            self._writer.write(self._buffer.drain())
+
+    def close(self):
+        self.flush()
+        if hasattr(self._writer, 'close'):
+            self._writer.close()
+        if self._owned is not None:
+            self._owned.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_records(records, output, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """تصدير قائمة أو مولد سجلات وإرجاع عددها"""
+    with ResultExporter(output, fmt, chunk_size) as exporter:
+        for record in records:
+            exporter.write(record)
+    return exporter.count
@@ -0,0 +1,279 @@
+"""فهرس دائم (SQLite) لتجنب إعادة OCR لنفس الجواز
+
+    index = MRZIndex('mrz_index.sqlite3')
+    mrz_data = index.lookup(cropped)          # بصمة إدراكية لمنطقة MRZ المقصوصة
+    index.put(cropped, mrz_data)
+
+البصمة القريبة لا تكفي وحدها: تُقبل فقط إذا طابق مفتاح الوثيقة المقروء بقراءة
+OCR واحدة للمنطقة (بدون مراحل passporteye) المفتاح المخزن.
+
+لا تُخزن الصور ولا النص الخام: فقط بصمة إدراكية لمنطقة MRZ، وبصمة مملحة لرقم
+الوثيقة والدولة وتاريخ الميلاد، والحقول المسموح بها في stored_fields. افتراضياً
+تُخزن الدرجة وأعلام التحقق فقط، وحقول الهوية (الاسم والرقم والتواريخ...) تحتاج
+إلى إدراجها صراحة (MRZ_INDEX_FIELDS)؛ وحتى ذلك الحين تعيد الإصابة هذه الحقول فقط.
+الملح في ملف منفصل (<path>.salt بصلاحيات المالك) أو في MRZ_INDEX_SALT، وليس في القاعدة.
+"""
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from mrz_parser import parse_mrz
+from mrz_pipeline import is_mrz_valid, normalize_resolution
+from ocr_backends import ocr
+
+
+# شبكة البصمة الإدراكية (عرض × ارتفاع) = 2048 بت
+HASH_WIDTH = 128
+HASH_HEIGHT = 16
+
+# أقصى نسبة بتات مختلفة لاعتبار المنطقة مرشحة للتكرار. على 300 جواز اصطناعي TD3:
+# إعادة ضغط JPEG وضوضاء وإضاءة ≤ 0.043 (الوسيط 0.005-0.01)، والتصغير حتى 0.08،
+# وأقرب جوازين مختلفين ≈ 0.05؛ لذلك كل مرشح غير مطابق تماماً يُتحقق منه (read_document_key)
+MAX_HASH_DISTANCE = 0.03
+
+# مدة الاحتفاظ وأقصى عدد وثائق قبل إخلاء الأقدم استخداماً
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_MAX_ENTRIES = 10000
+
+# الحقول المخزنة افتراضياً: الدرجة وأعلام التحقق فقط؛ raw_text لا يُخزن أبداً
+DEFAULT_STORED_FIELDS = (
+    'valid_score', 'valid_number', 'valid_date_of_birth', 'valid_expiration_date',
+    'valid_personal_number', 'valid_composite',
+)
+# حقول الهوية: تُخزن فقط إذا أُدرجت صراحة في stored_fields
+IDENTITY_FIELDS = (
+    'mrz_type', 'type', 'country', 'number', 'date_of_birth', 'expiration_date',
+    'nationality', 'sex', 'names', 'surname', 'personal_number', 'optional1', 'optional2',
+)
+NEVER_STORED = ('raw_text', 'corrections')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    doc_key TEXT PRIMARY KEY,
+    mrz_data TEXT NOT NULL,
+    valid_score INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_last_seen ON documents(last_seen);
+CREATE TABLE IF NOT EXISTS hashes (
+    phash BLOB NOT NULL,
+    doc_key TEXT NOT NULL REFERENCES documents(doc_key) ON DELETE CASCADE,
+    created REAL NOT NULL,
+    PRIMARY KEY (phash, doc_key)
+);
+CREATE INDEX IF NOT EXISTS idx_hashes_doc_key ON hashes(doc_key);
+"""
+
+
+def perceptual_hash(image):
+    """بصمة dHash لمنطقة MRZ بعد التحويل الثنائي والقص على حدود الحبر (bytes)"""
+    img_array = np.asarray(image)
+    gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY) if img_array.ndim == 3 else img_array
+    # التحويل الثنائي يثبت البتات في المناطق الفارغة حيث تقلب الضوضاء مقارنة الجيران
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    # القص على حدود الحبر حتى لا يغير اختلاف صندوق الكشف البصمة
+    ink = binary < 128
+    rows = np.flatnonzero(ink.mean(axis=1) > 0.02)
+    cols = np.flatnonzero(ink.mean(axis=0) > 0.02)
+    if len(rows) and len(cols):
+        binary = binary[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+    small = cv2.resize(binary, (HASH_WIDTH + 1, HASH_HEIGHT), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return np.packbits(small[:, 1:] > small[:, :-1]).tobytes()
+
+
+def _hamming(a, b):
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).bit_count()
+
+
+class MRZIndex:
+    """فهرس البصمات الإدراكية ووثائق MRZ المقروءة مع الاحتفاظ والإخلاء"""
+
+    def __init__(self, path, stored_fields=DEFAULT_STORED_FIELDS, max_distance=MAX_HASH_DISTANCE,
+                 retention_days=DEFAULT_RETENTION_DAYS, max_entries=DEFAULT_MAX_ENTRIES, salt=None):
+        self.path = path
+        self.stored_fields = tuple(field for field in stored_fields if field not in NEVER_STORED)
+        self.max_bits = int(max_distance * HASH_WIDTH * HASH_HEIGHT)
+        self.retention_days = retention_days
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        # عدة عمليات (الخادم والدفعات) قد تكتب في نفس الملف: WAL مع مهلة انتظار القفل
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        self._conn.execute('PRAGMA secure_delete=ON')
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.create_function('hamming', 2, _hamming, deterministic=True)
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        self._salt = salt or os.environ.get('MRZ_INDEX_SALT') or self._load_salt()
+
+    def _load_salt(self):
+        """ملح عشوائي لكل فهرس في <path>.salt (حتى لا تُطابق بصمات الوثائق بجداول محسوبة مسبقاً)"""
+        salt_path = self.path + '.salt'
+        with self._conn:
+            # فهارس قديمة كان ملحها في جدول meta: يُنقل إلى الملف ويُحذف من القاعدة
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'salt'").fetchone()
+            self._conn.execute("DELETE FROM meta WHERE key = 'salt'")
+        try:
+            fd = os.open(salt_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            with open(salt_path, encoding='ascii') as f:
+                return f.read().strip()
+        salt = row[0] if row else secrets.token_hex(16)
+        with os.fdopen(fd, 'w', encoding='ascii') as f:
+            f.write(salt)
+        return salt
+
+    def document_key(self, mrz_data):
+        """بصمة مملحة لرقم الوثيقة والدولة وتاريخ الميلاد، أو None إذا لم تُتحقق"""
+        if not mrz_data or not (mrz_data.get('valid_number') and mrz_data.get('valid_date_of_birth')):
+            return None
+        identity = '|'.join(mrz_data.get(field) or '' for field in ('number', 'country', 'date_of_birth'))
+        return hashlib.sha256(f'{self._salt}|{identity}'.encode('utf-8')).hexdigest()
+
+    def _cutoff(self):
+        return time.time() - self.retention_days * 86400
+
+    def _load(self, doc_key, now):
+        row = self._conn.execute(
+            'SELECT mrz_data FROM documents WHERE doc_key = ? AND last_seen >= ?', (doc_key, self._cutoff())
+        ).fetchone()
+        if row is None:
+            return None
+        with self._conn:
+            self._conn.execute('UPDATE documents SET last_seen = ? WHERE doc_key = ?', (now, doc_key))
+        return json.loads(row[0])
+
+    def read_document_key(self, image):
+        """مفتاح الوثيقة من قراءة OCR واحدة للمنطقة بعد توحيد الدقة والتحويل الثنائي، أو None"""
+        img_array = np.asarray(normalize_resolution(image))
+        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY) if img_array.ndim == 3 else img_array
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return self.document_key(parse_mrz(ocr(binary)))
+
+    def lookup(self, image):
+        """بيانات MRZ المخزنة لنفس الوثيقة، أو None
+
+        البصمة المطابقة تماماً تُعاد مباشرة؛ البصمة القريبة فقط إذا طابق مفتاح
+        الوثيقة من read_document_key مفتاحها المخزن (جوازان مختلفان قد تتقارب بصمتاهما).
+        """
+        phash = perceptual_hash(image)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT h.doc_key, hamming(h.phash, ?) AS distance FROM hashes h'
+                ' JOIN documents d ON d.doc_key = h.doc_key'
+                ' WHERE d.last_seen >= ? AND distance <= ? ORDER BY distance LIMIT 1',
+                (phash, self._cutoff(), self.max_bits)
+            ).fetchone()
+        if row is not None and row[1] > 0 and self.read_document_key(image) != row[0]:
+            row = None
+        with self._lock:
+            mrz_data = self._load(row[0], time.time()) if row else None
+            if mrz_data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        mrz_data['method'] = 'dedup'
+        return mrz_data
+
+    def lookup_document(self, mrz_data):
+        """النتيجة المخزنة لنفس الوثيقة إذا كانت أعلى درجة من mrz_data، أو None
+
+        فقط عندما تُخزن كل حقول الهوية الموجودة في mrz_data؛ وإلا فالنتيجة المخزنة
+        الناقصة لا تحل محل القراءة الكاملة.
+        """
+        doc_key = self.document_key(mrz_data)
+        if doc_key is None or any(
+            field in mrz_data and field not in self.stored_fields for field in IDENTITY_FIELDS
+        ):
+            return None
+        with self._lock:
+            stored = self._load(doc_key, time.time())
+        if stored is None or stored.get('valid_score', 0) <= mrz_data.get('valid_score', 0):
+            return None
+        stored['method'] = 'dedup'
+        return stored
+
+    def put(self, image, mrz_data, min_valid_score=80):
+        """تخزين نتيجة صحيحة فقط (حتى لا تُعاد قراءة خاطئة لكل الإرسالات اللاحقة)"""
+        doc_key = self.document_key(mrz_data)
+        if doc_key is None or not is_mrz_valid(mrz_data, min_valid_score):
+            return False
+        stored = {field: mrz_data[field] for field in self.stored_fields if field in mrz_data}
+        phash = perceptual_hash(image)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO documents (doc_key, mrz_data, valid_score, created, last_seen)'
+                ' VALUES (?, ?, ?, ?, ?)'
+                ' ON CONFLICT(doc_key) DO UPDATE SET last_seen = excluded.last_seen,'
+                ' mrz_data = CASE WHEN excluded.valid_score >= documents.valid_score'
+                ' THEN excluded.mrz_data ELSE documents.mrz_data END,'
+                ' valid_score = MAX(excluded.valid_score, documents.valid_score)',
+                (doc_key, json.dumps(stored, ensure_ascii=False), stored.get('valid_score', 0), now, now)
+            )
+            self._conn.execute(
+                'INSERT OR IGNORE INTO hashes (phash, doc_key, created) VALUES (?, ?, ?)', (phash, doc_key, now)
+            )
+            self._prune(now)
+        return True
+
+    def _prune(self, now):
+        self._conn.execute('DELETE FROM documents WHERE last_seen < ?', (now - self.retention_days * 86400,))
+        self._conn.execute(
+            'DELETE FROM documents WHERE doc_key IN ('
+            ' SELECT doc_key FROM documents ORDER BY last_seen DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def prune(self):
+        """حذف الوثائق المنتهية مدتها والزائدة عن max_entries"""
+        with self._lock, self._conn:
+            self._prune(time.time())
+
+    def stats(self):
+        with self._lock:
+            documents = self._conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+            hashes = self._conn.execute('SELECT COUNT(*) FROM hashes').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'documents': documents, 'hashes': hashes}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# فهرس واحد لكل مسار داخل العملية (لعمليات المعالجة في الخادم والدفعات)
+_INDEXES = {}
+
+
+def open_index(path, **options):
+    """فتح الفهرس مرة واحدة لكل مسار وإعادة استخدامه"""
+    if path not in _INDEXES:
+        _INDEXES[path] = MRZIndex(path, **options)
+    return _INDEXES[path]
+
+
+def stored_fields_from_env(default=DEFAULT_STORED_FIELDS):
+    """الحقول الافتراضية مع حقول الهوية المسموح بتخزينها صراحة في MRZ_INDEX_FIELDS (مفصولة بفواصل)"""
+    value = os.environ.get('MRZ_INDEX_FIELDS')
+    if not value:
+        return default
+    fields = tuple(field.strip() for field in value.split(',') if field.strip())
+    return tuple(default) + tuple(field for field in fields if field not in default)
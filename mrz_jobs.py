@@ -0,0 +1,330 @@
+"""طابور مهام محلي (SQLite) لمعالجة دفعات الصور في الخلفية
+
+    queue = JobQueue('mrz_jobs.sqlite3', workers=2)
+    job_id = queue.submit([('a.jpg', data_a), ('b.pdf', data_b)], priority=PRIORITY_BULK)
+    queue.status(job_id)                      # التقدم: عدد الملفات المنتهية والمتبقية
+    items, cursor = queue.results(job_id)      # النتائج الجزئية (ثم since=cursor للجديد فقط)
+    queue.cancel(job_id)
+
+    read_id = queue.submit_read(cropped, normalized)   # قراءة تفاعلية في الذاكرة فقط
+    queue.read_result(read_id)                 # None حتى تنتهي القراءة
+
+العمال يأخذون الملف التالي من المهمة الأعلى أولوية ثم الأقدم، لذلك المسح الفردي
+العاجل لا ينتظر انتهاء دفعة كبيرة. القراءات التفاعلية تسبق كل ملفات الطابور ولا
+تُكتب صورها في قاعدة البيانات. ملف القاعدة يُنشأ بصلاحيات المالك فقط، وبايتات
+الصور تُحذف فور معالجتها مع secure_delete حتى لا تبقى في الصفحات المحررة.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from ingest import decode_image, is_document, read_pages
+from mrz_metrics import METRICS
+from mrz_pipeline import read_cropped_mrz, run_pipeline
+
+
+# الأولويات: الأعلى يُعالج أولاً
+PRIORITY_BULK = 0
+PRIORITY_INTERACTIVE = 10
+
+# مدة الاحتفاظ بالمهام المنتهية ونتائجها
+DEFAULT_RETENTION_HOURS = 24
+
+# مدة الاحتفاظ بنتيجة قراءة تفاعلية لم تُستلم (الجلسة أُغلقت مثلاً)
+READ_RESULT_TTL_S = 600
+
+# حالات المهمة: queued ← running ← done، أو cancelled في أي وقت
+# حالات الملف: queued ← running ← done | failed، أو cancelled قبل بدء معالجته
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT,
+    created REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload BLOB,
+    records TEXT,
+    error TEXT,
+    seq INTEGER,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS idx_items_status ON items(status);
+CREATE INDEX IF NOT EXISTS idx_items_job ON items(job_id, seq);
+"""
+
+
+def process_upload(name, data, params=None, index=None):
+    """سجلات MRZ لملف مرفوع: سجل لكل صفحة في PDF/TIFF (mrz_data None للصفحات بلا MRZ)، وسجل واحد للصورة"""
+    if is_document(name):
+        return [
+            {'page': page['page'], 'mrz_data': page['mrz_data']}
+            for page in read_pages(data, params, index=index)
+        ]
+    image = decode_image(data)
+    _, _, mrz_data = run_pipeline(image, params, index=index)
+    return [{'page': 0, 'mrz_data': mrz_data}]
+
+
+def process_read(cropped, normalized, params=None, index=None):
+    """قراءة منطقة MRZ مقصوصة ومُوحدة الدقة مسبقاً، مع الصورة المقروءة فعلاً وزمن المراحل"""
+    timings = {}
+    read_metrics = {}
+    try:
+        read_image, mrz_data = read_cropped_mrz(
+            cropped, params, timings=timings, metrics=read_metrics, index=index, normalized=normalized
+        )
+    except Exception:
+        METRICS.record_result(error=True)
+        raise
+    METRICS.record_result(mrz_data)
+    return {'mrz_data': mrz_data, 'read_image': read_image, 'timings': timings, 'read_metrics': read_metrics}
+
+
+class JobQueue:
+    """طابور مهام بأولويات وإلغاء ونتائج جزئية، مع مجموعة عمال في الخلفية"""
+
+    def __init__(self, path, workers=2, index=None, retention_hours=DEFAULT_RETENTION_HOURS):
+        self.path = path
+        self.index = index
+        self.retention_hours = retention_hours
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        # القراءات التفاعلية: معرف ← الحالة والمدخلات أو النتيجة (في الذاكرة فقط)
+        self._reads = {}
+
+        # صلاحيات المالك فقط؛ SQLite ينشئ ملفات WAL و SHM بنفس صلاحيات القاعدة
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        for name in (path, path + '-wal', path + '-shm'):
+            if os.path.exists(name):
+                os.chmod(name, 0o600)
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        self._conn.execute('PRAGMA secure_delete=ON')
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            # ملفات كانت قيد المعالجة عند توقف العملية السابقة تعود إلى الطابور
+            self._conn.execute("UPDATE items SET status = 'queued' WHERE status = 'running'")
+
+        self._threads = [
+            threading.Thread(target=self._worker, name=f'mrz-job-worker-{n}', daemon=True)
+            for n in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, files, priority=PRIORITY_BULK, params=None):
+        """إضافة مهمة من قائمة (اسم الملف، البايتات) وإرجاع معرفها"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            self._prune(now)
+            self._conn.execute(
+                "INSERT INTO jobs (id, priority, status, params, created) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, priority, json.dumps(params) if params else None, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO items (job_id, position, name, status, payload) VALUES (?, ?, ?, 'queued', ?)",
+                [(job_id, position, name, data) for position, (name, data) in enumerate(files)]
+            )
+        self._wakeup.set()
+        return job_id
+
+    def submit_read(self, cropped, normalized=None, params=None):
+        """قراءة تفاعلية لمنطقة MRZ مقصوصة بأولوية على ملفات الطابور، وإرجاع معرفها
+
+        الصور تبقى في الذاكرة ولا تُكتب في قاعدة الطابور.
+        """
+        read_id = uuid.uuid4().hex
+        with self._lock:
+            self._prune_reads(time.time())
+            self._reads[read_id] = {
+                'status': 'queued', 'submitted': time.time(), 'args': (cropped, normalized, params),
+            }
+        self._wakeup.set()
+        return read_id
+
+    def read_status(self, read_id):
+        """حالة القراءة التفاعلية: queued أو running أو done أو failed، أو None"""
+        with self._lock:
+            read = self._reads.get(read_id)
+            return read['status'] if read else None
+
+    def read_result(self, read_id):
+        """نتيجة process_read (أو {'error': ...}) وحذفها من الذاكرة، أو None إذا لم تنته"""
+        with self._lock:
+            read = self._reads.get(read_id)
+            if read is None or read['status'] in ('queued', 'running'):
+                return None
+            del self._reads[read_id]
+        return read['result']
+
+    def cancel(self, job_id):
+        """إلغاء الملفات التي لم تبدأ؛ الملفات الجارية تكتمل وتبقى نتائجها"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id)
+            )
+            self._conn.execute(
+                "UPDATE items SET status = 'cancelled', payload = NULL WHERE job_id = ? AND status = 'queued'",
+                (job_id,)
+            )
+        return cursor.rowcount > 0
+
+    def status(self, job_id):
+        """حالة المهمة وعدد ملفاتها في كل حالة، أو None"""
+        with self._lock:
+            job = self._conn.execute(
+                'SELECT status, priority, created, finished FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(self._conn.execute(
+                'SELECT status, COUNT(*) FROM items WHERE job_id = ? GROUP BY status', (job_id,)
+            ).fetchall())
+        status, priority, created, finished = job
+        total = sum(counts.values())
+        return {
+            'id': job_id,
+            'status': status,
+            'priority': priority,
+            'total': total,
+            'finished': counts.get('done', 0) + counts.get('failed', 0),
+            'failed': counts.get('failed', 0),
+            'cancelled': counts.get('cancelled', 0),
+            'queued': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'elapsed_s': (finished or time.time()) - created,
+        }
+
+    def results(self, job_id, since=0):
+        """الملفات المنتهية بعد المؤشر since بترتيب انتهائها: (القائمة، المؤشر الجديد)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, position, name, status, records, error FROM items"
+                " WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, since)
+            ).fetchall()
+        items = [
+            {'position': position, 'name': name, 'status': status,
+             'records': json.loads(records) if records else [], 'error': error}
+            for _, position, name, status, records, error in rows
+        ]
+        return items, rows[-1][0] if rows else since
+
+    def iter_results(self, job_id, poll_interval=0.5):
+        """النتائج الجزئية فور توفرها حتى انتهاء المهمة أو إلغائها"""
+        cursor = 0
+        while True:
+            status = self.status(job_id)
+            items, cursor = self.results(job_id, cursor)
+            yield from items
+            if status is None or (status['queued'] == 0 and status['running'] == 0):
+                return
+            time.sleep(poll_interval)
+
+    def _claim(self):
+        """أخذ الملف التالي (أعلى أولوية ثم الأقدم) وتعليمه قيد المعالجة"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "UPDATE items SET status = 'running' WHERE id = ("
+                " SELECT i.id FROM items i JOIN jobs j ON j.id = i.job_id"
+                " WHERE i.status = 'queued' AND j.status IN ('queued', 'running')"
+                " ORDER BY j.priority DESC, j.created, i.position LIMIT 1)"
+                " RETURNING id, job_id, name, payload"
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE jobs SET status = 'running' WHERE id = ? AND status = 'queued'", (row[1],))
+        return row
+
+    def _finish(self, item_id, job_id, status, records=None, error=None):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE items SET status = ?, records = ?, error = ?, payload = NULL, finished = ?,"
+                " seq = (SELECT COALESCE(MAX(seq), 0) + 1 FROM items) WHERE id = ?",
+                (status, json.dumps(records, ensure_ascii=False) if records is not None else None, error, now, item_id)
+            )
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', finished = ? WHERE id = ? AND status = 'running'"
+                " AND NOT EXISTS (SELECT 1 FROM items WHERE job_id = ? AND status IN ('queued', 'running'))",
+                (now, job_id, job_id)
+            )
+
+    def _claim_read(self):
+        """أقدم قراءة تفاعلية منتظرة، وتعليمها قيد المعالجة"""
+        with self._lock:
+            queued = [(read['submitted'], read_id) for read_id, read in self._reads.items() if read['status'] == 'queued']
+            if not queued:
+                return None
+            read_id = min(queued)[1]
+            read = self._reads[read_id]
+            read['status'] = 'running'
+            return read_id, read.pop('args')
+
+    def _run_read(self, read_id, args):
+        try:
+            result, status = process_read(*args, index=self.index), 'done'
+        except Exception as e:
+            result, status = {'error': str(e)}, 'failed'
+        with self._lock:
+            if read_id in self._reads:
+                self._reads[read_id].update(status=status, result=result, finished=time.time())
+
+    def _prune_reads(self, now):
+        for read_id, read in list(self._reads.items()):
+            if read.get('finished', now) < now - READ_RESULT_TTL_S:
+                del self._reads[read_id]
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            read = self._claim_read()
+            if read is not None:
+                self._run_read(*read)
+                continue
+            row = self._claim()
+            if row is None:
+                self._wakeup.wait(timeout=1.0)
+                self._wakeup.clear()
+                continue
+
+            item_id, job_id, name, payload = row
+            params = self._job_params(job_id)
+            try:
+                records = process_upload(name, payload, params, index=self.index)
+            except Exception as e:
+                self._finish(item_id, job_id, 'failed', error=str(e))
+            else:
+                self._finish(item_id, job_id, 'done', records=records)
+
+    def _job_params(self, job_id):
+        with self._lock:
+            row = self._conn.execute('SELECT params FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def _prune(self, now):
+        self._conn.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'cancelled') AND finished < ?",
+            (now - self.retention_hours * 3600,)
+        )
+
+    def close(self):
+        """إيقاف العمال بعد انتهاء الملفات الجارية"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._conn.close()
@@ -0,0 +1,168 @@
+"""قياس زمن مراحل المعالجة وتصديرها بصيغة Prometheus"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# حدود المدرجات التكرارية للزمن (ثوانٍ) والحجم (بايت)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(16 * 1024 * 4 ** i for i in range(9))
+
+# نفس حدود مقياس الدقة في الواجهة
+SCORE_BANDS = ((80, 'excellent'), (50, 'good'), (0, 'poor'))
+
+
+def _process_start_time():
+    """وقت بدء العملية (من /proc على لينكس، وإلا وقت استيراد هذه الوحدة)"""
+    try:
+        with open('/proc/self/stat') as f:
+            # الحقل 22 (starttime) بعد اسم البرنامج بين الأقواس
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+PROCESS_STARTED = _process_start_time()
+
+
+class Histogram:
+    """مدرج تكراري تراكمي بسيط"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+def score_band(mrz_data):
+    """تصنيف النتيجة حسب valid_score (أو not_found)"""
+    if mrz_data is None:
+        return 'not_found'
+    score = mrz_data.get('valid_score', 0)
+    for threshold, band in SCORE_BANDS:
+        if score >= threshold:
+            return band
+    return 'poor'
+
+
+class MetricsRegistry:
+    """مدرجات زمن وحجم لكل مرحلة وعدادات النتائج حسب درجة الدقة"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = {}
+        self.sizes = {}
+        self.results = {}
+        self.gauges = {}
+
+    def observe(self, stage, seconds, size=None):
+        with self._lock:
+            self.durations.setdefault(stage, Histogram(DURATION_BUCKETS)).observe(seconds)
+            if size is not None:
+                self.sizes.setdefault(stage, Histogram(SIZE_BUCKETS)).observe(size)
+
+    def record_result(self, mrz_data=None, error=False):
+        band = 'error' if error else score_band(mrz_data)
+        with self._lock:
+            self.results[band] = self.results.get(band, 0) + 1
+            # الزمن من بدء العملية حتى أول نتيجة (يشمل الاستيراد والتسخين)
+            self.gauges.setdefault('mrz_time_to_first_result_seconds', time.time() - PROCESS_STARTED)
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def set_startup_gauge(self, name):
+        """تسجيل الزمن من بدء العملية حتى الآن مرة واحدة فقط"""
+        with self._lock:
+            self.gauges.setdefault(name, time.time() - PROCESS_STARTED)
+
+    def render_prometheus(self):
+        """نص بصيغة Prometheus exposition"""
+        with self._lock:
+            lines = [
+                '# HELP mrz_stage_duration_seconds Duration of each pipeline stage.',
+                '# TYPE mrz_stage_duration_seconds histogram',
+            ]
+            for stage, histogram in sorted(self.durations.items()):
+                lines += histogram.render('mrz_stage_duration_seconds', f'stage="{stage}"')
+            lines += [
+                '# HELP mrz_stage_input_bytes Input size of each pipeline stage.',
+                '# TYPE mrz_stage_input_bytes histogram',
+            ]
+            for stage, histogram in sorted(self.sizes.items()):
+                lines += histogram.render('mrz_stage_input_bytes', f'stage="{stage}"')
+            lines += [
+                '# HELP mrz_results_total Extraction results by valid_score band.',
+                '# TYPE mrz_results_total counter',
+            ]
+            for band, count in sorted(self.results.items()):
+                lines.append(f'mrz_results_total{{band="{band}"}} {count}')
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# السجل المشترك على مستوى العملية
+METRICS = MetricsRegistry()
+
+
+@contextmanager
+def stage(name, timings=None, size=None):
+    """قياس زمن مرحلة وتسجيله في METRICS وفي قاموس timings (بالمللي ثانية)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        METRICS.observe(name, elapsed, size)
+        if timings is not None:
+            timings[name] = elapsed * 1000
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = METRICS.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host='0.0.0.0'):
+    """خادم /metrics في خيط خلفي (للواجهة التي لا تملك مسارات HTTP خاصة بها)"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,272 @@
+"""محلل MRZ ومدقق أرقام التحقق حسب ICAO 9303 (TD1 / TD2 / TD3)
+
+يعمل على نص OCR الخام ويصحح الحروف المتشابهة (O/0، I/1، B/8، S/5، Z/2، G/6)
+بالاعتماد على أرقام التحقق، بدلاً من إعادة قراءة الصورة كاملة.
+"""
+from datetime import datetime
+from itertools import combinations
+
+
+# قيمة كل حرف في حساب رقم التحقق ('<' = 0)
+_CHAR_VALUES = {str(d): d for d in range(10)}
+_CHAR_VALUES.update({chr(ord('A') + i): 10 + i for i in range(26)})
+_WEIGHTS = (7, 3, 1)
+
+# تصحيح حتمي حسب نوع الخانة
+LETTER_TO_DIGIT = {'O': '0', 'Q': '0', 'D': '0', 'U': '0', 'I': '1', 'L': '1', 'Z': '2',
+                   'S': '5', 'G': '6', 'T': '7', 'B': '8'}
+DIGIT_TO_LETTER = {'0': 'O', '1': 'I', '2': 'Z', '5': 'S', '6': 'G', '8': 'B'}
+
+# أزواج الالتباس المجربة في الخانات الحرفية الرقمية عند فشل رقم التحقق
+CONFUSABLE = {'O': '0', '0': 'O', 'I': '1', '1': 'I', 'B': '8', '8': 'B',
+              'S': '5', '5': 'S', 'Z': '2', '2': 'Z', 'G': '6', '6': 'G'}
+
+# أقصى عدد خانات ملتبسة في البحث (2^n مرشح)
+MAX_AMBIGUOUS = 10
+
+LINE_LENGTHS = {'TD1': 30, 'TD2': 36, 'TD3': 44}
+
+# الحقول: (الاسم، السطر، البداية، النهاية، النوع) — النوع: digit / alpha / alnum،
+# و sex (M أو F أو '<') بلا تصحيح: DIGIT_TO_LETTER يحول '0' إلى 'O' وهي قيمة غير صالحة
+FIELDS = {
+    'TD1': (
+        ('type', 0, 0, 2, 'alpha'), ('country', 0, 2, 5, 'alpha'),
+        ('number', 0, 5, 14, 'alnum'), ('check_number', 0, 14, 15, 'digit'),
+        ('optional1', 0, 15, 30, 'alnum'),
+        ('date_of_birth', 1, 0, 6, 'digit'), ('check_date_of_birth', 1, 6, 7, 'digit'),
+        ('sex', 1, 7, 8, 'sex'),
+        ('expiration_date', 1, 8, 14, 'digit'), ('check_expiration_date', 1, 14, 15, 'digit'),
+        ('nationality', 1, 15, 18, 'alpha'), ('optional2', 1, 18, 29, 'alnum'),
+        ('check_composite', 1, 29, 30, 'digit'),
+        ('name_field', 2, 0, 30, 'alpha'),
+    ),
+    'TD2': (
+        ('type', 0, 0, 2, 'alpha'), ('country', 0, 2, 5, 'alpha'), ('name_field', 0, 5, 36, 'alpha'),
+        ('number', 1, 0, 9, 'alnum'), ('check_number', 1, 9, 10, 'digit'),
+        ('nationality', 1, 10, 13, 'alpha'),
+        ('date_of_birth', 1, 13, 19, 'digit'), ('check_date_of_birth', 1, 19, 20, 'digit'),
+        ('sex', 1, 20, 21, 'sex'),
+        ('expiration_date', 1, 21, 27, 'digit'), ('check_expiration_date', 1, 27, 28, 'digit'),
+        ('optional1', 1, 28, 35, 'alnum'), ('check_composite', 1, 35, 36, 'digit'),
+    ),
+    'TD3': (
+        ('type', 0, 0, 2, 'alpha'), ('country', 0, 2, 5, 'alpha'), ('name_field', 0, 5, 44, 'alpha'),
+        ('number', 1, 0, 9, 'alnum'), ('check_number', 1, 9, 10, 'digit'),
+        ('nationality', 1, 10, 13, 'alpha'),
+        ('date_of_birth', 1, 13, 19, 'digit'), ('check_date_of_birth', 1, 19, 20, 'digit'),
+        ('sex', 1, 20, 21, 'sex'),
+        ('expiration_date', 1, 21, 27, 'digit'), ('check_expiration_date', 1, 27, 28, 'digit'),
+        ('personal_number', 1, 28, 42, 'alnum'), ('check_personal_number', 1, 42, 43, 'digit'),
+        ('check_composite', 1, 43, 44, 'digit'),
+    ),
+}
+
+# أرقام التحقق: (مفتاح الصلاحية، الحقل المحمي، خانة رقم التحقق)
+CHECKS = {
+    'TD1': (('valid_number', 'number', 'check_number'),
+            ('valid_date_of_birth', 'date_of_birth', 'check_date_of_birth'),
+            ('valid_expiration_date', 'expiration_date', 'check_expiration_date')),
+    'TD2': (('valid_number', 'number', 'check_number'),
+            ('valid_date_of_birth', 'date_of_birth', 'check_date_of_birth'),
+            ('valid_expiration_date', 'expiration_date', 'check_expiration_date')),
+    'TD3': (('valid_number', 'number', 'check_number'),
+            ('valid_date_of_birth', 'date_of_birth', 'check_date_of_birth'),
+            ('valid_expiration_date', 'expiration_date', 'check_expiration_date'),
+            ('valid_personal_number', 'personal_number', 'check_personal_number')),
+}
+
+# مقاطع الرقم المركب: (السطر، البداية، النهاية)، والحقول الحرة التي يمكن تصحيحها به
+COMPOSITE = {
+    'TD1': (((0, 5, 30), (1, 0, 7), (1, 8, 15), (1, 18, 29)), ('optional1', 'optional2')),
+    'TD2': (((1, 0, 10), (1, 13, 20), (1, 21, 35)), ('optional1',)),
+    'TD3': (((1, 0, 10), (1, 13, 20), (1, 21, 43)), ()),
+}
+
+
+def check_digit(value):
+    """رقم التحقق ICAO 9303 (أوزان 7-3-1)"""
+    total = 0
+    for i, char in enumerate(value):
+        total += _CHAR_VALUES.get(char, 0) * _WEIGHTS[i % 3]
+    return str(total % 10)
+
+
+def _valid_date(value):
+    try:
+        datetime.strptime(value, '%y%m%d')
+        return True
+    except ValueError:
+        return False
+
+
+def split_lines(text):
+    """استخراج أسطر MRZ من نص OCR وتحديد نوعها، وإرجاع (النوع، الأسطر) أو (None, [])"""
+    lines = [line.replace(' ', '').upper() for line in text.splitlines()]
+    lines = [line for line in lines if len(line) >= 20]
+    if len(lines) >= 3 and all(len(line) < 40 for line in lines[-3:]) and len(lines[-1]) <= 34:
+        mrz_type, lines = 'TD1', lines[-3:]
+    elif len(lines) >= 2:
+        lines = lines[-2:]
+        mrz_type = 'TD2' if max(len(line) for line in lines) < 40 else 'TD3'
+    else:
+        return None, []
+    return mrz_type, lines
+
+
+def _search_candidates(value, accept, limit=MAX_AMBIGUOUS):
+    """القيمة الوحيدة بأقل عدد من التبديلات الملتبسة التي تحقق accept، أو None
+
+    إذا نجح أكثر من مرشح بنفس عدد التبديلات فالنتيجة غامضة ولا تُصحح
+    (إعادة OCR أفضل من قيمة خاطئة تمر أرقام التحقق).
+    """
+    if accept(value):
+        return value
+    positions = [i for i, char in enumerate(value) if char in CONFUSABLE][:limit]
+    chars = list(value)
+    for count in range(1, len(positions) + 1):
+        found = None
+        for combo in combinations(positions, count):
+            for i in combo:
+                chars[i] = CONFUSABLE[value[i]]
+            candidate = ''.join(chars)
+            for i in combo:
+                chars[i] = value[i]
+            if accept(candidate):
+                if found is not None:
+                    return None
+                found = candidate
+        if found is not None:
+            return found
+    return None
+
+
+class _Record:
+    """أسطر MRZ قابلة للتعديل مع سجل التصحيحات"""
+
+    def __init__(self, mrz_type, lines):
+        length = LINE_LENGTHS[mrz_type]
+        self.mrz_type = mrz_type
+        self.line_lengths = [len(line) == length for line in lines]
+        self.lines = [list((line + '<' * length)[:length]) for line in lines]
+        self.spans = {name: (row, start, end, kind) for name, row, start, end, kind in FIELDS[mrz_type]}
+        self.corrections = []
+
+    def get(self, name):
+        row, start, end, _ = self.spans[name]
+        return ''.join(self.lines[row][start:end])
+
+    def set(self, name, value):
+        row, start, _, _ = self.spans[name]
+        for offset, char in enumerate(value):
+            old = self.lines[row][start + offset]
+            if old != char:
+                self.corrections.append({'line': row, 'index': start + offset, 'from': old, 'to': char})
+                self.lines[row][start + offset] = char
+
+    def segment(self, row, start, end):
+        return ''.join(self.lines[row][start:end])
+
+    def normalize_kinds(self):
+        """تصحيح حتمي: حروف في خانات رقمية وأرقام في خانات حرفية"""
+        for name, (row, start, end, kind) in self.spans.items():
+            table = LETTER_TO_DIGIT if kind == 'digit' else DIGIT_TO_LETTER if kind == 'alpha' else None
+            if table is None:
+                continue
+            value = self.get(name)
+            fixed = ''.join(table.get(char, char) for char in value)
+            if fixed != value:
+                self.set(name, fixed)
+
+
+def _field_valid(record, field, check_field):
+    value, check = record.get(field), record.get(check_field)
+    if field == 'personal_number' and check in '<0' and set(value) == {'<'}:
+        return True
+    valid = check_digit(value) == check
+    if field in ('date_of_birth', 'expiration_date'):
+        valid = valid and _valid_date(value)
+    return valid
+
+
+def _composite_value(record):
+    segments, _ = COMPOSITE[record.mrz_type]
+    return ''.join(record.segment(*segment) for segment in segments)
+
+
+def parse_mrz(text, correct=True):
+    """تحليل نص MRZ إلى قاموس بنفس مفاتيح passporteye (to_dict) أو None
+
+    correct: تفعيل تصحيح الحروف الملتبسة بالاعتماد على أرقام التحقق.
+    """
+    mrz_type, lines = split_lines(text) if isinstance(text, str) else (None, [])
+    if mrz_type is None:
+        return None
+    record = _Record(mrz_type, lines)
+
+    if correct:
+        record.normalize_kinds()
+        for _, field, check_field in CHECKS[mrz_type]:
+            if _field_valid(record, field, check_field) or record.spans[field][3] != 'alnum':
+                continue
+            check = record.get(check_field)
+            fixed = _search_candidates(record.get(field), lambda value: check_digit(value) == check)
+            if fixed is not None:
+                record.set(field, fixed)
+
+        # الحقول الحرة بلا رقم تحقق خاص تُصحح عبر الرقم المركب
+        check = record.get('check_composite')
+        for field in COMPOSITE[mrz_type][1]:
+            if check_digit(_composite_value(record)) == check:
+                break
+            original = record.get(field)
+
+            def accept(value, field=field):
+                record.lines[record.spans[field][0]][record.spans[field][1]:record.spans[field][2]] = list(value)
+                return check_digit(_composite_value(record)) == check
+
+            fixed = _search_candidates(original, accept)
+            accept(original)
+            if fixed is not None:
+                record.set(field, fixed)
+
+    return _to_dict(record)
+
+
+def _to_dict(record):
+    mrz_type = record.mrz_type
+    result = {'mrz_type': mrz_type}
+    surname, _, names = record.get('name_field').partition('<<')
+    fields = {
+        'type': record.get('type'),
+        'country': record.get('country'),
+        'number': record.get('number'),
+        'date_of_birth': record.get('date_of_birth'),
+        'expiration_date': record.get('expiration_date'),
+        'nationality': record.get('nationality'),
+        'sex': record.get('sex'),
+        'names': names.replace('<', ' ').strip(),
+        'surname': surname.replace('<', ' ').strip(),
+    }
+    if mrz_type == 'TD1':
+        fields['optional1'] = record.get('optional1')
+        fields['optional2'] = record.get('optional2')
+    elif mrz_type == 'TD2':
+        fields['optional1'] = record.get('optional1')
+    else:
+        fields['personal_number'] = record.get('personal_number')
+
+    checks = {name: record.get(name) for name, *_ in FIELDS[mrz_type] if name.startswith('check_')}
+    validity = {key: _field_valid(record, field, check) for key, field, check in CHECKS[mrz_type]}
+    validity['valid_composite'] = check_digit(_composite_value(record)) == record.get('check_composite')
+
+    # نفس صيغة valid_score في passporteye
+    first = record.get('type')[0]
+    valid_misc = first in ('P' if mrz_type == 'TD3' else 'ACI')
+    score = 10 * sum(validity.values()) + sum(record.line_lengths) + valid_misc + 1
+    result['valid_score'] = 100 * score // (10 * len(validity) + len(record.line_lengths) + 1 + 1)
+
+    result.update(fields)
+    result.update(checks)
+    result.update(validity)
+    result['corrections'] = record.corrections
+    return result
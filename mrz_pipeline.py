@@ -0,0 +1,681 @@
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from mrz_confidence import CONFIDENCE_FIELDS, confidence_fields, find_reading, reread_low_confidence
+from mrz_metrics import METRICS, stage
+from mrz_parser import parse_mrz
+from ocr_backends import capture_symbols, install_ocr
+
+
+# إعدادات خط المعالجة (تدخل في مفتاح الذاكرة المؤقتة)
+PIPELINE_PARAMS = {
+    'crop_ratio': 0.35,
+    'detect_mrz': True,
+    'target_char_height': 32,
+    'denoiser': 'nlmeans',
+    'clahe_clip_limit': 2.0,
+    'clahe_tile_grid': 8,
+    'enhance_tiles': 1,
+    'deskew': True,
+    'adaptive': True,
+    'min_valid_score': 80,
+}
+
+
+# عرض الصورة المصغرة المستخدمة في الكشف عن MRZ
+DETECT_WIDTH = 600
+
+# بنية أسطر MRZ بوحدة ارتفاع الحرف (مستقلة عن حجم الوثيقة في الإطار):
+# السطر 30-44 حرفاً بخطوة ≈ 1.06 ارتفاع حرف، والكتلة 2-3 أسطر بخطوة ≈ 1.76
+MRZ_LINE_LENGTH_RANGE = (20.0, 70.0)
+MRZ_BLOCK_HEIGHT_RANGE = (1.8, 6.0)
+MIN_MRZ_GLYPHS = 30
+
+def _glyph_heights(gray):
+    """ارتفاعات المكونات المتصلة التي تشبه الحروف (الحبر الداكن بعد Otsu)"""
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(ink)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    return heights[(heights >= 3) & (widths <= 2 * heights)]
+
+def _has_mrz_lines(gray, long_side, short_side):
+    """هل تشبه المنطقة أسطر MRZ: طول السطر وارتفاع الكتلة بوحدة ارتفاع الحرف وعدد الحروف"""
+    heights = _glyph_heights(gray)
+    if len(heights) < MIN_MRZ_GLYPHS:
+        return False
+    # الربيع الأعلى: الحروف والأرقام لا '<' الأقصر منها
+    char_height = float(np.percentile(heights, 75))
+    glyphs = np.count_nonzero((heights >= 0.4 * char_height) & (heights <= 1.5 * char_height))
+    return (
+        glyphs >= MIN_MRZ_GLYPHS
+        and MRZ_LINE_LENGTH_RANGE[0] <= long_side / char_height <= MRZ_LINE_LENGTH_RANGE[1]
+        and MRZ_BLOCK_HEIGHT_RANGE[0] <= short_side / char_height <= MRZ_BLOCK_HEIGHT_RANGE[1]
+    )
+
+# دالة لتحديد موقع MRZ في الصورة
+def detect_mrz_region(img_array):
+    """البحث عن صندوق MRZ (blackhat + تدرج أفقي + فلترة الكونتورات)
+
+    يعيد (x, y, w, h) بإحداثيات الصورة الأصلية أو None إذا لم يُعثر على MRZ.
+    """
+    height, width = img_array.shape[:2]
+    
+    # العمل على نسخة مصغرة لتسريع الكشف (التصغير قبل التحويل للرمادي لتجنب نسخة رمادية بالحجم الكامل)
+    scale = min(1.0, DETECT_WIDTH / float(width))
+    small = cv2.resize(img_array, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else img_array
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+    small_h, small_w = small.shape[:2]
+    
+    rect_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (13, 5))
+    sq_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (21, 21))
+    
+    # إبراز النص الداكن على الخلفية الفاتحة
+    blurred = cv2.GaussianBlur(small, (3, 3), 0)
+    blackhat = cv2.morphologyEx(blurred, cv2.MORPH_BLACKHAT, rect_kernel)
+    
+    # التدرج الأفقي يبرز تتابع الحروف في الأسطر
+    grad = np.absolute(cv2.Sobel(blackhat, cv2.CV_32F, 1, 0, ksize=-1))
+    min_val, max_val = grad.min(), grad.max()
+    if max_val - min_val < 1e-6:
+        return None
+    grad = (255 * (grad - min_val) / (max_val - min_val)).astype(np.uint8)
+    
+    # دمج الحروف في أسطر ثم دمج الأسطر في كتلة واحدة
+    grad = cv2.morphologyEx(grad, cv2.MORPH_CLOSE, rect_kernel)
+    _, thresh = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, sq_kernel)
+    thresh = cv2.erode(thresh, None, iterations=2)
+    
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True):
+        # أسطر MRZ عريضة جداً مقارنة بارتفاعها (أبعاد المستطيل الدوار حتى لا تُرفض
+        # المنطقة المائلة)، ثم فحص بنية الأسطر بالدقة الأصلية بدلاً من نسبتها لعرض
+        # الإطار حتى تُكشف الوثيقة الصغيرة أو البعيدة عن المركز
+        _, (rect_w, rect_h), _ = cv2.minAreaRect(contour)
+        long_side, short_side = max(rect_w, rect_h), min(rect_w, rect_h)
+        if short_side == 0 or long_side / short_side < 5:
+            continue
+        x, y, w, h = cv2.boundingRect(contour)
+        
+        # هامش صغير حتى لا تُقطع أطراف الحروف (+2 بكسل يعوض التآكل أعلاه في الوثيقة الصغيرة)
+        pad_x = int(0.03 * w) + 2
+        pad_y = int(0.2 * h) + 2
+        x0 = max(0, x - pad_x)
+        y0 = max(0, y - pad_y)
+        x1 = min(small_w, x + w + pad_x)
+        y1 = min(small_h, y + h + pad_y)
+        box = (int(x0 / scale), int(y0 / scale), int((x1 - x0) / scale), int((y1 - y0) / scale))
+        
+        region = img_array[box[1]:box[1] + box[3], box[0]:box[0] + box[2]]
+        if region.ndim == 3:
+            region = cv2.cvtColor(region, cv2.COLOR_RGB2GRAY)
+        if region.size and _has_mrz_lines(region, (long_side + 4) / scale, (short_side + 4) / scale):
+            return box
+    return None
+
+# دالة لقص منطقة MRZ من الصورة
+def crop_mrz_region(image, crop_ratio=0.35, detect_mrz=True):
+    """قص منطقة MRZ من الصورة (PIL أو NumPy؛ المصفوفة لا تُنسخ قبل القص)"""
+    img_array = np.asarray(image)
+    height, width = img_array.shape[:2]
+    
+    # محاولة تحديد صندوق MRZ بدقة أولاً
+    box = detect_mrz_region(img_array) if detect_mrz else None
+    if box is not None:
+        x, y, w, h = box
+        return Image.fromarray(img_array[y:y + h, x:x + w])
+    
+    # تحديد منطقة MRZ (الربع السفلي من الصورة تقريباً)
+    mrz_height = int(height * crop_ratio)
+    y_start = height - mrz_height
+    
+    # قص المنطقة
+    cropped = img_array[y_start:height, :]
+    
+    return Image.fromarray(cropped)
+
+# أكبر زاوية ميل تُصحح، وأصغر زاوية تستحق التدوير
+MAX_DESKEW_ANGLE = 20.0
+MIN_DESKEW_ANGLE = 0.3
+
+# دالة لتقدير ميل أسطر MRZ في المنطقة المقصوصة
+def estimate_skew(img_array):
+    """زاوية أسطر MRZ بالدرجات (الزاوية التي تعيدها أفقية عبر getRotationMatrix2D) أو None"""
+    gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY) if img_array.ndim == 3 else img_array
+    height, width = gray.shape[:2]
+    
+    # الحروف الداكنة ثم دمجها أفقياً في كتلة لكل سطر
+    blackhat_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, width // 30), max(3, height // 4)))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, blackhat_kernel)
+    _, binary = cv2.threshold(blackhat, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    line_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, width // 40), 3))
+    lines = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, line_kernel)
+    
+    angles, weights = [], []
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in contours:
+        _, (rect_w, rect_h), angle = cv2.minAreaRect(contour)
+        if rect_w < rect_h:
+            rect_w, rect_h = rect_h, rect_w
+            angle -= 90
+        # كتل الأسطر فقط: طويلة ورفيعة وتغطي جزءاً كبيراً من العرض
+        if rect_h == 0 or rect_w < 0.3 * width or rect_w / rect_h < 8:
+            continue
+        while angle > 45:
+            angle -= 90
+        while angle <= -45:
+            angle += 90
+        angles.append(angle)
+        weights.append(rect_w)
+    if not angles:
+        return None
+    return float(np.average(angles, weights=weights))
+
+# دالة لتصحيح ميل منطقة MRZ بتحويل واحد
+def deskew_mrz(image, max_angle=MAX_DESKEW_ANGLE):
+    """تدوير المنطقة المقصوصة حتى تصبح الأسطر أفقية، وإرجاع (الصورة، الزاوية المطبقة)"""
+    img_array = np.asarray(image)
+    angle = estimate_skew(img_array)
+    if angle is None or abs(angle) < MIN_DESKEW_ANGLE or abs(angle) > max_angle:
+        return Image.fromarray(img_array), 0.0
+    height, width = img_array.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2.0, height / 2.0), angle, 1.0)
+    rotated = cv2.warpAffine(img_array, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                             borderMode=cv2.BORDER_REPLICATE)
+    return Image.fromarray(rotated), angle
+
+# عدد الحروف في سطر MRZ الأطول (TD3) والأقصر (TD1) ونسبة ارتفاع الحرف إلى خطوته في OCR-B
+MRZ_LINE_CHARS = 44
+MIN_MRZ_LINE_CHARS = 30
+CHAR_HEIGHT_TO_PITCH = 0.95
+
+# قياس ارتفاع الحرف على نسخة مصغرة لا يقل فيها أكبر ارتفاع ممكن عن هذا المضاعف للهدف
+MEASURE_HEIGHT_FACTOR = 2
+
+def estimate_char_height(gray):
+    """ارتفاع حرف MRZ بالبكسل من المكونات المتصلة، أو None إذا لم تكفِ الحروف
+
+    الربيع الأعلى لارتفاعات الحروف: الحروف والأرقام وليس '<' الأقصر منها.
+    """
+    heights = _glyph_heights(gray)
+    if len(heights) < MIN_MRZ_GLYPHS:
+        return None
+    return float(np.percentile(heights, 75))
+
+# دالة لتوحيد دقة الصورة قبل التحسين
+def normalize_resolution(image, target_char_height=32):
+    """تصغير منطقة MRZ بحيث يقارب ارتفاع الحرف target_char_height بكسل
+
+    ارتفاع الحرف يُقاس من المنطقة نفسها (المكونات المتصلة)، لأن MRZ قد لا يملأ
+    عرض القص الاحتياطي؛ وعند تعذر القياس يُقدّر من العرض كسطر TD3 كامل.
+    لا يتم التكبير أبداً، و None يعطل هذه المرحلة.
+    """
+    img_array = np.asarray(image)
+    if not target_char_height:
+        return Image.fromarray(img_array)
+    height, width = img_array.shape[:2]
+    
+    # أكبر ارتفاع ممكن: سطر TD1 (الأقصر) يمتد على كامل العرض
+    max_char_height = width / MIN_MRZ_LINE_CHARS * CHAR_HEIGHT_TO_PITCH
+    if max_char_height <= target_char_height:
+        return Image.fromarray(img_array)
+    
+    gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY) if img_array.ndim == 3 else img_array
+    measure_scale = min(1.0, MEASURE_HEIGHT_FACTOR * target_char_height / max_char_height)
+    if measure_scale < 1.0:
+        gray = cv2.resize(gray, None, fx=measure_scale, fy=measure_scale, interpolation=cv2.INTER_AREA)
+    measured = estimate_char_height(gray)
+    if measured is not None:
+        estimated_char_height = measured / measure_scale
+    else:
+        estimated_char_height = width / MRZ_LINE_CHARS * CHAR_HEIGHT_TO_PITCH
+    scale = target_char_height / estimated_char_height
+    if scale >= 1.0:
+        return Image.fromarray(img_array)
+    
+    new_size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    resized = cv2.resize(img_array, new_size, interpolation=cv2.INTER_AREA)
+    return Image.fromarray(resized)
+
+# استراتيجيات تقليل الضوضاء (من الأبطأ والأدق إلى الأسرع)
+def _denoise_nlmeans(gray):
+    return cv2.fastNlMeansDenoising(gray)
+
+def _denoise_bilateral(gray):
+    return cv2.bilateralFilter(gray, 7, 50, 50)
+
+def _denoise_median(gray):
+    return cv2.medianBlur(gray, 3)
+
+def _denoise_gaussian(gray):
+    return cv2.GaussianBlur(gray, (3, 3), 0)
+
+def _denoise_none(gray):
+    return gray
+
+DENOISERS = {
+    'nlmeans': _denoise_nlmeans,
+    'bilateral': _denoise_bilateral,
+    'median': _denoise_median,
+    'gaussian': _denoise_gaussian,
+    'none': _denoise_none,
+}
+
+# نصف قطر الجوار الذي يقرأه كل مرشح = التداخل اللازم بين الشرائح لنتيجة مطابقة
+# (NL-means: نصف نافذة القالب 7 + نصف نافذة البحث 21)
+DENOISE_RADIUS = {
+    'nlmeans': 7 // 2 + 21 // 2,
+    'bilateral': 7 // 2,
+    'median': 1,
+    'gaussian': 1,
+    'none': 0,
+}
+
+# أقل عرض لكل شريحة (الشرائح الأضيق تضيع وقتها في التداخل)
+MIN_TILE_WIDTH = 256
+
+_tile_executor = None
+
+
+def _get_tile_executor():
+    global _tile_executor
+    if _tile_executor is None:
+        _tile_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='mrz-tile')
+    return _tile_executor
+
+
+def denoise_tiled(gray, denoiser='nlmeans', tiles=1):
+    """تقليل الضوضاء على شرائح متداخلة عبر العرض بالتوازي (OpenCV يحرر GIL)
+
+    كل شريحة تُعالج مع DENOISE_RADIUS بكسل من جيرانها ويُكتب جزؤها الداخلي فقط،
+    لذلك النتيجة مطابقة لمعالجة الصورة كاملة بدون حواف بين الشرائح.
+    """
+    height, width = gray.shape
+    tiles = min(tiles, width // MIN_TILE_WIDTH)
+    if tiles <= 1:
+        return DENOISERS[denoiser](gray)
+    
+    pad = DENOISE_RADIUS[denoiser]
+    bounds = np.linspace(0, width, tiles + 1).astype(int)
+    denoised = np.empty_like(gray)
+    
+    def denoise_strip(i):
+        start, stop = bounds[i], bounds[i + 1]
+        left, right = max(0, start - pad), min(width, stop + pad)
+        strip = DENOISERS[denoiser](np.ascontiguousarray(gray[:, left:right]))
+        denoised[:, start:stop] = strip[:, start - left:stop - left]
+    
+    list(_get_tile_executor().map(denoise_strip, range(tiles)))
+    return denoised
+
+# دالة لتحسين جودة صورة MRZ
+def enhance_mrz_image(image, clahe_clip_limit=2.0, clahe_tile_grid=8, denoiser='nlmeans', timings=None,
+                      tiles=1):
+    """تحسين جودة صورة MRZ للقراءة الأفضل
+
+    timings: قاموس اختياري يُملأ بزمن كل مرحلة (grayscale / denoise / clahe / threshold).
+    tiles: عدد الشرائح المتوازية لتقليل الضوضاء (1 = خيط واحد). CLAHE و Otsu
+    يعملان على الصورة كاملة لأن شبكة CLAHE والمدرج التكراري يعتمدان على كل الصورة.
+    """
+    if denoiser not in DENOISERS:
+        raise ValueError(f"Unknown denoiser: {denoiser!r} (expected one of {sorted(DENOISERS)})")
+    img_array = np.asarray(image)
+    
+    # تحويل لرمادي
+    with stage('grayscale', timings, size=img_array.nbytes):
+        if len(img_array.shape) == 3:
+            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+        else:
+            gray = img_array
+    
+    # تطبيق فلتر لتقليل الضوضاء
+    with stage('denoise', timings, size=gray.nbytes):
+        denoised = denoise_tiled(gray, denoiser, tiles)
+    
+    # تحسين التباين
+    with stage('clahe', timings, size=denoised.nbytes):
+        clahe = cv2.createCLAHE(clipLimit=clahe_clip_limit, tileGridSize=(clahe_tile_grid, clahe_tile_grid))
+        enhanced = clahe.apply(denoised)
+    
+    # تطبيق threshold لتحسين الوضوح
+    with stage('threshold', timings, size=enhanced.nbytes):
+        _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    
+    return Image.fromarray(binary)
+
+# دالة لتنسيق التاريخ
+def format_date(date_str):
+    """تحويل التاريخ من YYMMDD إلى DD/MM/YYYY"""
+    if not date_str or len(date_str) != 6:
+        return date_str
+    try:
+        yy = int(date_str[0:2])
+        mm = date_str[2:4]
+        dd = date_str[4:6]
+        current_year = datetime.now().year % 100
+        if yy > current_year + 10:
+            yyyy = 1900 + yy
+        else:
+            yyyy = 2000 + yy
+        return f"{dd}/{mm}/{yyyy}"
+    except:
+        return date_str
+
+# دالة لتنسيق الاسم
+def format_name(names, surname):
+    """تنسيق الاسم الكامل"""
+    if not names and not surname:
+        return "غير متوفر"
+    
+    names_clean = names.replace('<', ' ').strip() if names else ""
+    surname_clean = surname.replace('<', ' ').strip() if surname else ""
+    full_name = f"{names_clean} {surname_clean}".strip()
+    
+    return full_name if full_name else "غير متوفر"
+
+# مُحمّل يمرر المصفوفة مباشرة إلى passporteye بدلاً من فك ترميز ملف
+class ArrayLoader:
+    """بديل عن Loader في passporteye يعيد `img` من مصفوفة NumPy في الذاكرة"""
+
+    __depends__ = []
+    __provides__ = ['img']
+
+    def __init__(self, array):
+        self.array = array
+
+    def __call__(self):
+        img = np.asarray(self.array)
+        # نفس سلوك skimage.io.imread(as_gray=True): الرمادي يبقى كما هو والملون يتحول
+        if img.ndim == 3:
+            from skimage.color import rgb2gray
+            img = rgb2gray(img[..., :3])
+        return img
+
+# خط passporteye الأصلي مع مصدر صورة من الذاكرة
+_array_pipeline_class = None
+
+
+def mrz_array_pipeline(array, extra_cmdline_params=''):
+    """MRZPipeline يقرأ من مصفوفة بدلاً من ملف أو buffer
+
+    passporteye (ومعه scikit-image و scikit-learn) يُستورد عند أول قراءة فقط،
+    لذلك استيراد هذه الوحدة لا يؤخر بدء التطبيق.
+    """
+    global _array_pipeline_class
+    if _array_pipeline_class is None:
+        from passporteye.mrz.image import MRZPipeline
+
+        install_ocr()
+
+        class MRZArrayPipeline(MRZPipeline):
+            def __init__(self, array, extra_cmdline_params=''):
+                super().__init__(None, extra_cmdline_params)
+                self.replace_component('loader', ArrayLoader(array))
+
+        _array_pipeline_class = MRZArrayPipeline
+    return _array_pipeline_class(array, extra_cmdline_params)
+
+# دالة لقراءة MRZ من الصورة المحسنة
+def read_mrz_image(image, repair=True):
+    """تمرير الصورة المحسنة إلى passporteye بدون ترميز PNG وإرجاع القاموس أو None
+
+    repair: محاولة تصحيح النص الخام بأرقام التحقق قبل اعتبار القراءة فاشلة.
+    النتيجة تتضمن ثقة OCR لكل حرف (char_confidences) عند توفرها.
+    """
+    with capture_symbols() as readings:
+        mrz = mrz_array_pipeline(np.asarray(image)).result
+    mrz_data = mrz.to_dict() if mrz is not None else None
+    reading = find_reading(readings, mrz_data.get('raw_text')) if mrz_data else None
+    if mrz_data:
+        mrz_data.update(confidence_fields(mrz_data.get('raw_text'), reading))
+    return repair_mrz_data(mrz_data, reading) if repair else mrz_data
+
+# دالة لإصلاح القراءة الجزئية من النص الخام بدلاً من إعادة OCR
+def repair_mrz_data(mrz_data, reading=None):
+    """تصحيح الحروف الملتبسة في raw_text وإرجاع النتيجة الأعلى درجة
+
+    reading: قراءة OCR الملتقطة لنفس النص؛ إذا بقي رقم تحقق فاشلاً تُعاد قراءة
+    حروفه منخفضة الثقة فقط (reread_low_confidence).
+    """
+    if not mrz_data or not mrz_data.get('raw_text') or is_mrz_valid(mrz_data, 0):
+        return mrz_data
+    method = mrz_data.get('method') or 'direct'
+    repaired = parse_mrz(mrz_data['raw_text'])
+    if repaired is not None and repaired['valid_score'] > mrz_data.get('valid_score', 0):
+        repaired['method'] = method + '|check_digit_repair'
+    else:
+        repaired = mrz_data
+    if reading is not None and not is_mrz_valid(repaired, 0):
+        reread = reread_low_confidence(dict(repaired, raw_text=mrz_data['raw_text']), reading)
+        if reread is not None:
+            reread['method'] = method + '|char_reread'
+            repaired = reread
+    if repaired is mrz_data:
+        return mrz_data
+    repaired['raw_text'] = mrz_data['raw_text']
+    for field in CONFIDENCE_FIELDS:
+        if field in mrz_data:
+            repaired[field] = mrz_data[field]
+    return repaired
+
+# المسار القديم: ترميز PNG ثم فك الترميز داخل passporteye (للمقارنة فقط)
+def read_mrz_png(image):
+    """قراءة MRZ عبر buffer بصيغة PNG كما في الإصدارات السابقة"""
+    from passporteye.mrz.image import MRZPipeline
+    
+    img_buffer = io.BytesIO()
+    Image.fromarray(np.asarray(image)).save(img_buffer, format='PNG')
+    img_buffer.seek(0)
+    
+    mrz = MRZPipeline(img_buffer).result
+    return mrz.to_dict() if mrz is not None else None
+
+# أسطر MRZ مرجعية (مثال ICAO 9303) لقراءة التسخين
+WARM_UP_LINES = (
+    'P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<',
+    'L898902C36UTO7408122F1204159ZE184226B<<<<<10',
+)
+
+# دالة لتسخين خط المعالجة قبل أول صورة حقيقية
+def warm_up():
+    """استيراد passporteye وتشغيل OpenCV و Tesseract مرة على صورة اصطناعية
+
+    يعيد زمن التسخين بالثواني ويسجله في METRICS. فشل OCR (مثلاً بدون Tesseract)
+    لا يوقف التسخين: القراءات الحقيقية تعرض الخطأ نفسه لاحقاً.
+    """
+    started = time.perf_counter()
+    import passporteye.mrz.image as passporteye_image
+    
+    canvas = np.full((140, 1400), 255, dtype=np.uint8)
+    for row, line in enumerate(WARM_UP_LINES):
+        cv2.putText(canvas, line, (20, 55 + row * 55), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    normalized, _ = deskew_mrz(normalize_resolution(canvas))
+    enhanced = np.asarray(enhance_mrz_image(normalized))
+    try:
+        read_mrz_image(enhanced)
+        # passporteye لا يستدعي OCR إذا لم يجد منطقة MRZ، لذلك استدعاء مباشر أيضاً
+        passporteye_image.ocr(enhanced)
+    except Exception:
+        pass
+    
+    elapsed = time.perf_counter() - started
+    METRICS.set_gauge('mrz_warmup_seconds', elapsed)
+    return elapsed
+
+# حجم الصورة بالبايت (PIL أو NumPy) لمدرجات الحجم
+def _nbytes(image):
+    if isinstance(image, np.ndarray):
+        return image.nbytes
+    return image.width * image.height * len(image.getbands())
+
+# دالة للتحقق من صحة نتيجة القراءة
+def is_mrz_valid(mrz_data, min_valid_score=80):
+    """صحيحة إذا تجاوزت درجة الدقة الحد وكل أرقام التحقق valid_* سليمة"""
+    if not mrz_data or mrz_data.get('valid_score', 0) < min_valid_score:
+        return False
+    return all(
+        value for key, value in mrz_data.items()
+        if key.startswith('valid_') and key != 'valid_score'
+    )
+
+# زوايا الدوران الصغيرة المجربة بعد فشل التحسين الكامل
+ADAPTIVE_ROTATIONS = (-2.0, 2.0, -4.0, 4.0)
+
+def _rotate(img_array, angle):
+    height, width = img_array.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2.0, height / 2.0), angle, 1.0)
+    return cv2.warpAffine(img_array, matrix, (width, height), flags=cv2.INTER_LINEAR, borderValue=255)
+
+def _adaptive_passes(gray, params):
+    """مراحل القراءة من الأرخص إلى الأغلى: (الاسم، دالة تنتج الصورة)"""
+    clahe = cv2.createCLAHE(
+        clipLimit=params['clahe_clip_limit'],
+        tileGridSize=(params['clahe_tile_grid'], params['clahe_tile_grid'])
+    )
+    computed = {}
+
+    def full_enhance():
+        # التحسين الكامل يُحسب مرة واحدة ويُعاد استخدامه في مراحل الدوران
+        if 'enhanced' not in computed:
+            computed['enhanced'] = np.asarray(enhance_mrz_image(
+                gray,
+                clahe_clip_limit=params['clahe_clip_limit'],
+                clahe_tile_grid=params['clahe_tile_grid'],
+                denoiser=params['denoiser'],
+                tiles=params['enhance_tiles']
+            ))
+        return computed['enhanced']
+
+    def otsu():
+        _, binary = cv2.threshold(clahe.apply(gray), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return binary
+
+    passes = [
+        ('grayscale', lambda: gray),
+        ('clahe', lambda: clahe.apply(gray)),
+        ('otsu', otsu),
+        (params['denoiser'], full_enhance),
+    ]
+    for angle in ADAPTIVE_ROTATIONS:
+        passes.append((f'rotate({angle:+g})', lambda angle=angle: _rotate(full_enhance(), angle)))
+    return passes
+
+# دالة للقراءة متعددة المراحل مع التوقف المبكر
+def read_mrz_adaptive(image, params=None, metrics=None):
+    """تجربة معالجات متصاعدة التكلفة حتى تنجح أرقام التحقق
+
+    يعيد (بيانات MRZ الأفضل، الصورة المستخدمة). metrics قاموس اختياري يُملأ
+    بعدد المراحل وزمن كل مرحلة ودرجتها.
+    """
+    params = {**PIPELINE_PARAMS, **(params or {})}
+    img_array = np.asarray(image)
+    gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY) if img_array.ndim == 3 else img_array
+    
+    best_data, best_image = None, gray
+    pass_metrics = []
+    for name, produce in _adaptive_passes(gray, params):
+        started = time.perf_counter()
+        candidate = produce()
+        mrz_data = read_mrz_image(candidate)
+        score = mrz_data.get('valid_score', 0) if mrz_data else 0
+        pass_metrics.append({'pass': name, 'ms': (time.perf_counter() - started) * 1000, 'valid_score': score})
+        
+        if mrz_data is not None and (best_data is None or score > best_data.get('valid_score', 0)):
+            best_data, best_image = mrz_data, candidate
+        if is_mrz_valid(mrz_data, params['min_valid_score']):
+            break
+    
+    if metrics is not None:
+        metrics['passes'] = len(pass_metrics)
+        metrics['pass_details'] = pass_metrics
+        metrics['total_ms'] = sum(item['ms'] for item in pass_metrics)
+    return best_data, Image.fromarray(best_image)
+
+# دالة لتشغيل خط المعالجة كاملاً
+def run_pipeline(image, params=None, timings=None, metrics=None, index=None):
+    """قص ثم تحسين ثم قراءة، وإرجاع (المقصوصة، المحسنة، بيانات MRZ)
+
+    timings: قاموس اختياري يُملأ بزمن كل مرحلة بالمللي ثانية.
+    metrics: قاموس اختياري لإحصاءات القراءة متعددة المراحل.
+    index: فهرس MRZIndex اختياري لإرجاع نتيجة الإرسال المكرر بدون OCR.
+    """
+    params = {**PIPELINE_PARAMS, **(params or {})}
+    
+    try:
+        with stage('crop', timings, size=_nbytes(image)):
+            cropped = crop_mrz_region(image, crop_ratio=params['crop_ratio'], detect_mrz=params['detect_mrz'])
+        
+        enhanced, mrz_data = read_cropped_mrz(cropped, params, timings=timings, metrics=metrics, index=index)
+    except Exception:
+        METRICS.record_result(error=True)
+        raise
+    
+    METRICS.record_result(mrz_data)
+    return cropped, enhanced, mrz_data
+
+# دالة لقراءة منطقة MRZ مقصوصة مسبقاً (مشتركة مع وضع الفيديو)
+def read_cropped_mrz(cropped, params=None, timings=None, metrics=None, index=None, normalized=None):
+    """توحيد الدقة وتصحيح الميل ثم التحسين والقراءة، وإرجاع (الصورة المقروءة، بيانات MRZ)
+
+    مع index: الإرسال المكرر يعيد النتيجة المخزنة مباشرة (والصورة None)،
+    والقراءة الجديدة الصحيحة تُخزن في الفهرس.
+    normalized: نسخة cropped بعد توحيد الدقة وتصحيح الميل إن كانت محسوبة مسبقاً.
+    """
+    params = {**PIPELINE_PARAMS, **(params or {})}
+    
+    if index is not None:
+        with stage('dedup', timings, size=_nbytes(cropped)):
+            mrz_data = index.lookup(cropped)
+        if mrz_data is not None:
+            if metrics is not None:
+                metrics.update(passes=0, pass_details=[], total_ms=0.0)
+            return None, mrz_data
+    
+    if normalized is None:
+        with stage('normalize', timings, size=_nbytes(cropped)):
+            normalized = normalize_resolution(cropped, target_char_height=params['target_char_height'])
+        
+        if params['deskew']:
+            with stage('deskew', timings, size=_nbytes(normalized)):
+                normalized, _ = deskew_mrz(normalized)
+    
+    if params['adaptive']:
+        with stage('read_mrz', timings, size=_nbytes(normalized)):
+            mrz_data, enhanced = read_mrz_adaptive(normalized, params, metrics=metrics)
+    else:
+        enhanced = enhance_mrz_image(
+            normalized,
+            clahe_clip_limit=params['clahe_clip_limit'],
+            clahe_tile_grid=params['clahe_tile_grid'],
+            denoiser=params['denoiser'],
+            timings=timings,
+            tiles=params['enhance_tiles']
+        )
+        with stage('read_mrz', timings, size=_nbytes(enhanced)):
+            mrz_data = read_mrz_image(enhanced)
+    
+    if index is not None and mrz_data is not None:
+        with stage('dedup_store', timings):
+            # نفس الوثيقة مقروءة سابقاً بدرجة أعلى (رقم الوثيقة وتاريخ الميلاد صحيحان)
+            mrz_data = index.lookup_document(mrz_data) or mrz_data
+            index.put(cropped, mrz_data)
+    return enhanced, mrz_data
+
+# دالة لتجهيز الحقول المنسقة للعرض والتصدير
+def format_fields(mrz_data):
+    """الاسم والتواريخ ورقم الجواز بعد التنسيق"""
+    return {
+        'full_name': format_name(mrz_data.get('names'), mrz_data.get('surname')),
+        'birth_date': format_date(mrz_data.get('date_of_birth')),
+        'expiry_date': format_date(mrz_data.get('expiration_date')),
+        'passport_number': mrz_data.get('number', '').replace('<', '').strip(),
+    }
@@ -0,0 +1,233 @@
+"""واجهات OCR بديلة لـ passporteye
+
+passporteye يستدعي `ocr()` لكل منطقة، وهذه الدالة تشغّل عملية tesseract جديدة
+وتكتب ملفات مؤقتة في كل مرة. الواجهة 'pool' تحتفظ بمحركات Tesseract جاهزة داخل
+العملية (عبر tesserocr) وتمرر الصور من الذاكرة مباشرة.
+
+داخل `capture_symbols()` يُسجل لكل استدعاء OCR نصه مع كل حرف وثقته وصندوقه
+من نفس تشغيل Tesseract (hOCR لواجهة 'spawn'، و ResultIterator لواجهة 'pool').
+"""
+import html
+import os
+import queue
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+
+# الحروف المسموحة في MRZ (نفس إعدادات passporteye)
+MRZ_WHITELIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789><'
+
+# متغيرات Tesseract لوضع MRZ (تُضبط عند تهيئة المحرك)
+MRZ_VARIABLES = {
+    'tessedit_char_whitelist': MRZ_WHITELIST,
+    'load_system_dawg': 'F',
+    'load_freq_dawg': 'F',
+}
+
+OCR_BACKENDS = ('spawn', 'pool')
+
+_active_backend = 'spawn'
+_active_pool = None
+_backend_lock = threading.Lock()
+
+# القراءات الملتقطة في الخيط الحالي (None خارج capture_symbols)
+_capture = threading.local()
+
+# حروف hOCR مع hocr_char_boxes=1: <span class='ocrx_cinfo' title='x_bboxes x0 y0 x1 y1; x_conf 97.5'>C</span>
+_HOCR_LINE = re.compile(r"class=['\"]ocr_(?:line|textfloat|header|caption)['\"]")
+_HOCR_CHAR = re.compile(
+    r"class=['\"]ocrx_cinfo['\"] title=['\"]x_bboxes (\d+) (\d+) (\d+) (\d+); x_conf ([\d.]+)['\"]>([^<]*)</span>"
+)
+
+
+def _to_uint8(img):
+    """نفس تحويل passporteye للصور العشرية [0, 1] إلى uint8"""
+    if str(img.dtype).startswith('float') and np.nanmin(img) >= 0 and np.nanmax(img) <= 1:
+        img = img.astype(np.float64) * (np.power(2.0, 8) - 1) + 0.499999999
+    return np.ascontiguousarray(img.astype(np.uint8))
+
+
+def _mrz_config(psm=6):
+    return (f"--psm {psm} -c tessedit_char_whitelist={MRZ_WHITELIST}"
+            " -c load_system_dawg=F -c load_freq_dawg=F")
+
+
+def parse_hocr_symbols(hocr):
+    """حروف كل سطر في hOCR كقائمة (الحرف، الثقة، (x0, y0, x1, y1))"""
+    lines = []
+    for chunk in _HOCR_LINE.split(hocr)[1:]:
+        lines.append([
+            (html.unescape(char), float(conf), (int(x0), int(y0), int(x1), int(y1)))
+            for x0, y0, x1, y1, conf, char in _HOCR_CHAR.findall(chunk)
+        ])
+    return lines
+
+
+def spawn_ocr_symbols(img, psm=6):
+    """تشغيل tesseract مرة واحدة بمخرجات txt و hOCR وإرجاع (النص، حروف كل سطر)
+
+    النص مطابق لما يعيده passporteye.util.ocr.ocr لنفس الصورة.
+    """
+    from PIL import Image
+    from pytesseract import pytesseract
+
+    with tempfile.TemporaryDirectory(prefix='tess_') as tmp:
+        input_path = os.path.join(tmp, 'input.bmp')
+        output_base = os.path.join(tmp, 'output')
+        Image.fromarray(_to_uint8(img)).save(input_path)
+        pytesseract.run_tesseract(
+            input_path, output_base, 'txt hocr', lang=None, config=_mrz_config(psm) + ' -c hocr_char_boxes=1'
+        )
+        with open(output_base + '.txt', encoding='utf-8') as f:
+            text = f.read().strip()
+        with open(output_base + '.hocr', encoding='utf-8') as f:
+            lines = parse_hocr_symbols(f.read())
+    return text, lines
+
+
+class TesseractPool:
+    """مجموعة محركات tesserocr جاهزة تُستعار لكل استدعاء OCR"""
+
+    def __init__(self, size=None, lang='eng', tessdata_path=None):
+        try:
+            import tesserocr
+        except ImportError:
+            raise RuntimeError("The 'pool' OCR backend requires tesserocr (pip install tesserocr)") from None
+
+        self.size = size or os.cpu_count() or 1
+        self._engines = queue.Queue()
+        kwargs = {'lang': lang, 'psm': tesserocr.PSM.SINGLE_BLOCK, 'variables': MRZ_VARIABLES}
+        if tessdata_path:
+            kwargs['path'] = tessdata_path
+        for _ in range(self.size):
+            self._engines.put(tesserocr.PyTessBaseAPI(**kwargs))
+
+    def ocr(self, img, mrz_mode=True, extra_cmdline_params=''):
+        """نفس توقيع passporteye.util.ocr.ocr"""
+        # المحركات مهيأة لوضع MRZ فقط؛ أي إعدادات أخرى تمر عبر tesseract العادي
+        if not mrz_mode or extra_cmdline_params:
+            from passporteye.util.ocr import ocr as spawn_ocr
+            return spawn_ocr(img, mrz_mode=mrz_mode, extra_cmdline_params=extra_cmdline_params)
+        if img is None or img.shape[-1] == 0:
+            return ''
+
+        gray = _to_uint8(img)
+        if gray.ndim == 3:
+            gray = np.ascontiguousarray(gray[..., 0])
+        height, width = gray.shape
+
+        engine = self._engines.get()
+        try:
+            engine.SetImageBytes(gray.tobytes(), width, height, 1, width)
+            return engine.GetUTF8Text().strip()
+        finally:
+            self._engines.put(engine)
+
+    def ocr_symbols(self, img, psm=None):
+        """(النص، حروف كل سطر) من تعرف واحد: الحرف والثقة والصندوق لكل رمز"""
+        import tesserocr
+
+        gray = _to_uint8(img)
+        if gray.ndim == 3:
+            gray = np.ascontiguousarray(gray[..., 0])
+        height, width = gray.shape
+
+        level = tesserocr.RIL.SYMBOL
+        lines = []
+        engine = self._engines.get()
+        try:
+            if psm is not None:
+                engine.SetPageSegMode(psm)
+            engine.SetImageBytes(gray.tobytes(), width, height, 1, width)
+            engine.Recognize()
+            text = engine.GetUTF8Text().strip()
+            iterator = engine.GetIterator()
+            for symbol in tesserocr.iterate_level(iterator, level):
+                char = symbol.GetUTF8Text(level)
+                if not char:
+                    continue
+                if not lines or symbol.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    lines.append([])
+                lines[-1].append((char, symbol.Confidence(level), symbol.BoundingBox(level)))
+        finally:
+            if psm is not None:
+                engine.SetPageSegMode(tesserocr.PSM.SINGLE_BLOCK)
+            self._engines.put(engine)
+        return text, lines
+
+    def close(self):
+        while not self._engines.empty():
+            self._engines.get_nowait().End()
+
+
+def set_ocr_backend(name, pool_size=None, tessdata_path=None):
+    """اختيار واجهة OCR التي يستخدمها passporteye في هذه العملية"""
+    global _active_backend, _active_pool
+    if name not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {name!r} (expected one of {OCR_BACKENDS})")
+
+    with _backend_lock:
+        if name == 'spawn' and _active_backend == 'spawn':
+            return
+        if name == 'pool' and _active_pool is not None and pool_size in (None, _active_pool.size):
+            return
+        if _active_pool is not None:
+            _active_pool.close()
+            _active_pool = None
+
+        if name == 'pool':
+            _active_pool = TesseractPool(size=pool_size, tessdata_path=tessdata_path)
+        _active_backend = name
+    # passporteye يُستورد هنا فقط عند تغيير الواجهة (الواجهة الافتراضية لا تحتاجه)
+    install_ocr()
+
+
+def install_ocr():
+    """توجيه استدعاءات OCR في passporteye إلى ocr() في هذه الوحدة"""
+    import passporteye.mrz.image as passporteye_image
+
+    passporteye_image.ocr = ocr
+
+
+def ocr(img, mrz_mode=True, extra_cmdline_params=''):
+    """نفس توقيع passporteye.util.ocr.ocr عبر الواجهة النشطة، مع تسجيل الحروف داخل capture_symbols"""
+    readings = getattr(_capture, 'readings', None)
+    if readings is None or not mrz_mode or extra_cmdline_params or img is None or img.shape[-1] == 0:
+        if _active_pool is not None:
+            return _active_pool.ocr(img, mrz_mode=mrz_mode, extra_cmdline_params=extra_cmdline_params)
+        from passporteye.util.ocr import ocr as spawn_ocr
+        return spawn_ocr(img, mrz_mode=mrz_mode, extra_cmdline_params=extra_cmdline_params)
+
+    text, lines = _active_pool.ocr_symbols(img) if _active_pool is not None else spawn_ocr_symbols(img)
+    readings.append({'image': img, 'text': text, 'lines': lines})
+    return text
+
+
+def ocr_line_symbols(img):
+    """قراءة صورة بسطر واحد في وضع MRZ وإرجاع (النص، حروف كل سطر)"""
+    if _active_pool is not None:
+        import tesserocr
+        return _active_pool.ocr_symbols(img, psm=tesserocr.PSM.SINGLE_LINE)
+    return spawn_ocr_symbols(img, psm=7)
+
+
+@contextmanager
+def capture_symbols():
+    """تسجيل قراءات OCR لوضع MRZ في هذا الخيط: قائمة {'image', 'text', 'lines'}
+
+    lines حروف كل سطر كـ (الحرف، الثقة 0-100، (x0, y0, x1, y1)) بإحداثيات image.
+    """
+    previous = getattr(_capture, 'readings', None)
+    _capture.readings = readings = []
+    try:
+        yield readings
+    finally:
+        _capture.readings = previous
+
+
+def get_ocr_backend():
+    return _active_backend
@@ -0,0 +1,34 @@
+"""صور مصغرة مضغوطة للعرض في الواجهة بدلاً من إرسال الصور بالدقة الكاملة"""
+import io
+
+import cv2
+import numpy as np
+from PIL import Image, features
+
+
+# أطول ضلع للصورة المصغرة وجودة الضغط
+PREVIEW_MAX_SIDE = 800
+PREVIEW_QUALITY = 80
+
+# WebP أصغر من JPEG لنصوص MRZ عالية التباين، و JPEG إذا لم يُبنَ Pillow بدعم WebP
+PREVIEW_FORMAT = 'WEBP' if features.check('webp') else 'JPEG'
+
+
+def make_preview(image, max_side=PREVIEW_MAX_SIDE, quality=PREVIEW_QUALITY, image_format=PREVIEW_FORMAT):
+    """ضغط نسخة مصغرة من الصورة (PIL أو NumPy) وإرجاع البايتات"""
+    if isinstance(image, np.ndarray):
+        # المصفوفة تُصغر أولاً حتى لا تُنسخ بالحجم الكامل إلى Pillow
+        height, width = image.shape[:2]
+        if max(width, height) > max_side:
+            scale = max_side / float(max(width, height))
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        image = Image.fromarray(image)
+    preview = image if image.mode in ('RGB', 'L') else image.convert('RGB')
+    if max(preview.size) > max_side:
+        # thumbnail يعدل الصورة في مكانها، لذلك نعمل على نسخة مصغرة جديدة
+        scale = max_side / float(max(preview.size))
+        size = (max(1, round(preview.width * scale)), max(1, round(preview.height * scale)))
+        preview = preview.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    buffer = io.BytesIO()
+    preview.save(buffer, format=image_format, quality=quality)
+    return buffer.getvalue()
@@ -0,0 +1,100 @@
+"""رموز حالة HTTP لخدمة /mrz (خط المعالجة مستبدل، والعمال خيوط بدلاً من عمليات)"""
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+from starlette.testclient import TestClient
+
+import api_server
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), 'white').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """run_pipeline بديل: state['result'] أو state['error']، وينتظر state['release'] إن وُجد"""
+    state = {'result': {'valid_score': 100, 'number': 'L898902C3'}, 'error': None, 'release': None}
+
+    def fake_run_pipeline(image, params=None, timings=None, metrics=None, index=None):
+        if state['release'] is not None:
+            state['release'].wait(5)
+        if state['error'] is not None:
+            raise state['error']
+        return None, None, state['result']
+
+    monkeypatch.setattr(api_server, 'run_pipeline', fake_run_pipeline)
+    monkeypatch.setattr(api_server, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    return state
+
+
+def client(**options):
+    return TestClient(api_server.create_app(workers=1, warm=False, **options))
+
+
+def test_returns_mrz_data(pipeline):
+    with client() as api:
+        response = api.post('/mrz', content=png_bytes(), headers={'Content-Type': 'image/png'})
+        assert response.status_code == 200
+        assert response.json()['number'] == 'L898902C3'
+        response = api.post('/mrz', files={'file': ('passport.png', png_bytes(), 'image/png')})
+        assert response.status_code == 200
+
+
+def test_empty_body_is_400(pipeline):
+    with client() as api:
+        assert api.post('/mrz', content=b'').status_code == 400
+        assert api.post('/mrz', files={'other': ('a.png', png_bytes(), 'image/png')}).status_code == 400
+
+
+def test_undecodable_image_is_422(pipeline):
+    with client() as api:
+        response = api.post('/mrz', content=b'not an image')
+        assert response.status_code == 422
+        assert response.json()['error'].startswith('cannot decode image')
+
+
+def test_image_without_mrz_is_422(pipeline):
+    pipeline['result'] = None
+    with client() as api:
+        response = api.post('/mrz', content=png_bytes())
+        assert response.status_code == 422
+        assert response.json() == {'error': 'MRZ not found'}
+
+
+def test_full_executor_is_429(pipeline):
+    release = threading.Event()
+    with client(queue_size=0) as api:
+        busy = api.app.state.executor.try_submit(release.wait, 5)
+        try:
+            response = api.post('/mrz', content=png_bytes())
+            assert response.status_code == 429
+            assert response.headers['Retry-After'] == '1'
+        finally:
+            release.set()
+        busy.result()
+        assert api.post('/mrz', content=png_bytes()).status_code == 200
+
+
+def test_timeout_is_504(pipeline):
+    pipeline['release'] = threading.Event()
+    with client(timeout=0.2) as api:
+        try:
+            assert api.post('/mrz', content=png_bytes()).status_code == 504
+        finally:
+            pipeline['release'].set()
+
+
+def test_service_failure_is_500_and_logged(pipeline, caplog):
+    pipeline['error'] = FileNotFoundError('tesseract is not installed')
+    with client() as api, caplog.at_level(logging.ERROR, logger='api_server'):
+        response = api.post('/mrz', content=png_bytes())
+    assert response.status_code == 500
+    assert response.json() == {'error': 'internal error'}
+    assert 'tesseract is not installed' in caplog.text
@@ -0,0 +1,31 @@
+"""تقليل الضوضاء على شرائح متداخلة مطابق بت ببت لمعالجة الصورة كاملة"""
+import cv2
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate_sample
+from mrz_pipeline import DENOISERS, MIN_TILE_WIDTH, crop_mrz_region, denoise_tiled
+
+
+@pytest.fixture(scope='module')
+def gray():
+    image, _ = generate_sample('TD3', 2400, seed=0, noise=4.0)
+    cropped = np.asarray(crop_mrz_region(image))
+    return cv2.cvtColor(cropped, cv2.COLOR_RGB2GRAY)
+
+
+@pytest.mark.parametrize('denoiser', sorted(DENOISERS))
+@pytest.mark.parametrize('tiles', [2, 3, 5, 8])
+def test_tiled_matches_whole_image(gray, denoiser, tiles):
+    assert gray.shape[1] // MIN_TILE_WIDTH >= tiles
+    expected = DENOISERS[denoiser](gray)
+    # المرشح يغير الصورة فعلاً (NL-means لا يغير شيئاً عند ضوضاء أعلى بكثير من h)
+    assert denoiser == 'none' or not np.array_equal(expected, gray)
+    result = denoise_tiled(gray, denoiser, tiles=tiles)
+    assert result.dtype == expected.dtype
+    assert np.array_equal(result, expected)
+
+
+def test_narrow_image_is_not_split(gray):
+    narrow = np.ascontiguousarray(gray[:, :MIN_TILE_WIDTH])
+    assert np.array_equal(denoise_tiled(narrow, 'median', tiles=8), DENOISERS['median'](narrow))
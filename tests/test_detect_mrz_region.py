@@ -0,0 +1,54 @@
+"""كشف MRZ في وثيقة صغيرة بعيدة عن مركز الإطار (تصوير باليد)"""
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import CAP_HEIGHT_MM, CHAR_PITCH_MM, DOCUMENT_FORMATS, LINE_PITCH_MM
+from benchmarks.synthetic import mrz_lines, random_identity, render_document
+from mrz_pipeline import detect_mrz_region
+
+
+def small_document_frame(doc_type, seed, fraction=0.45, frame_width=1600):
+    """الوثيقة بعرض fraction من الإطار في موضع عشوائي، وإرجاع (الإطار، صندوق MRZ الحقيقي)"""
+    rng = random.Random(seed)
+    lines, _ = mrz_lines(doc_type, random_identity(rng))
+    spec = DOCUMENT_FORMATS[doc_type]
+    document = render_document(lines, doc_type, int(frame_width * fraction))
+    doc_h, doc_w = document.shape
+
+    frame_h = int(frame_width * 0.75)
+    frame = np.random.default_rng(seed).normal(120, 25, (frame_h, frame_width)).clip(0, 255).astype(np.uint8)
+    x, y = rng.randint(0, frame_width - doc_w), rng.randint(0, frame_h - doc_h)
+    frame[y:y + doc_h, x:x + doc_w] = document
+
+    px_per_mm = doc_w / spec['size_mm'][0]
+    mrz_x = x + (doc_w - CHAR_PITCH_MM * px_per_mm * spec['chars']) / 2
+    mrz_y = y + doc_h - LINE_PITCH_MM * px_per_mm * (spec['lines'] + 0.6)
+    truth = (
+        mrz_x, mrz_y,
+        mrz_x + CHAR_PITCH_MM * px_per_mm * spec['chars'],
+        mrz_y + LINE_PITCH_MM * px_per_mm * (spec['lines'] - 1) + CAP_HEIGHT_MM * px_per_mm,
+    )
+    return np.stack([frame] * 3, axis=-1), truth
+
+
+@pytest.mark.parametrize('doc_type', ['TD1', 'TD2', 'TD3'])
+@pytest.mark.parametrize('seed', range(3))
+def test_detects_small_off_centre_document(doc_type, seed):
+    frame, (x0, y0, x1, y1) = small_document_frame(doc_type, seed)
+    box = detect_mrz_region(frame)
+    assert box is not None
+
+    x, y, w, h = box
+    overlap_w = max(0.0, min(x + w, x1) - max(x, x0))
+    overlap_h = max(0.0, min(y + h, y1) - max(y, y0))
+    mrz_area = (x1 - x0) * (y1 - y0)
+    # الصندوق يغطي MRZ ولا يمتد إلى كامل عرض الإطار (القص الاحتياطي)
+    assert overlap_w * overlap_h >= 0.85 * mrz_area
+    assert w * h <= 2.5 * mrz_area
+
+
+def test_rejects_frame_without_document():
+    frame = np.random.default_rng(0).normal(120, 25, (1200, 1600, 3)).clip(0, 255).astype(np.uint8)
+    assert detect_mrz_region(frame) is None
@@ -0,0 +1,24 @@
+"""format_dates (المصدّر العمودي) تطابق format_date لكل قيمة"""
+import pytest
+
+from mrz_export import format_dates
+from mrz_pipeline import format_date
+
+
+DATES = [
+    '770612', '000101', '991231', '350229',
+    # int() في format_date يقبل المسافات والإشارات والأرقام غير ASCII في السنة
+    ' 7<6 ', ' 77<6 ', ' 70612', '+70612', '-70612', '٧٧0612',
+    # قيم لا تُحول
+    'AB0612', '7A0612', '77061', '7706123', '', None, '<<<<<<',
+]
+
+
+@pytest.mark.parametrize('date', DATES)
+def test_matches_format_date(date):
+    assert format_dates([date]) == [format_date(date)]
+
+
+def test_column_order_and_mixed_values():
+    assert format_dates(DATES) == [format_date(date) for date in DATES]
+    assert format_dates([]) == []
@@ -0,0 +1,50 @@
+"""قراءة ملفات TIFF صفحة بصفحة: الصفحة التي يفشل فيها الكشف تُقص من أسفلها ولا تختفي"""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import ingest
+
+
+def tiff_bytes(pages):
+    buffer = io.BytesIO()
+    frames = [Image.fromarray(np.full((400, 300, 3), shade, np.uint8)) for shade in pages]
+    frames[0].save(buffer, 'TIFF', save_all=True, append_images=frames[1:])
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """الكشف يفشل في الصفحة الثانية؛ read_cropped_mrz يسجل حجم المنطقة المقصوصة"""
+    crops = []
+
+    def fake_detect(page):
+        return (10, 300, 280, 80) if page[0, 0, 0] == 200 else None
+
+    def fake_read(cropped, params=None, timings=None, metrics=None, index=None):
+        crops.append(np.asarray(cropped).shape[:2])
+        return cropped, {'valid_score': 100}
+
+    monkeypatch.setattr(ingest, 'detect_mrz_region', fake_detect)
+    monkeypatch.setattr(ingest, 'read_cropped_mrz', fake_read)
+    return crops
+
+
+def test_page_without_detected_mrz_falls_back_to_bottom_crop(reads):
+    pages = list(ingest.read_pages(tiff_bytes([200, 100]), {'crop_ratio': 0.35}))
+
+    assert [page['page'] for page in pages] == [0, 1]
+    assert not any(page['skipped'] for page in pages)
+    assert all(page['mrz_data'] for page in pages)
+    # الصفحة الأولى: صندوق الكشف؛ الثانية: أسفل الصفحة بنسبة crop_ratio وكامل العرض
+    assert reads == [(80, 280), (int(400 * 0.35), 300)]
+
+
+def test_skipped_pages_are_reported(reads):
+    pages = list(ingest.read_pages(tiff_bytes([200, 100]), skip_without_mrz=True))
+
+    assert [(page['page'], page['skipped']) for page in pages] == [(0, False), (1, True)]
+    assert pages[1]['mrz_data'] is None
+    assert len(reads) == 1
@@ -0,0 +1,63 @@
+"""ذاكرة النتائج المؤقتة: الإخلاء حسب الحجم بترتيب LRU وعدادات الإصابة"""
+import numpy as np
+
+from mrz_cache import PipelineCache
+
+
+def block(kib):
+    return np.zeros(kib * 1024, np.uint8)
+
+
+def test_key_depends_on_image_and_params():
+    key = PipelineCache.make_key(b'image', {'crop_ratio': 0.3, 'deskew': True})
+    assert key == PipelineCache.make_key(b'image', {'deskew': True, 'crop_ratio': 0.3})
+    assert key != PipelineCache.make_key(b'other', {'crop_ratio': 0.3, 'deskew': True})
+    assert key != PipelineCache.make_key(b'image', {'crop_ratio': 0.4, 'deskew': True})
+
+
+def test_hits_and_misses_are_counted():
+    cache = PipelineCache(max_bytes=1024 * 1024)
+    assert cache.get('a') is None
+    cache.put('a', cropped=block(1))
+    assert cache.get('a')['cropped'].nbytes == 1024
+    assert cache.get('a') is not None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['bytes']) == (2, 1, 1, 1024)
+
+
+def test_put_merges_fields_and_get_returns_a_copy():
+    cache = PipelineCache(max_bytes=1024 * 1024)
+    cache.put('a', cropped=block(1))
+    cache.put('a', mrz_data={'valid_score': 100})
+    entry = cache.get('a')
+    assert set(entry) == {'cropped', 'mrz_data'}
+    entry['extra'] = 1
+    assert 'extra' not in cache.get('a')
+
+
+def test_evicts_least_recently_used_by_byte_budget():
+    cache = PipelineCache(max_bytes=3 * 1024)
+    cache.put('a', cropped=block(1))
+    cache.put('b', cropped=block(1))
+    cache.put('c', cropped=block(1))
+    cache.get('a')                       # 'b' أصبح الأقدم استخداماً
+    cache.put('d', cropped=block(1))
+
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in 'acd')
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['bytes'] <= stats['max_bytes']
+
+
+def test_growing_entry_evicts_others_and_oversized_entry_is_dropped():
+    cache = PipelineCache(max_bytes=3 * 1024)
+    cache.put('a', cropped=block(1))
+    cache.put('b', cropped=block(1))
+    cache.put('b', enhanced=block(1), normalized=block(1))   # 'b' بحجم 3 KiB
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] == 3 * 1024
+
+    cache.put('b', read_image=block(1))                        # 4 KiB > الحد
+    assert cache.get('b') is None
+    assert cache.stats()['bytes'] == 0
@@ -0,0 +1,117 @@
+"""ثقة الحروف ومطابقتها لأسطر MRZ، وإعادة قراءة الحروف الضعيفة في الحقول الفاشلة فقط"""
+import numpy as np
+import pytest
+
+import ocr_backends
+from mrz_confidence import align_symbols, confidence_fields, find_reading, reread_low_confidence
+from mrz_parser import parse_mrz
+
+
+LINE1 = "P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<"
+LINE2 = "L898902C36UTO7408122F1204159ZE184226B<<<<<10"
+# '0' في رقم الجواز مقروء 'X' (ليس حرفاً ملتبساً، فالمحلل لا يصححه)
+MISREAD = LINE2[:5] + 'X' + LINE2[6:]
+CHAR_W, LINE_H = 20, 30
+
+
+def make_reading(lines, low=None, noise_line=True):
+    """قراءة OCR مصطنعة: ثقة 95 لكل حرف و low {(السطر، الموضع): الثقة}"""
+    low = low or {}
+    symbol_lines = []
+    if noise_line:
+        # سطر قصير من النص المطبوع فوق MRZ يُهمل في المطابقة
+        symbol_lines.append([(char, 60.0, (0, 0, 1, 1)) for char in 'PASSPORT'])
+    for row, line in enumerate(lines):
+        symbols = []
+        for col, char in enumerate(line):
+            box = (col * CHAR_W, row * LINE_H, (col + 1) * CHAR_W - 2, (row + 1) * LINE_H - 4)
+            symbols.append((char, low.get((row, col), 95.0), box))
+        # مسافة يقرؤها Tesseract كحرف فارغ
+        symbols.insert(10, (' ', 0.0, (0, 0, 0, 0)))
+        symbol_lines.append(symbols)
+    image = np.full((LINE_H * len(lines), CHAR_W * len(lines[0])), 200, np.uint8)
+    return {'image': image, 'text': '\n'.join(lines), 'lines': symbol_lines}
+
+
+def mrz_data_for(lines):
+    raw_text = '\n'.join(lines)
+    return {**parse_mrz(raw_text), 'raw_text': raw_text}
+
+
+@pytest.fixture
+def line_ocr(monkeypatch):
+    """بديل spawn_ocr_symbols: يسجل الاستدعاءات ويعيد state['text']"""
+    state = {'text': '', 'calls': []}
+
+    def fake(img, psm=6):
+        state['calls'].append({'psm': psm, 'shape': img.shape})
+        return state['text'], []
+
+    monkeypatch.setattr(ocr_backends, 'spawn_ocr_symbols', fake)
+    return state
+
+
+def test_find_reading_returns_last_match():
+    first, second = make_reading([LINE1, LINE2]), make_reading([LINE1, LINE2])
+    other = make_reading([LINE1, MISREAD])
+    assert find_reading([first, other, second], first['text']) is second
+    assert find_reading([first], MISREAD) is None
+    assert find_reading([first], '') is None
+
+
+def test_align_symbols_drops_spaces_and_short_lines():
+    mrz_type, lines, symbols = align_symbols('\n'.join([LINE1, LINE2]), make_reading([LINE1, LINE2])['lines'])
+    assert mrz_type == 'TD3'
+    assert lines == [LINE1, LINE2]
+    assert [len(line) for line in symbols] == [44, 44]
+    assert ''.join(symbol[0] for symbol in symbols[1]) == LINE2
+
+
+def test_align_symbols_rejects_mismatched_text():
+    reading = make_reading([LINE1, LINE2])
+    assert align_symbols('\n'.join([LINE1, MISREAD]), reading['lines']) is None
+
+
+def test_confidence_fields_per_line_and_minimum():
+    reading = make_reading([LINE1, LINE2], low={(0, 3): 41.6, (1, 20): 70.0})
+    fields = confidence_fields(reading['text'], reading)
+    assert len(fields['char_confidences']) == 2
+    assert fields['char_confidences'][0][3] == 42
+    assert fields['char_confidences'][1][20] == 70
+    assert fields['min_confidence'] == 42
+    assert confidence_fields(reading['text'], None) == {}
+
+
+def test_reread_fixes_failing_field_with_one_line_ocr(line_ocr):
+    # حرف ضعيف في الحقل الفاشل وآخر في الاسم (حقل بلا رقم تحقق فاشل) لا يُعاد
+    reading = make_reading([LINE1, MISREAD], low={(1, 5): 35.0, (0, 8): 40.0})
+    mrz_data = mrz_data_for([LINE1, MISREAD])
+    assert not mrz_data['valid_number']
+    line_ocr['text'] = '0'
+
+    repaired = reread_low_confidence(mrz_data, reading)
+    assert [call['psm'] for call in line_ocr['calls']] == [7]
+    assert repaired['number'] == 'L898902C3'
+    assert repaired['valid_score'] == 100
+    assert repaired['char_rereads'] == [{'line': 1, 'index': 5, 'from': 'X', 'to': '0', 'confidence': 35}]
+
+
+@pytest.mark.parametrize('reread', ['X', '7', '00'])
+def test_reread_rejected_unless_check_digits_improve(line_ocr, reread):
+    # نفس الحرف، أو حرف لا ينجح رقم التحقق به، أو عدد حروف مختلف
+    reading = make_reading([LINE1, MISREAD], low={(1, 5): 35.0})
+    line_ocr['text'] = reread
+    assert reread_low_confidence(mrz_data_for([LINE1, MISREAD]), reading) is None
+    assert len(line_ocr['calls']) == 1
+
+
+def test_reread_skipped_when_weak_chars_are_confident_enough(line_ocr):
+    reading = make_reading([LINE1, MISREAD], low={(1, 5): 85.0})
+    assert reread_low_confidence(mrz_data_for([LINE1, MISREAD]), reading) is None
+    assert line_ocr['calls'] == []
+
+
+def test_reread_skipped_when_all_checks_pass(line_ocr):
+    reading = make_reading([LINE1, LINE2], low={(1, 5): 10.0})
+    assert reread_low_confidence(mrz_data_for([LINE1, LINE2]), reading) is None
+    assert line_ocr['calls'] == []
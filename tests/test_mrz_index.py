@@ -0,0 +1,111 @@
+"""فهرس الإرسال المكرر: الحقول المخزنة والملح والتحقق من الإصابة القريبة"""
+import io
+import json
+import os
+import random
+import sqlite3
+import stat
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import mrz_index
+from benchmarks.synthetic import mrz_lines, random_identity, render_document
+from mrz_index import IDENTITY_FIELDS, MRZIndex
+from mrz_parser import parse_mrz
+from mrz_pipeline import crop_mrz_region
+
+
+def passport(seed):
+    lines, _ = mrz_lines('TD3', random_identity(random.Random(seed)))
+    cropped = np.asarray(crop_mrz_region(Image.fromarray(render_document(lines, 'TD3', 1400)).convert('RGB')))
+    return '\n'.join(lines), cropped
+
+
+def jpeg(image, quality=70):
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, 'JPEG', quality=quality)
+    return np.asarray(Image.open(buffer).convert('RGB'))
+
+
+def stored_rows(path):
+    with sqlite3.connect(path) as conn:
+        return [json.loads(row[0]) for row in conn.execute('SELECT mrz_data FROM documents')]
+
+
+def test_default_stores_no_identity_fields(tmp_path):
+    path = str(tmp_path / 'index.sqlite3')
+    text, cropped = passport(0)
+    index = MRZIndex(path)
+    assert index.put(cropped, parse_mrz(text))
+
+    [stored] = stored_rows(path)
+    assert stored['valid_score'] == 100
+    assert not set(stored) & set(IDENTITY_FIELDS)
+    hit = index.lookup(cropped)
+    assert hit['method'] == 'dedup' and 'surname' not in hit
+
+
+def test_identity_fields_need_explicit_opt_in(tmp_path, monkeypatch):
+    monkeypatch.setenv('MRZ_INDEX_FIELDS', 'surname,names')
+    path = str(tmp_path / 'index.sqlite3')
+    text, cropped = passport(0)
+    index = MRZIndex(path, stored_fields=mrz_index.stored_fields_from_env())
+    index.put(cropped, parse_mrz(text))
+
+    [stored] = stored_rows(path)
+    assert stored['surname'] == parse_mrz(text)['surname']
+    assert 'number' not in stored and 'date_of_birth' not in stored
+
+
+def test_partial_record_does_not_replace_full_read(tmp_path):
+    text, cropped = passport(0)
+    index = MRZIndex(str(tmp_path / 'index.sqlite3'))
+    index.put(cropped, parse_mrz(text))
+    weaker = {**parse_mrz(text), 'valid_score': 80}
+    assert index.lookup_document(weaker) is None
+
+    full = MRZIndex(str(tmp_path / 'full.sqlite3'), stored_fields=mrz_index.DEFAULT_STORED_FIELDS + IDENTITY_FIELDS)
+    full.put(cropped, parse_mrz(text))
+    assert full.lookup_document(weaker)['valid_score'] == 100
+
+
+def test_salt_is_kept_outside_the_database(tmp_path):
+    path = str(tmp_path / 'index.sqlite3')
+    key = MRZIndex(path).document_key(parse_mrz(passport(0)[0]))
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM meta WHERE key = 'salt'").fetchone()[0] == 0
+    assert stat.S_IMODE(os.stat(path + '.salt').st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    # المفتاح ثابت عند إعادة فتح الفهرس
+    assert MRZIndex(path).document_key(parse_mrz(passport(0)[0])) == key
+
+
+def test_legacy_salt_moves_out_of_the_database(tmp_path):
+    path = str(tmp_path / 'index.sqlite3')
+    with sqlite3.connect(path) as conn:
+        conn.executescript(mrz_index.SCHEMA)
+        conn.execute("INSERT INTO meta (key, value) VALUES ('salt', 'legacy')")
+
+    index = MRZIndex(path)
+    with open(path + '.salt') as f:
+        assert f.read() == 'legacy'
+    with sqlite3.connect(path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM meta').fetchone()[0] == 0
+    legacy = MRZIndex(str(tmp_path / 'other.sqlite3'), salt='legacy')
+    mrz_data = parse_mrz(passport(0)[0])
+    assert index.document_key(mrz_data) == legacy.document_key(mrz_data)
+
+
+@pytest.mark.parametrize('read_seed, expected', [(0, True), (1, False), (None, False)])
+def test_near_hit_is_verified_by_document_key(tmp_path, monkeypatch, read_seed, expected):
+    text, cropped = passport(0)
+    # قراءة OCR الواحدة للتحقق: نفس الجواز، أو جواز آخر، أو نص غير مقروء
+    read_text = passport(read_seed)[0] if read_seed is not None else 'unreadable'
+    monkeypatch.setattr(mrz_index, 'ocr', lambda image: read_text)
+
+    index = MRZIndex(str(tmp_path / 'index.sqlite3'))
+    index.put(cropped, parse_mrz(text))
+    assert (index.lookup(jpeg(cropped)) is not None) == expected
@@ -0,0 +1,127 @@
+"""طابور المهام: الأولوية والإلغاء والملفات الفاشلة والقراءات التفاعلية في الذاكرة"""
+import os
+import sqlite3
+import stat
+import threading
+import time
+
+import pytest
+
+import mrz_jobs
+from mrz_jobs import PRIORITY_BULK, PRIORITY_INTERACTIVE, JobQueue
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    """طابور بعامل واحد؛ الملف 'block' ينتظر queue.gate، والملفات 'bad*' تفشل"""
+    order = []
+    gate = threading.Event()
+
+    def fake_process_upload(name, data, params=None, index=None):
+        order.append(name)
+        if name == 'block':
+            gate.wait(5)
+        if name.startswith('bad'):
+            raise ValueError(f"cannot decode {name}")
+        return [{'page': 0, 'mrz_data': {'name': name, 'size': len(data)}}]
+
+    def fake_process_read(cropped, normalized, params=None, index=None):
+        order.append(f'read:{cropped}')
+        if cropped == 'bad':
+            raise RuntimeError("tesseract failed")
+        return {'mrz_data': {'read': cropped}, 'read_image': None, 'timings': {}, 'read_metrics': {}}
+
+    monkeypatch.setattr(mrz_jobs, 'process_upload', fake_process_upload)
+    monkeypatch.setattr(mrz_jobs, 'process_read', fake_process_read)
+    job_queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), workers=1)
+    job_queue.order, job_queue.gate = order, gate
+    yield job_queue
+    gate.set()
+    job_queue.close()
+
+
+def finished(job_queue, job_id):
+    status = job_queue.status(job_id)
+    return status['queued'] == 0 and status['running'] == 0
+
+
+def test_interactive_job_preempts_queued_bulk_files(queue):
+    blocker = queue.submit([('block', b'x')])
+    wait_until(lambda: queue.order == ['block'])
+    bulk = queue.submit([('bulk1', b'x'), ('bulk2', b'x')], priority=PRIORITY_BULK)
+    urgent = queue.submit([('urgent', b'x')], priority=PRIORITY_INTERACTIVE)
+    queue.gate.set()
+
+    wait_until(lambda: finished(queue, bulk) and finished(queue, urgent) and finished(queue, blocker))
+    assert queue.order == ['block', 'urgent', 'bulk1', 'bulk2']
+    items, cursor = queue.results(bulk)
+    assert [item['name'] for item in items] == ['bulk1', 'bulk2']
+    assert queue.results(bulk, since=cursor) == ([], cursor)
+
+
+def test_cancel_skips_queued_files(queue):
+    queue.submit([('block', b'x')])
+    wait_until(lambda: queue.order == ['block'])
+    job_id = queue.submit([('a', b'x'), ('b', b'x')])
+
+    assert queue.cancel(job_id)
+    assert not queue.cancel(job_id)
+    queue.gate.set()
+    later = queue.submit([('after', b'x')])
+    wait_until(lambda: finished(queue, later))
+
+    status = queue.status(job_id)
+    assert (status['status'], status['cancelled'], status['finished']) == ('cancelled', 2, 0)
+    assert queue.results(job_id)[0] == []
+    assert 'a' not in queue.order and 'b' not in queue.order
+
+
+def test_failed_files_are_recorded(queue):
+    job_id = queue.submit([('good', b'abc'), ('bad.png', b'x')])
+    wait_until(lambda: finished(queue, job_id))
+
+    status = queue.status(job_id)
+    assert (status['status'], status['finished'], status['failed']) == ('done', 2, 1)
+    items = {item['name']: item for item in queue.results(job_id)[0]}
+    assert items['good']['status'] == 'done'
+    assert items['good']['records'] == [{'page': 0, 'mrz_data': {'name': 'good', 'size': 3}}]
+    assert items['bad.png']['status'] == 'failed'
+    assert items['bad.png']['error'] == 'cannot decode bad.png'
+
+
+def test_payloads_are_dropped_and_database_is_private(queue):
+    job_id = queue.submit([('good', b'passport image bytes')])
+    wait_until(lambda: finished(queue, job_id))
+    with sqlite3.connect(queue.path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM items WHERE payload IS NOT NULL').fetchone()[0] == 0
+    assert stat.S_IMODE(os.stat(queue.path).st_mode) == 0o600
+    # secure_delete يُضبط لكل اتصال: صفحات الصور المحذوفة تُكتب أصفاراً
+    assert queue._conn.execute('PRAGMA secure_delete').fetchone()[0] == 1
+
+
+def test_interactive_reads_run_first_and_stay_in_memory(queue):
+    queue.submit([('block', b'x')])
+    wait_until(lambda: queue.order == ['block'])
+    bulk = queue.submit([('bulk', b'x')])
+    read_id = queue.submit_read('crop', 'normalized')
+    failing = queue.submit_read('bad', 'normalized')
+    assert queue.read_status(read_id) == 'queued'
+    assert queue.read_result(read_id) is None
+    queue.gate.set()
+
+    wait_until(lambda: finished(queue, bulk))
+    assert queue.order == ['block', 'read:crop', 'read:bad', 'bulk']
+    assert queue.read_status(read_id) == 'done'
+    assert queue.read_result(read_id)['mrz_data'] == {'read': 'crop'}
+    # النتيجة تُحذف بعد استلامها
+    assert queue.read_status(read_id) is None
+    assert queue.read_result(failing) == {'error': 'tesseract failed'}
+    with sqlite3.connect(queue.path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 2
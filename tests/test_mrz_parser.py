@@ -0,0 +1,93 @@
+"""محلل ICAO 9303: العينات الرسمية وتصحيح الحروف الملتبسة بأرقام التحقق"""
+import pytest
+
+from mrz_parser import check_digit, parse_mrz
+
+
+# عينات ICAO 9303 (الأجزاء 4 و 5 و 6)
+TD1 = (
+    "I<UTOD231458907<<<<<<<<<<<<<<<\n"
+    "7408122F1204159UTO<<<<<<<<<<<6\n"
+    "ERIKSSON<<ANNA<MARIA<<<<<<<<<<"
+)
+TD2 = (
+    "I<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<\n"
+    "D231458907UTO7408122F1204159<<<<<<<6"
+)
+TD3 = (
+    "P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<\n"
+    "L898902C36UTO7408122F1204159ZE184226B<<<<<10"
+)
+
+
+def td3_line2(personal_number, check_personal):
+    """السطر الثاني لعينة TD3 برقم شخصي آخر ورقم مركب محسوب"""
+    body = 'L898902C36UTO7408122F1204159' + personal_number + check_personal
+    composite = check_digit(body[0:10] + body[13:20] + body[21:43])
+    return body + composite
+
+
+@pytest.mark.parametrize('text, mrz_type', [(TD1, 'TD1'), (TD2, 'TD2'), (TD3, 'TD3')])
+def test_icao_specimens_score_100(text, mrz_type):
+    result = parse_mrz(text)
+    assert result['mrz_type'] == mrz_type
+    assert result['valid_score'] == 100
+    assert result['corrections'] == []
+    assert result['surname'] == 'ERIKSSON' and result['names'] == 'ANNA MARIA'
+
+
+@pytest.mark.parametrize('text, bad, good', [
+    (TD3, 'L8989O2C3', 'L898902C3'),
+    (TD1, 'D2314589O', 'D23145890'),
+])
+def test_single_confusable_swap_is_corrected(text, bad, good):
+    result = parse_mrz(text.replace(good, bad))
+    assert result['number'] == good
+    assert result['valid_number'] and result['valid_score'] == 100
+    assert [(c['from'], c['to']) for c in result['corrections']] == [('O', '0')]
+
+
+def test_letters_in_digit_fields_are_replaced():
+    result = parse_mrz(TD3.replace('7408122F', '74O8I22F'))
+    assert result['date_of_birth'] == '740812'
+    assert result['valid_date_of_birth']
+
+
+def test_ambiguous_swap_is_refused():
+    # B→8 يعيد الرقم الأصلي، لكن 8→B في خانة أخرى ينجح أيضاً بنفس رقم التحقق
+    result = parse_mrz(TD3.replace('L898902C3', 'LB98902C3'))
+    assert result['number'] == 'LB98902C3'
+    assert not result['valid_number']
+    assert result['corrections'] == []
+
+
+def test_composite_digit_corrects_optional_field():
+    line1 = 'I<UTOD231458907AB12345<<<<<<<<'
+    line2 = '7408122F1204159UTO<<<<<<<<<<<'
+    line2 += check_digit(line1[5:30] + line2[0:7] + line2[8:15] + line2[18:29])
+    text = '\n'.join((line1, line2, 'ERIKSSON<<ANNA<MARIA<<<<<<<<<<'))
+    assert parse_mrz(text)['valid_score'] == 100
+
+    result = parse_mrz(text.replace('AB12345', 'AB1234S'))
+    assert result['optional1'] == 'AB12345<<<<<<<<'
+    assert result['valid_composite']
+
+
+@pytest.mark.parametrize('check, valid', [('<', True), ('0', True), ('5', False)])
+def test_empty_personal_number_filler_rule(check, valid):
+    line1 = TD3.splitlines()[0]
+    result = parse_mrz(line1 + '\n' + td3_line2('<' * 14, check))
+    assert result['valid_personal_number'] is valid
+    assert result['valid_composite']
+
+
+def test_sex_is_not_corrected_to_a_letter():
+    line1, line2 = TD3.splitlines()
+    result = parse_mrz(line1 + '\n' + line2[:20] + '0' + line2[21:])
+    assert result['sex'] == '0'
+    assert not any(c['line'] == 1 and c['index'] == 20 for c in result['corrections'])
+
+
+def test_unreadable_text_returns_none():
+    assert parse_mrz('not an mrz') is None
+    assert parse_mrz(None) is None
@@ -0,0 +1,17 @@
+import sys
+
+import pytest
+
+import ocr_backends
+
+
+def test_pool_without_tesserocr_names_missing_package(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'tesserocr', None)
+    with pytest.raises(RuntimeError, match='tesserocr'):
+        ocr_backends.set_ocr_backend('pool', pool_size=1)
+    assert ocr_backends._active_pool is None
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        ocr_backends.set_ocr_backend('nope')
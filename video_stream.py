@@ -0,0 +1,200 @@
+"""قراءة MRZ من فيديو أو كاميرا مع فرز الإطارات والتصويت بين القراءات
+
+    python video_stream.py recording.mp4 --step 2 --max-frames 300
+    python video_stream.py 0                  # كاميرا الويب (أو /dev/video0)
+
+الإطارات التي لا تحتوي على MRZ أو غير الحادة تُستبعد قبل التحسين وOCR، ثم
+تُدمج قراءات الإطارات الجيدة بتصويت لكل حرف في نتيجة واحدة.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+
+import cv2
+
+from mrz_parser import LINE_LENGTHS, parse_mrz, split_lines
+from mrz_pipeline import PIPELINE_PARAMS, detect_mrz_region, is_mrz_valid, read_cropped_mrz
+
+
+# عرض منطقة MRZ عند حساب الحدة (حوالي 10 بكسل لكل حرف) ليكون المقياس مستقلاً عن الدقة
+SHARPNESS_WIDTH = 440
+
+# أقل تباين Laplacian مقبول (الضبابية بانحراف ≥ ربع عرض الحرف تقريباً تقع تحته)
+MIN_SHARPNESS = 300.0
+
+
+def open_source(source):
+    """فتح ملف فيديو أو كاميرا (رقم الجهاز أو /dev/videoN)"""
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video source: {source!r}")
+    return capture
+
+
+def iter_frames(source, step=1, max_frames=None):
+    """إطارات RGB من المصدر: (رقم الإطار، المصفوفة)"""
+    capture = open_source(source)
+    try:
+        index = 0
+        yielded = 0
+        while max_frames is None or yielded < max_frames:
+            if not capture.grab():
+                break
+            if index % step == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                yield index, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                yielded += 1
+            index += 1
+    finally:
+        capture.release()
+
+
+def mrz_sharpness(gray_region):
+    """تباين Laplacian لمنطقة MRZ بعد توحيد عرضها وتنعيم الضوضاء"""
+    scale = SHARPNESS_WIDTH / float(gray_region.shape[1])
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+    resized = cv2.resize(gray_region, None, fx=scale, fy=scale, interpolation=interpolation)
+    return cv2.Laplacian(cv2.GaussianBlur(resized, (3, 3), 0), cv2.CV_64F).var()
+
+
+def triage_frame(frame, min_sharpness=MIN_SHARPNESS):
+    """فحص رخيص للإطار: (السبب، الحدة، المنطقة المقصوصة)
+
+    السبب 'ok' أو 'no_mrz' أو 'blurry'؛ المنطقة المقصوصة RGB فقط للإطارات المقبولة.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY) if frame.ndim == 3 else frame
+    box = detect_mrz_region(gray)
+    if box is None:
+        return 'no_mrz', 0.0, None
+    x, y, w, h = box
+    sharpness = mrz_sharpness(gray[y:y + h, x:x + w])
+    if sharpness < min_sharpness:
+        return 'blurry', sharpness, None
+    return 'ok', sharpness, frame[y:y + h, x:x + w]
+
+
+def vote_mrz(readings):
+    """دمج عدة قراءات بتصويت لكل حرف موزون بدرجة الدقة، وإرجاع القاموس أو None"""
+    votes = {}
+    for mrz_data in readings:
+        mrz_type, lines = split_lines(mrz_data.get('raw_text') or '')
+        if mrz_type is None:
+            continue
+        length = LINE_LENGTHS[mrz_type]
+        weight = mrz_data.get('valid_score', 0) + 1
+        columns = votes.setdefault(mrz_type, [[Counter() for _ in range(length)] for _ in lines])
+        for row, line in enumerate(lines):
+            for col, char in enumerate((line + '<' * length)[:length]):
+                columns[row][col][char] += weight
+    if not votes:
+        return None
+
+    # النوع الأكثر أصواتاً ثم الحرف الأكثر أصواتاً في كل خانة
+    mrz_type, columns = max(votes.items(), key=lambda item: sum(item[1][0][0].values()))
+    lines = [''.join(counter.most_common(1)[0][0] for counter in row) for row in columns]
+    consensus = parse_mrz('\n'.join(lines))
+    if consensus is not None:
+        consensus['raw_text'] = '\n'.join(lines)
+        consensus['method'] = f'vote({len(readings)})'
+    return consensus
+
+
+def read_stream(source, params=None, step=1, max_frames=None, min_sharpness=MIN_SHARPNESS,
+                min_reads=2, max_reads=8, stats=None):
+    """قراءة MRZ من فيديو أو كاميرا وإرجاع النتيجة المدمجة أو None
+
+    تتوقف القراءة عندما تصبح النتيجة المدمجة صحيحة من min_reads إطارات على
+    الأقل، أو عند max_reads قراءة. stats قاموس اختياري يُملأ بإحصاءات الفرز.
+    """
+    params = {**PIPELINE_PARAMS, **(params or {})}
+    counts = Counter()
+    readings = []
+    best = consensus = None
+    started = time.perf_counter()
+
+    for _, frame in iter_frames(source, step=step, max_frames=max_frames):
+        counts['frames'] += 1
+        reason, _, region = triage_frame(frame, min_sharpness)
+        if reason != 'ok':
+            counts[reason] += 1
+            continue
+
+        counts['read'] += 1
+        _, mrz_data = read_cropped_mrz(region, params)
+        if mrz_data is None:
+            continue
+        readings.append(mrz_data)
+        if best is None or mrz_data.get('valid_score', 0) > best.get('valid_score', 0):
+            best = mrz_data
+
+        consensus = vote_mrz(readings)
+        if len(readings) >= min_reads and is_mrz_valid(consensus, params['min_valid_score']):
+            break
+        if len(readings) >= max_reads:
+            break
+
+    if stats is not None:
+        stats.update({
+            'frames': counts['frames'],
+            'dropped_no_mrz': counts['no_mrz'],
+            'dropped_blurry': counts['blurry'],
+            'frames_read': counts['read'],
+            'readings': len(readings),
+            'elapsed_ms': (time.perf_counter() - started) * 1000,
+        })
+
+    # قراءة واحدة أفضل من تصويت أضعف منها (مثلاً عند قراءتين متعارضتين)
+    if consensus is None or (best is not None and best.get('valid_score', 0) > consensus.get('valid_score', 0)):
+        return best
+    return consensus
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="قراءة MRZ من فيديو أو كاميرا")
+    parser.add_argument('source', help="ملف فيديو أو رقم الكاميرا أو /dev/videoN")
+    parser.add_argument('-o', '--output', default='-', help="ملف JSON للنتيجة ('-' للطباعة)")
+    parser.add_argument('--step', type=int, default=1, help="معالجة إطار واحد من كل N")
+    parser.add_argument('--max-frames', type=int, default=None)
+    parser.add_argument('--min-sharpness', type=float, default=MIN_SHARPNESS)
+    parser.add_argument('--min-reads', type=int, default=2, help="أقل عدد قراءات قبل التوقف")
+    parser.add_argument('--max-reads', type=int, default=8)
+    parser.add_argument('--single-pass', action='store_true', help="تعطيل القراءة متعددة المراحل لكل إطار")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    stats = {}
+    mrz_data = read_stream(
+        args.source,
+        params={'adaptive': not args.single_pass},
+        step=args.step,
+        max_frames=args.max_frames,
+        min_sharpness=args.min_sharpness,
+        min_reads=args.min_reads,
+        max_reads=args.max_reads,
+        stats=stats
+    )
+    result = json.dumps({'mrz_data': mrz_data, 'stats': stats}, ensure_ascii=False, indent=2)
+    if args.output == '-':
+        print(result)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(result)
+
+    print(
+        f"{'✅' if mrz_data else '❌'} {stats['frames']} إطار • {stats['dropped_no_mrz']} بلا MRZ"
+        f" • {stats['dropped_blurry']} ضبابي • {stats['readings']} قراءة • {stats['elapsed_ms']:.0f}ms",
+        file=sys.stderr
+    )
+    return 0 if mrz_data else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())